@@ -0,0 +1,269 @@
+# ---- IMPORTS & INTERNALS -----------------------------------------------------
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+
+from aicodeagent.functions.fs.get_project_root import get_project_root
+from aicodeagent.functions.pipeline.init_run_session import ENV_OUTPUT_DIR
+from aicodeagent.functions.pipeline.options import PipelineOptions
+from aicodeagent.functions.pipeline.persist_run import persist_run
+from aicodeagent.llm_client import (
+    ContextCachingLLMClient,
+    build_llm_client,
+    find_client,
+)
+from aicodeagent.pipeline import run_pipeline
+
+REPORT_JSON = "batch_report.json"
+REPORT_JSONL = "batch_report.jsonl"
+
+
+def load_jobs(path):
+    """
+    Read a JSONL job file: one {"prompt": ..., "target": <dir>} object per line,
+    with optional "id" and "reset". Relative targets resolve against the cwd.
+    """
+    jobs, seen = [], set()
+    with open(path, "r", encoding="utf-8") as f:
+        for n, line in enumerate(f, start=1):
+            if not line.strip() or line.lstrip().startswith("#"):
+                continue
+            try:
+                job = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{n}: invalid JSON ({e})") from e
+            if not job.get("prompt") or not job.get("target"):
+                raise ValueError(f"{path}:{n}: 'prompt' and 'target' are required")
+
+            job_id = str(job.get("id") or f"job_{n:04}")
+            if job_id in seen or "/" in job_id:
+                raise ValueError(f"{path}:{n}: invalid or duplicate id {job_id!r}")
+            seen.add(job_id)
+
+            target = os.path.abspath(job["target"])
+            if not os.path.isdir(target):
+                raise ValueError(f"{path}:{n}: target is not a directory: {target}")
+            jobs.append(
+                {
+                    "id": job_id,
+                    "prompt": job["prompt"],
+                    "target": target,
+                    "reset": bool(job.get("reset", False)),
+                }
+            )
+    return jobs
+
+
+def run_job(job, settings):
+    """
+    Run one job in the current (worker) process and return its report record.
+
+    The job gets its own root <out>/jobs/<id>/ holding a `code_to_fix` link to
+    the target, the run outputs (AICODEAGENT_OUTPUT_DIR) and console.log.
+    """
+    job_root = os.path.join(settings["out_root"], "jobs", job["id"])
+    os.makedirs(job_root, exist_ok=True)
+    link = os.path.join(job_root, "code_to_fix")
+    if not os.path.lexists(link):
+        os.symlink(job["target"], link, target_is_directory=True)
+
+    # One job at a time per worker: process-wide cwd/env are safe to switch
+    os.environ[ENV_OUTPUT_DIR] = os.path.join(job_root, "__ai_outputs__")
+    os.chdir(job_root)  # tools write under ./__ai_outputs__/<run_id>
+
+    record = {
+        "id": job["id"],
+        "target": job["target"],
+        "prompt": job["prompt"][:160],
+        "status": "error",
+        "run_id": None,
+        "save_type": None,
+        "usage": None,
+        "error": None,
+    }
+    t0 = time.perf_counter()
+    with open("console.log", "a", encoding="utf-8") as log:
+        with redirect_stdout(log), redirect_stderr(log):
+            llm = None
+            try:
+                llm = build_llm_client(
+                    offline=settings["offline"],
+                    canned_dir=settings["canned_dir"],
+                    rpm=settings["rpm"],
+                    rate_state_path=settings["rate_state_path"],
+                    hedge=settings["hedge"],
+                    context_cache=settings["context_cache"],
+                    cache_dir=settings["cache_dir"],
+                )
+                options = PipelineOptions(
+                    verbose=False,
+                    I_O=False,
+                    reset=job["reset"],
+                    demo=False,
+                    context_budget=settings["context_budget"],
+                    tool_workers=settings["tool_workers"],
+                )
+                result = run_pipeline(job["prompt"], llm, options, Path(job_root))
+                persist_run(result)
+                record.update(
+                    status="ok",
+                    run_id=result["run_id"],
+                    save_type=result["save_type"],
+                    usage=result["usage"],
+                )
+            # run_pipeline exits on INVALID_ARGUMENT: keep the worker alive
+            except (Exception, SystemExit) as e:
+                record["error"] = f"{type(e).__name__}: {e}"[:500]
+            finally:
+                client = find_client(llm, ContextCachingLLMClient)
+                if client is not None:
+                    client.close()
+
+    record["wall_s"] = round(time.perf_counter() - t0, 3)
+    return record
+
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def summarize(records, wall_s):
+    """Aggregate per-job records into batch totals."""
+    usages = [r["usage"] or {} for r in records]
+    walls = [r["wall_s"] for r in records]
+    return {
+        "jobs": len(records),
+        "ok": sum(r["status"] == "ok" for r in records),
+        "error": sum(r["status"] != "ok" for r in records),
+        "prompt_tokens": sum(u.get("prompt_tokens", 0) for u in usages),
+        "candidate_tokens": sum(u.get("candidate_tokens", 0) for u in usages),
+        "total_tokens": sum(u.get("total_tokens", 0) for u in usages),
+        "llm_latency_s": round(sum(u.get("latency_s", 0.0) for u in usages), 3),
+        "job_wall_p50_s": _percentile(walls, 0.5),
+        "job_wall_p95_s": _percentile(walls, 0.95),
+        "batch_wall_s": round(wall_s, 3),
+    }
+
+
+def run_batch(jobs, settings, concurrency=4):
+    """
+    Run `jobs` on a process pool of `concurrency` workers.
+    Records are appended to batch_report.jsonl as jobs finish; the full report
+    (jobs in input order + totals) is written to batch_report.json.
+    """
+    out_root = settings["out_root"]
+    os.makedirs(out_root, exist_ok=True)
+    jsonl_path = os.path.join(out_root, REPORT_JSONL)
+
+    t0 = time.perf_counter()
+    records = {}
+    with ProcessPoolExecutor(max_workers=concurrency) as pool:
+        futures = {pool.submit(run_job, job, settings): job for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                record = future.result()
+            except Exception as e:  # worker died (e.g. killed by the OS)
+                record = {
+                    "id": job["id"],
+                    "target": job["target"],
+                    "prompt": job["prompt"][:160],
+                    "status": "error",
+                    "error": f"{type(e).__name__}: {e}"[:500],
+                    "usage": None,
+                    "wall_s": 0.0,
+                }
+            records[job["id"]] = record
+            with open(jsonl_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            tokens = (record.get("usage") or {}).get("total_tokens", 0)
+            print(
+                f"[{len(records)}/{len(jobs)}] {record['id']}: {record['status']} "
+                f"({record['wall_s']:.1f}s, {tokens} tokens)",
+                flush=True,
+            )
+
+    ordered = [records[job["id"]] for job in jobs]
+    report = {"totals": summarize(ordered, time.perf_counter() - t0), "jobs": ordered}
+    with open(os.path.join(out_root, REPORT_JSON), "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="aicodeagent batch",
+        description="Run many prompt/target jobs across a process pool",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("jobs", help="JSONL file of {prompt, target[, id, reset]}")
+    parser.add_argument(
+        "--concurrency", type=int, default=os.cpu_count() or 4, help="Worker processes"
+    )
+    parser.add_argument(
+        "--out",
+        help="Batch output root (default: __ai_outputs__/batch_<timestamp>)",
+    )
+    parser.add_argument("--offline", action="store_true", help="Use canned llm")
+    parser.add_argument(
+        "--rpm",
+        type=int,
+        default=15,
+        help="Requests-per-minute ceiling shared by all workers",
+    )
+    parser.add_argument("--hedge", type=float, metavar="PCT", help="See main --hedge")
+    parser.add_argument("--context-budget", type=int, default=32000)
+    parser.add_argument("--tool-workers", type=int, default=4)
+    parser.add_argument("--no-context-cache", action="store_true")
+    parser.add_argument(
+        "--cache", action="store_true", help="Share an LLM response cache"
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        jobs = load_jobs(args.jobs)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if not jobs:
+        print("No jobs to run", file=sys.stderr)
+        return 1
+
+    out_root = os.path.abspath(
+        args.out or os.path.join("__ai_outputs__", f"batch_{int(time.time())}")
+    )
+    settings = {
+        "out_root": out_root,
+        "offline": args.offline,
+        "canned_dir": os.path.join(
+            get_project_root(__file__), "tests/integration/data/canned_llm"
+        ),
+        "rpm": args.rpm,
+        # Every worker draws from one token bucket (same API key)
+        "rate_state_path": os.path.join(out_root, "rate_limit.json"),
+        "hedge": args.hedge,
+        "context_cache": not args.no_context_cache,
+        "cache_dir": os.path.join(out_root, "llm_cache") if args.cache else None,
+        "context_budget": args.context_budget,
+        "tool_workers": args.tool_workers,
+    }
+
+    report = run_batch(jobs, settings, concurrency=max(1, args.concurrency))
+    totals = report["totals"]
+    print(
+        f"\n{totals['ok']}/{totals['jobs']} jobs ok, {totals['total_tokens']} tokens, "
+        f"{totals['batch_wall_s']:.1f}s. Report: {os.path.join(out_root, REPORT_JSON)}"
+    )
+    return 0 if totals["error"] == 0 else 2
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -4,6 +4,22 @@ import sys
 
 def main(argv=None) -> int:
     argv = argv or sys.argv[1:]
+    if argv and argv[0] == "batch":
+        from aicodeagent.batch import main as batch_main
+
+        return batch_main(argv[1:])
+    if argv and argv[0] == "daemon":
+        from aicodeagent.daemon import main as daemon_main
+
+        return daemon_main(argv[1:])
+    if argv and argv[0] == "ask":
+        from aicodeagent.daemon import client_main
+
+        return client_main(argv[1:])
+    if argv and argv[0] == "resume":
+        from aicodeagent.resume import main as resume_main
+
+        return resume_main(argv[1:])
     sys.argv = ["aicodeagent.main"] + argv
     runpy.run_module("aicodeagent.main", run_name="__main__")
     return 0
@@ -0,0 +1,321 @@
+# ---- IMPORTS & INTERNALS -----------------------------------------------------
+import argparse
+import json
+import os
+import queue
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+
+from aicodeagent.functions.fs.get_project_root import get_project_root
+from aicodeagent.functions.pipeline.options import PipelineOptions
+from aicodeagent.functions.pipeline.persist_run import persist_run
+from aicodeagent.llm_client import (
+    ContextCachingLLMClient,
+    build_llm_client,
+    find_client,
+)
+from aicodeagent.pipeline import run_pipeline
+
+ENV_SOCKET = "AICODEAGENT_SOCKET"
+
+# Per-request overrides a client may send; everything else is fixed at startup
+REQUEST_OPTIONS = ("verbose", "I_O", "reset", "stream")
+
+
+def default_socket_path() -> str:
+    """$AICODEAGENT_SOCKET, else a per-user socket in the temp dir."""
+    return os.getenv(ENV_SOCKET) or os.path.join(
+        tempfile.gettempdir(), f"aicodeagent-{os.getuid()}.sock"
+    )
+
+
+class _EventSink:
+    """
+    File-like target for a job's stdout/stderr: every write is sent to the
+    client as an "output" event (one JSON object per line). A client that
+    disconnects does not stop the job; its events are dropped.
+    """
+
+    def __init__(self, wfile):
+        self.wfile = wfile
+        self.closed = False
+        self._lock = threading.Lock()
+
+    def event(self, name, **payload):
+        with self._lock:
+            if self.closed:
+                return
+            try:
+                line = json.dumps({"event": name, **payload}, default=str) + "\n"
+                self.wfile.write(line.encode("utf-8"))
+                self.wfile.flush()
+            except OSError:
+                self.closed = True
+
+    def write(self, text):
+        if text:
+            self.event("output", text=text)
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+class _Job:
+    def __init__(self, request, sink):
+        self.request = request
+        self.sink = sink
+        self.done = threading.Event()
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        agent = self.server.agent
+        sink = _EventSink(self.wfile)
+        try:
+            request = json.loads(self.rfile.readline() or b"{}")
+        except json.JSONDecodeError as e:
+            sink.event("error", message=f"invalid request: {e}")
+            return
+
+        op = request.get("op", "run")
+        if op == "ping":
+            sink.event("pong", pid=os.getpid(), queued=agent.jobs.qsize())
+        elif op == "shutdown":
+            sink.event("bye")
+            threading.Thread(target=agent.stop, daemon=True).start()
+        elif op == "run":
+            if not request.get("prompt"):
+                sink.event("error", message="No prompt provided")
+                return
+            job = _Job(request, sink)
+            try:
+                agent.jobs.put_nowait(job)
+            except queue.Full:
+                sink.event("rejected", reason="queue full")
+                return
+            sink.event("queued", position=agent.jobs.qsize())
+            job.done.wait()
+        else:
+            sink.event("error", message=f"unknown op: {op!r}")
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class AgentDaemon:
+    """
+    Long-lived agent process serving prompts over a Unix domain socket.
+
+    Imports, tool schemas and the LLM client stack (genai.Client, rate limiter,
+    context cache) are built once. Jobs run one at a time, in arrival order,
+    from a bounded queue; a full queue rejects new requests. A job's console
+    output is streamed back to its client while it runs.
+    """
+
+    def __init__(self, llm, socket_path, project_root, queue_size=8, options=None):
+        self.llm = llm
+        self.socket_path = socket_path
+        self.project_root = Path(project_root)
+        self.jobs = queue.Queue(maxsize=queue_size)
+        self.base_options = options or PipelineOptions(
+            verbose=False, I_O=False, reset=False, demo=False
+        )
+        self.server = None
+        self._worker = None
+
+    def _options(self, request):
+        overrides = {k: bool(request[k]) for k in REQUEST_OPTIONS if k in request}
+        return PipelineOptions(**{**vars(self.base_options), **overrides})
+
+    def _run(self, job):
+        sink = job.sink
+        sink.event("started")
+        with redirect_stdout(sink), redirect_stderr(sink):
+            try:
+                result = run_pipeline(
+                    job.request["prompt"],
+                    self.llm,
+                    self._options(job.request),
+                    self.project_root,
+                )
+                persist_run(result)
+                sink.event(
+                    "done",
+                    run_id=result["run_id"],
+                    save_type=result["save_type"],
+                    usage=result["usage"],
+                )
+            # run_pipeline exits on INVALID_ARGUMENT: keep the daemon alive
+            except (Exception, SystemExit) as e:
+                sink.event("error", message=f"{type(e).__name__}: {e}")
+
+    def _work(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            try:
+                self._run(job)
+            finally:
+                job.done.set()
+
+    def start(self):
+        """Bind the socket and start the job worker (serve with `serve_forever`)."""
+        if os.path.exists(self.socket_path):
+            if ping(self.socket_path) is not None:
+                raise RuntimeError(f"daemon already running on {self.socket_path}")
+            os.unlink(self.socket_path)  # stale socket of a dead daemon
+        self.server = _Server(self.socket_path, _Handler)
+        self.server.agent = self
+        os.chmod(self.socket_path, 0o600)
+        self._worker = threading.Thread(target=self._work, daemon=True)
+        self._worker.start()
+
+    def serve_forever(self):
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            client = find_client(self.llm, ContextCachingLLMClient)
+            if client is not None:
+                client.close()
+
+    def stop(self):
+        """Finish the jobs already queued, then stop serving."""
+        self.jobs.put(None)
+        self._worker.join()
+        self.server.shutdown()
+
+
+# ---- CLIENT ------------------------------------------------------------------
+def request(socket_path, payload, timeout=None):
+    """Send one request and yield the daemon's events as they arrive."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        sock.sendall((json.dumps(payload) + "\n").encode("utf-8"))
+        with sock.makefile("rb") as f:
+            for line in f:
+                yield json.loads(line)
+
+
+def ping(socket_path, timeout=2.0):
+    """Return the daemon's pong event, or None if nothing is listening."""
+    try:
+        return next(request(socket_path, {"op": "ping"}, timeout=timeout), None)
+    except OSError:
+        return None
+
+
+def client_main(argv=None) -> int:
+    """`aicodeagent ask`: run a prompt on the warm daemon, streaming its output."""
+    parser = argparse.ArgumentParser(
+        prog="aicodeagent ask", description="Send a prompt to the running daemon"
+    )
+    parser.add_argument("prompt", nargs="?", help="Prompt to send to the model")
+    parser.add_argument("--socket", default=default_socket_path())
+    parser.add_argument("--verbose", action="store_true")
+    parser.add_argument("--I_O", action="store_true")
+    parser.add_argument("--reset", action="store_true")
+    parser.add_argument("--stream", action="store_true")
+    parser.add_argument("--stop", action="store_true", help="Shut the daemon down")
+    args = parser.parse_args(argv)
+
+    if args.stop:
+        payload = {"op": "shutdown"}
+    elif args.prompt:
+        payload = {"op": "run", "prompt": args.prompt}
+        payload.update({k: getattr(args, k) for k in REQUEST_OPTIONS})
+    else:
+        print("No prompt provided", file=sys.stderr)
+        return 1
+
+    try:
+        for event in request(args.socket, payload):
+            name = event.get("event")
+            if name == "output":
+                sys.stdout.write(event["text"])
+                sys.stdout.flush()
+            elif name == "queued" and event.get("position", 0) > 1:
+                print(f"[daemon] queued at position {event['position']}")
+            elif name == "done":
+                print(f"[daemon] {event['run_id']} finished ({event['save_type']})")
+            elif name in ("error", "rejected"):
+                reason = event.get("message") or event.get("reason")
+                print(f"[daemon] {name}: {reason}", file=sys.stderr)
+                return 1
+    except OSError as e:
+        print(
+            f"No daemon on {args.socket} ({e}); start one with 'aicodeagent daemon'",
+            file=sys.stderr,
+        )
+        return 1
+    return 0
+
+
+# ---- SERVER ENTRY POINT --------------------------------------------------------
+def main(argv=None) -> int:
+    """`aicodeagent daemon`: serve prompts until stopped."""
+    parser = argparse.ArgumentParser(
+        prog="aicodeagent daemon",
+        description="Keep the agent warm and serve prompts over a Unix socket",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("--socket", default=default_socket_path())
+    parser.add_argument(
+        "--queue-size", type=int, default=8, help="Pending jobs before rejecting"
+    )
+    parser.add_argument("--offline", action="store_true", help="Use canned llm")
+    parser.add_argument("--rpm", type=int, default=15)
+    parser.add_argument("--hedge", type=float, metavar="PCT")
+    parser.add_argument("--context-budget", type=int, default=32000)
+    parser.add_argument("--tool-workers", type=int, default=4)
+    parser.add_argument("--no-context-cache", action="store_true")
+    parser.add_argument("--cache", action="store_true")
+    args = parser.parse_args(argv)
+
+    project_root = Path(get_project_root(__file__))
+    llm = build_llm_client(
+        offline=args.offline,
+        canned_dir=project_root / "tests/integration/data/canned_llm",
+        rpm=args.rpm,
+        rate_state_path=str(Path("__ai_outputs__") / "rate_limit.json"),
+        hedge=args.hedge,
+        context_cache=not args.no_context_cache,
+        cache_dir=Path("__ai_outputs__") / "llm_cache" if args.cache else None,
+    )
+    options = PipelineOptions(
+        verbose=False,
+        I_O=False,
+        reset=False,
+        demo=False,
+        context_budget=args.context_budget,
+        tool_workers=args.tool_workers,
+    )
+    daemon = AgentDaemon(
+        llm, args.socket, project_root, queue_size=args.queue_size, options=options
+    )
+    try:
+        daemon.start()
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(f"[daemon] listening on {args.socket} (pid {os.getpid()})")
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
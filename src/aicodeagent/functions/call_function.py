@@ -1,6 +1,8 @@
 import traceback
 
-from google.genai import types
+from aicodeagent.lazy_import import LazyModule
+
+types = LazyModule("google.genai.types")
 
 
 def call_function(function_call_part, function_dict, verbose=False):
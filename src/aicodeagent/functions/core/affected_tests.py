@@ -0,0 +1,243 @@
+import ast
+import fnmatch
+import hashlib
+import importlib.util
+import json
+import os
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from aicodeagent.functions.core.code_index import iter_files
+from aicodeagent.functions.core.interpreter_pool import run_python
+from aicodeagent.functions.core.resource_usage import sandbox_limits
+from aicodeagent.functions.core.run_cache import data_files, local_sources
+from aicodeagent.functions.core.shard_runner import import_root
+from aicodeagent.functions.pipeline.init_run_session import get_output_dir
+
+# unittest's default pattern, plus pytest's *_test.py
+TEST_PATTERNS = ("test*.py", "*_test.py")
+STATE_DIR = "test_runs"
+STATE_VERSION = 1
+RUNNER_SCRIPT = os.path.join(os.path.dirname(__file__), "shard_runner.py")
+# Seconds one shard may run before it is killed
+SHARD_TIMEOUT = 300
+# Assumed duration of a test file that never ran
+DEFAULT_DURATION = 1.0
+
+# Outcomes of the records written by shard_runner
+FAILED_OUTCOMES = ("failed", "error")
+
+
+def discover(root, path=None):
+    """Test files under `root` (or its subfolder/file `path`), sorted."""
+    prefix = path.strip("/") if path and path not in (".", "./") else ""
+    files = []
+    for rel, _ in iter_files(root):
+        if prefix and rel != prefix and not rel.startswith(prefix + "/"):
+            continue
+        name = os.path.basename(rel)
+        if any(fnmatch.fnmatch(name, p) for p in TEST_PATTERNS):
+            files.append(rel)
+    return sorted(files)
+
+
+def _conftests(root, rel):
+    folder = os.path.dirname(rel)
+    found = []
+    while True:
+        path = os.path.join(root, folder, "conftest.py")
+        if os.path.isfile(path):
+            found.append(path)
+        if not folder:
+            return found
+        folder = os.path.dirname(folder)
+
+
+def needs_pytest(root, rel):
+    """
+    Whether a test file needs pytest: it imports pytest, has a conftest.py,
+    test functions taking fixtures or test classes that are not TestCases.
+    """
+    if _conftests(root, rel):
+        return True
+    try:
+        with open(os.path.join(root, rel), "rb") as f:
+            tree = ast.parse(f.read())
+    except (OSError, SyntaxError, ValueError):
+        return False  # reported by either runner
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            if any(a.name.split(".")[0] == "pytest" for a in node.names):
+                return True
+        elif isinstance(node, ast.ImportFrom):
+            if (node.module or "").split(".")[0] == "pytest":
+                return True
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef) and node.name.startswith("test"):
+            if node.args.args or node.args.kwonlyargs:
+                return True
+        elif isinstance(node, ast.ClassDef) and node.name.startswith("Test"):
+            bases = [ast.unparse(b) for b in node.bases]
+            if not any(b.endswith("TestCase") for b in bases):
+                return True
+    return False
+
+
+def default_runner(root, files):
+    """unittest (much faster to start), unless a file needs installed pytest."""
+    if importlib.util.find_spec("pytest") and any(
+        needs_pytest(root, rel) for rel in files
+    ):
+        return "pytest"
+    return "unittest"
+
+
+def file_fingerprint(root, rel):
+    """
+    Hash of a test file and every sandbox module it (or a conftest.py above
+    it) imports, transitively, plus the size and mtime of the data files and
+    fixtures (non-.py files) under its folder: the file's tests are affected
+    iff it changes.
+    """
+    sources = {}
+    for path in [os.path.join(root, rel), *_conftests(root, rel)]:
+        search_path = [import_root(path)[0], root]
+        sources.update(local_sources(path, root, search_path))
+    h = hashlib.sha256()
+    for path, data in sorted(sources.items()):
+        h.update(os.path.relpath(path, root).encode("utf-8") + b"\0")
+        h.update(hashlib.sha1(data).digest())
+    folder = os.path.join(root, os.path.dirname(rel))
+    h.update(json.dumps(data_files(folder)).encode("utf-8"))
+    return h.hexdigest()
+
+
+def _state_path(root):
+    digest = hashlib.sha1(os.path.realpath(root).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(get_output_dir(), STATE_DIR, f"{digest}.json")
+
+
+def load_state(root):
+    """{test file: {"fingerprint", "green", "duration"}} of earlier runs."""
+    try:
+        with open(_state_path(root), "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if state.get("version") != STATE_VERSION:
+        return {}
+    return state.get("files", {})
+
+
+def save_state(root, files):
+    path = _state_path(root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": STATE_VERSION, "root": root, "files": files}, f)
+    os.replace(tmp, path)
+
+
+def select(root, files, state, select_all=False):
+    """
+    Split `files` by their state at the last run: returns ({file: reason}
+    of the selected ones, {file: fingerprint}). A file is selected when it is
+    new, its fingerprint changed or it was not green.
+    """
+    selected, fingerprints = {}, {}
+    for rel in files:
+        fingerprints[rel] = file_fingerprint(root, rel)
+        prev = state.get(rel)
+        if not prev:
+            selected[rel] = "new"
+        elif prev["fingerprint"] != fingerprints[rel]:
+            selected[rel] = "changed"
+        elif not prev["green"]:
+            selected[rel] = "not green"
+        elif select_all:
+            selected[rel] = "forced"
+    return selected, fingerprints
+
+
+def plan_shards(files, state, workers):
+    """Longest-first split of `files` into at most `workers` shards of similar duration."""
+    durations = {
+        rel: state.get(rel, {}).get("duration", DEFAULT_DURATION) for rel in files
+    }
+    shards = [[0.0, []] for _ in range(max(1, min(workers, len(files))))]
+    for rel in sorted(files, key=lambda r: -durations[r]):
+        shard = min(shards, key=lambda s: s[0])
+        shard[0] += durations[rel]
+        shard[1].append(rel)
+    return [sorted(s[1]) for s in shards if s[1]]
+
+
+def run_shard(root, files, runner, timeout=SHARD_TIMEOUT):
+    """
+    Run one shard through `shard_runner`, under the sandbox limits with a
+    CPU cap of at least `timeout`; returns {"files", "records", "done" (files
+    run to the end), "finished", "exit_code", "output", "usage", "cpu_limit"}.
+    """
+    fd, results_path = tempfile.mkstemp(prefix="aicodeagent-tests-", suffix=".jsonl")
+    os.close(fd)
+    argv = [root, results_path, runner, *files]
+    limits = sandbox_limits()
+    if "RLIMIT_CPU" in limits:
+        # The per-script CPU cap would cut a shard short of its own timeout
+        limits["RLIMIT_CPU"] = max(limits["RLIMIT_CPU"], timeout)
+    try:
+        try:
+            output = run_python(
+                RUNNER_SCRIPT, cwd=root, argv=argv, timeout=timeout, limits=limits
+            )
+            exit_code, usage = output.returncode, output.usage
+            text = f"{output.stdout}{output.stderr}"
+        except subprocess.TimeoutExpired as te:
+            exit_code, usage = "TIMEOUT", te.usage
+            text = f"{te.stdout or ''}{te.stderr or ''}"
+        with open(results_path, "r", encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f if line.strip()]
+    finally:
+        os.unlink(results_path)
+    return {
+        "files": files,
+        "records": [r for r in lines if "id" in r],
+        "done": {r["file"] for r in lines if r.get("event") == "file_done"},
+        "finished": any(r.get("event") == "finished" for r in lines),
+        "exit_code": exit_code,
+        "output": text,
+        "usage": usage,
+        "cpu_limit": limits.get("RLIMIT_CPU"),
+    }
+
+
+def run_shards(root, files, runner, state, workers=None):
+    """
+    Run `files` in parallel shards, one per CPU core by default; returns the
+    shard results in shard order.
+    """
+    workers = workers or os.cpu_count() or 1
+    shards = plan_shards(files, state, workers)
+    with ThreadPoolExecutor(max_workers=len(shards)) as executor:
+        return list(executor.map(lambda s: run_shard(root, s, runner), shards))
+
+
+def update_state(state, results, fingerprints):
+    """
+    Record each file's fingerprint, greenness and duration after a run. A
+    file is green when it ran to the end without failures, even if a later
+    file of its shard killed the shard.
+    """
+    now = time.time()
+    for shard in results:
+        for rel in shard["files"]:
+            records = [r for r in shard["records"] if r["file"] == rel]
+            state[rel] = {
+                "fingerprint": fingerprints[rel],
+                "green": rel in shard["done"]
+                and not any(r["outcome"] in FAILED_OUTCOMES for r in records),
+                "duration": round(sum(r["duration"] for r in records), 4),
+                "ts": now,
+            }
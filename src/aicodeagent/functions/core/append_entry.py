@@ -0,0 +1,37 @@
+import io
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX: thread-level locking only
+    fcntl = None
+
+# One lock per log file, shared by every thread of the process
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def append_entry(path, text):
+    """
+    Append `text` to `path` in a single write.
+    Concurrent writers (threads, or processes via flock) never interleave entries.
+    """
+    path = os.path.abspath(path)
+    with _locks_guard:
+        lock = _locks.setdefault(path, threading.Lock())
+
+    with lock, open(path, "a", encoding="utf-8") as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        f.write(text)
+        f.flush()
+
+
+@contextmanager
+def entry_writer(path):
+    """Buffer a multi-write entry and append it atomically on exit."""
+    buf = io.StringIO()
+    yield buf
+    append_entry(path, buf.getvalue())
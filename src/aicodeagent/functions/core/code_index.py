@@ -0,0 +1,324 @@
+import atexit
+import fnmatch
+import hashlib
+import os
+import pickle
+import re
+import threading
+import time
+
+from aicodeagent.functions.core.create_snapshot import EXCLUDED_DIRS
+from aicodeagent.functions.pipeline.init_run_session import get_output_dir
+
+try:  # regex AST, used only to pick the trigrams a match must contain
+    from re import _parser as sre_parse
+except ImportError:  # pragma: no cover - fall back to scanning every file
+    sre_parse = None
+
+INDEX_VERSION = 1
+INDEX_DIR = "search_index"
+# Files not indexed (searched by nobody): too large or binary
+MAX_FILE_BYTES = 1 << 20
+BINARY_SNIFF_BYTES = 8192
+# Seconds a walk is trusted when no sandbox write was reported (external edits)
+REFRESH_INTERVAL = 30.0
+# Seconds between pickle writes of a changed index; the rest is written at exit
+SAVE_INTERVAL = 30.0
+
+# Bumped by `mark_changed`: indexes walked under an older value walk again
+_generation = 0
+
+
+def trigrams(text):
+    """Lower-cased 3-character substrings of `text` (case-insensitive superset)."""
+    text = text.lower()
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def required_literals(pattern, flags=0):
+    """
+    Literal runs (3+ chars) every match of `pattern` must contain, read from
+    its top-level sequence; alternations, classes and repeats end a run.
+    Returns [] when nothing can be required (every file is a candidate).
+    """
+    if sre_parse is None:
+        return []
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except re.error:
+        return []
+    runs, current = [], []
+    for op, av in parsed:
+        if op is sre_parse.LITERAL:
+            current.append(chr(av))
+            continue
+        runs.append("".join(current))
+        current = []
+    runs.append("".join(current))
+    return [r for r in runs if len(r) >= 3]
+
+
+def iter_files(root):
+    """Yield (relative path, DirEntry) of indexable files, skipping EXCLUDED_DIRS."""
+    stack = [("", root)]
+    while stack:
+        prefix, path = stack.pop()
+        try:
+            it = os.scandir(path)
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in EXCLUDED_DIRS and not entry.name.startswith(
+                        "."
+                    ):
+                        stack.append((prefix + entry.name + "/", entry.path))
+                elif entry.is_file(follow_symlinks=False):
+                    yield prefix + entry.name, entry
+
+
+def index_path(root):
+    """Pickle file of the index of `root` under the current output directory."""
+    digest = hashlib.sha1(os.path.abspath(root).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(get_output_dir(), INDEX_DIR, f"{digest}.pickle")
+
+
+class CodeIndex:
+    """
+    Trigram index of the text files under `root`, persisted in
+    <output dir>/search_index/<root hash>.pickle.
+
+    `refresh` stats every file (one scandir walk) and re-indexes only those
+    whose (mtime, size, inode) changed and whose SHA-1 differs. The walk is
+    skipped until a sandbox write is reported (`mark_changed`) or
+    REFRESH_INTERVAL passes, and changes reach the pickle at most every
+    SAVE_INTERVAL seconds and at exit. A changed or deleted file's id is
+    retired rather than removed from every posting list; postings are
+    rebuilt once retired ids outnumber live ones.
+    """
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self.path = index_path(self.root)
+        self.lock = threading.Lock()
+        self.files = {}  # rel path -> (id, (mtime_ns, size, inode), sha1)
+        self.paths = {}  # id -> rel path (live ids only)
+        self.postings = {}  # trigram -> set of ids
+        self.next_id = 0
+        self.retired = 0
+        # _generation and monotonic time of the last walk; unsaved changes
+        self.walked = (None, float("-inf"))
+        self.saved_at = float("-inf")
+        self.dirty = False
+        self._load()
+
+    # ---- PERSISTENCE ----
+    def _load(self):
+        try:
+            with open(self.path, "rb") as f:
+                data = pickle.load(f)
+        except (OSError, pickle.PickleError, EOFError, AttributeError):
+            return
+        if data.get("version") != INDEX_VERSION or data.get("root") != self.root:
+            return
+        self.files = data["files"]
+        self.postings = data["postings"]
+        self.next_id = data["next_id"]
+        self.retired = data["retired"]
+        self.paths = {entry[0]: rel for rel, entry in self.files.items()}
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(
+                {
+                    "version": INDEX_VERSION,
+                    "root": self.root,
+                    "files": self.files,
+                    "postings": self.postings,
+                    "next_id": self.next_id,
+                    "retired": self.retired,
+                },
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        os.replace(tmp, self.path)  # readers never see a partial index
+        self.saved_at = time.monotonic()
+        self.dirty = False
+
+    def flush(self):
+        """Write pending changes to the pickle."""
+        with self.lock:
+            if self.dirty:
+                self._save()
+
+    # ---- INCREMENTAL UPDATE ----
+    def _retire(self, rel):
+        file_id = self.files.pop(rel)[0]
+        self.paths.pop(file_id, None)
+        self.retired += 1
+
+    def _add(self, rel, stat_key, sha1, text):
+        file_id = self.next_id
+        self.next_id += 1
+        self.files[rel] = (file_id, stat_key, sha1)
+        self.paths[file_id] = rel
+        for gram in trigrams(text):
+            self.postings.setdefault(gram, set()).add(file_id)
+
+    def _rebuild(self):
+        files, self.files, self.paths, self.postings = self.files, {}, {}, {}
+        self.retired = 0
+        for rel, (_, stat_key, sha1) in files.items():
+            text = self._read(os.path.join(self.root, rel))
+            if text is not None:
+                self._add(rel, stat_key, sha1, text)
+
+    @staticmethod
+    def _read(path):
+        try:
+            with open(path, "rb") as f:
+                data = f.read(MAX_FILE_BYTES + 1)
+        except OSError:
+            return None
+        if len(data) > MAX_FILE_BYTES or b"\0" in data[:BINARY_SNIFF_BYTES]:
+            return None
+        return data.decode("utf-8", errors="replace")
+
+    def refresh(self, force=False):
+        """
+        Bring the index up to date with the files on disk. Returns #re-indexed.
+        Without `force`, a walk younger than REFRESH_INTERVAL with no sandbox
+        write reported since is trusted as is.
+        """
+        generation, now = _generation, time.monotonic()
+        last_generation, last_walk = self.walked
+        if not force and last_generation == generation:
+            if now - last_walk < REFRESH_INTERVAL:
+                return 0
+        self.walked = (generation, now)
+
+        changed = 0
+        seen = set()
+        for rel, entry in iter_files(self.root):
+            seen.add(rel)
+            try:
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            stat_key = (st.st_mtime_ns, st.st_size, st.st_ino)
+            known = self.files.get(rel)
+            if known and known[1] == stat_key:
+                continue
+            if st.st_size > MAX_FILE_BYTES:
+                if known:
+                    self._retire(rel)
+                    changed += 1
+                continue
+            with open(entry.path, "rb") as f:
+                data = f.read()
+            sha1 = hashlib.sha1(data).hexdigest()
+            if known and known[2] == sha1:
+                # Touched but identical: keep the postings, remember the new stat
+                self.files[rel] = (known[0], stat_key, sha1)
+                changed += 1
+                continue
+            if known:
+                self._retire(rel)
+            if b"\0" not in data[:BINARY_SNIFF_BYTES]:
+                self._add(rel, stat_key, sha1, data.decode("utf-8", errors="replace"))
+            changed += 1
+
+        for rel in set(self.files) - seen:
+            self._retire(rel)
+            changed += 1
+        if self.retired > max(1000, len(self.files)):
+            self._rebuild()
+        self.dirty = self.dirty or bool(changed)
+        if self.dirty and now - self.saved_at >= SAVE_INTERVAL:
+            self._save()
+        return changed
+
+    # ---- QUERY ----
+    def candidates(self, pattern, flags=0):
+        """Relative paths that may match `pattern`, in path order."""
+        ids = None
+        for literal in required_literals(pattern, flags):
+            for gram in trigrams(literal):
+                posting = self.postings.get(gram, set())
+                ids = set(posting) if ids is None else ids & posting
+                if not ids:
+                    return []
+        if ids is None:
+            return sorted(self.paths.values())
+        return sorted(self.paths[i] for i in ids if i in self.paths)
+
+    def search(self, regex, path_glob=None, context=2, max_results=50):
+        """
+        Return (matches, files_matched, capped). Each match is a dict with
+        path, line number, the line and its `context` lines before and after.
+        """
+        matches, files_matched = [], 0
+        for rel in self.candidates(regex.pattern, regex.flags):
+            if path_glob and not (
+                fnmatch.fnmatch(rel, path_glob)
+                or rel.startswith(path_glob.rstrip("/") + "/")
+            ):
+                continue
+            text = self._read(os.path.join(self.root, rel))
+            if text is None:
+                continue
+            lines = text.splitlines()
+            hit = False
+            for n, line in enumerate(lines):
+                if not regex.search(line):
+                    continue
+                if len(matches) >= max_results:
+                    return matches, files_matched + hit, True
+                hit = True
+                matches.append(
+                    {
+                        "path": rel,
+                        "line": n + 1,
+                        "text": line,
+                        "before": lines[max(0, n - context) : n],
+                        "after": lines[n + 1 : n + 1 + context],
+                    }
+                )
+            files_matched += hit
+        return matches, files_matched, False
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def mark_changed():
+    """Report a sandbox write (edit, script run): the next refresh walks again."""
+    global _generation
+    with _indexes_lock:
+        _generation += 1
+
+
+def get_index(root):
+    """Process-wide CodeIndex of `root` (loaded from disk on first use)."""
+    root = os.path.abspath(root)
+    with _indexes_lock:
+        index = _indexes.get(root)
+        # A different output directory (tests, AICODEAGENT_OUTPUT_DIR) reloads
+        if index is None or index.path != index_path(root):
+            if index is not None:
+                index.flush()
+            elif not _indexes:
+                atexit.register(_flush_indexes)
+            index = _indexes[root] = CodeIndex(root)
+        return index
+
+
+def _flush_indexes():
+    with _indexes_lock:
+        indexes = list(_indexes.values())
+    for index in indexes:
+        index.flush()
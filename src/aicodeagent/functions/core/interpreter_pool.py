@@ -0,0 +1,424 @@
+import atexit
+import json
+import os
+import signal
+import socket
+import struct
+import subprocess
+import sys
+import threading
+import time
+
+from aicodeagent.functions.core.output_capture import (
+    EOF,
+    LIMIT,
+    MAX_OUTPUT_BYTES,
+    TIMEOUT,
+    StreamCapture,
+    read_streams,
+)
+from aicodeagent.functions.core.resource_usage import (
+    ChildTracker,
+    make_usage,
+    sandbox_limits,
+)
+
+# Warm fork servers kept idle, and scripts run by one before it is replaced
+POOL_SIZE = 2
+MAX_RUNS_PER_WORKER = 50
+# "0" runs every script in a fresh interpreter (the pre-pool behaviour)
+ENV_WARM_POOL = "AICODEAGENT_WARM_POOL"
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(__file__), "pool_worker.py")
+_HEADER = struct.Struct("!I")
+# Seconds granted to the server to report a killed child before it is dropped
+KILL_GRACE = 5.0
+# Seconds spent collecting the output written before a timeout kill
+DRAIN_GRACE = 0.5
+
+
+def warm_pool_enabled():
+    supported = hasattr(os, "fork") and hasattr(socket, "send_fds")
+    return supported and os.getenv(ENV_WARM_POOL, "1") != "0"
+
+
+def _startup_env(env):
+    """Variables read at interpreter startup: a worker only serves matching jobs."""
+    return tuple(sorted((k, v) for k, v in env.items() if k.startswith("PYTHON")))
+
+
+class _Worker:
+    """One pool_worker.py fork server and the socket to talk to it."""
+
+    def __init__(self, env):
+        self.key = _startup_env(env)
+        self.sock, theirs = socket.socketpair()
+        self.proc = subprocess.Popen(
+            [sys.executable, WORKER_SCRIPT, str(theirs.fileno())],
+            pass_fds=(theirs.fileno(),),
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        theirs.close()
+        self.runs = 0
+        self.buffer = b""
+
+    def send(self, message, fds):
+        payload = json.dumps(message).encode("utf-8")
+        data = _HEADER.pack(len(payload)) + payload
+        sent = socket.send_fds(self.sock, [data], fds)
+        if sent < len(data):
+            self.sock.sendall(data[sent:])
+
+    def receive(self, deadline):
+        """Next message from the server, or None when `deadline` passes."""
+        while True:
+            if len(self.buffer) >= _HEADER.size:
+                (size,) = _HEADER.unpack_from(self.buffer)
+                end = _HEADER.size + size
+                if len(self.buffer) >= end:
+                    message = json.loads(self.buffer[_HEADER.size : end])
+                    self.buffer = self.buffer[end:]
+                    return message
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            self.sock.settimeout(remaining)
+            try:
+                chunk = self.sock.recv(1 << 16)
+            except socket.timeout:
+                return None
+            if not chunk:
+                raise ConnectionError("interpreter pool worker exited")
+            self.buffer += chunk
+
+    def close(self):
+        self.sock.close()  # EOF: the server exits after its current job
+        try:
+            self.proc.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+            self.proc.wait()
+
+
+class RunResult(subprocess.CompletedProcess):
+    """
+    CompletedProcess plus the capture details (total bytes, spill files) and
+    the resource usage (see `resource_usage.make_usage`).
+    """
+
+    def __init__(self, args, returncode, captures, limit_exceeded=False, usage=None):
+        out, err = captures
+        super().__init__(args, returncode, out.text(), err.text())
+        self.stdout_bytes = out.total
+        self.stderr_bytes = err.total
+        self.truncated = out.omitted > 0 or err.omitted > 0
+        self.limit_exceeded = limit_exceeded
+        self.spill_paths = [c.spill_path for c in captures if c.spill_path]
+        self.usage = usage
+
+
+def _captures(spill_prefix):
+    if spill_prefix:
+        return [
+            StreamCapture(spill_path=f"{spill_prefix}.stdout.log"),
+            StreamCapture(spill_path=f"{spill_prefix}.stderr.log"),
+        ]
+    return [StreamCapture(), StreamCapture()]
+
+
+def _timeout_error(args, timeout, captures, usage=None):
+    for capture in captures:
+        capture.close()
+    out, err = captures
+    error = subprocess.TimeoutExpired(
+        args, timeout, output=out.text(), stderr=err.text()
+    )
+    error.usage = usage
+    return error
+
+
+def _usage(done, tracker):
+    # `done` is the server's exit message, None if it never came
+    if not done:
+        return None
+    return make_usage(done["rusage"], tracker.count if tracker else None)
+
+
+def _kill_group(pid):
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+class InterpreterPool:
+    """
+    Pre-started interpreters that run Python scripts without paying
+    interpreter startup and `site` import on every call.
+
+    Each worker is a fork server (`pool_worker.py`); every script runs in a
+    freshly forked child with its own session, cwd, argv, environment and
+    `__main__`, so nothing leaks from one run to the next, and the run's
+    rlimits. On timeout the child's whole process group is killed. Workers are replaced after
+    `max_runs` scripts, and `size` idle workers are kept warm.
+    """
+
+    def __init__(self, size=POOL_SIZE, max_runs=MAX_RUNS_PER_WORKER):
+        self.size = size
+        self.max_runs = max_runs
+        self.idle = []
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def _acquire(self, env):
+        key = _startup_env(env)
+        with self.lock:
+            for i, worker in enumerate(self.idle):
+                if worker.key == key and worker.proc.poll() is None:
+                    return self.idle.pop(i)
+        return _Worker(env)
+
+    def _release(self, worker, reusable):
+        worker.runs += 1
+        if reusable and worker.runs < self.max_runs:
+            with self.lock:
+                if not self.closed and len(self.idle) < self.size:
+                    self.idle.append(worker)
+                    return
+        worker.close()
+
+    def prewarm(self, env=None):
+        """Start idle workers up to the pool size (they warm up in the background)."""
+        env = dict(os.environ if env is None else env)
+        with self.lock:
+            missing = self.size - len(self.idle)
+            if self.closed or missing <= 0:
+                return
+            self.idle += [_Worker(env) for _ in range(missing)]
+
+    def run(
+        self,
+        path,
+        cwd,
+        argv=(),
+        env=None,
+        timeout=30,
+        max_output_bytes=MAX_OUTPUT_BYTES,
+        spill_prefix=None,
+        limits=None,
+    ):
+        """
+        Run `path` like `subprocess.run([sys.executable, path, *argv],
+        cwd=cwd, env=env, timeout=timeout, capture_output=True, text=True)`,
+        with output captured as in `output_capture` and `limits` ({"RLIMIT_*":
+        value}) applied: returns a RunResult, raises subprocess.TimeoutExpired
+        with the output and usage captured so far.
+        """
+        env = dict(os.environ if env is None else env)
+        args = [sys.executable, path, *argv]
+        deadline = time.monotonic() + timeout
+        captures = _captures(spill_prefix)
+        worker = self._acquire(env)
+        out_r, out_w = os.pipe()
+        err_r, err_w = os.pipe()
+        reusable = False
+        try:
+            job = {
+                "path": path,
+                "cwd": os.fspath(cwd),
+                "argv": list(argv),
+                "env": env,
+                "limits": limits or {},
+            }
+            try:
+                worker.send(job, [out_w, err_w])
+            finally:
+                os.close(out_w)
+                os.close(err_w)
+
+            started = worker.receive(deadline)
+            if started is None:
+                raise _timeout_error(args, timeout, captures)
+            tracker = ChildTracker(started["pid"])
+            outcome = read_streams(
+                [out_r, err_r], captures, deadline, max_output_bytes, tracker.sample
+            )
+            done = worker.receive(deadline) if outcome != LIMIT else None
+            if done is None:
+                # Timed out or too much output: kill the script's process group
+                _kill_group(started["pid"])
+                done = worker.receive(time.monotonic() + KILL_GRACE)
+                if outcome != LIMIT:
+                    reusable = done is not None
+                    drain = time.monotonic() + DRAIN_GRACE
+                    read_streams([out_r, err_r], captures, drain, max_output_bytes)
+                    raise _timeout_error(args, timeout, captures, _usage(done, tracker))
+            # A server that never reported the killed script is not reused
+            reusable = done is not None
+            for capture in captures:
+                capture.close()
+            return RunResult(
+                args,
+                done["exit_code"] if done else -signal.SIGKILL,
+                captures,
+                limit_exceeded=outcome == LIMIT,
+                usage=_usage(done, tracker),
+            )
+        finally:
+            os.close(out_r)
+            os.close(err_r)
+            for capture in captures:
+                capture.close()
+            self._release(worker, reusable)
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            idle, self.idle = self.idle, []
+        for worker in idle:
+            worker.close()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Process-wide InterpreterPool, closed at exit."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = InterpreterPool()
+            atexit.register(_pool.close)
+        return _pool
+
+
+def _forget_pool():
+    # A forked process (e.g. a batch worker) must not share the parent's sockets
+    global _pool
+    _pool = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_pool)
+
+
+def prewarm_pool():
+    """Start the warm workers ahead of the first run_python_file call."""
+    if warm_pool_enabled():
+        get_pool().prewarm()
+
+
+def _wait4(proc, timeout):
+    """
+    `proc.wait(timeout)` through os.wait4: the rusage of the reaped process,
+    or None if it is still running after `timeout` seconds (None: no limit).
+    """
+    if timeout is None:
+        _, status, rusage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        return rusage
+    deadline = time.monotonic() + timeout
+    delay = 0.0005
+    while True:
+        pid, status, rusage = os.wait4(proc.pid, os.WNOHANG)
+        if pid:
+            proc.returncode = os.waitstatus_to_exitcode(status)
+            return rusage
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, 0.05)
+
+
+def _run_cold(path, cwd, argv, env, timeout, max_output_bytes, spill_prefix, limits):
+    """One fresh interpreter per script, with the same capture as the pool."""
+    args = [sys.executable, path, *argv]
+    command = args
+    if limits:
+        # Set by a bootstrap that then execs the script: preexec_fn is unsafe
+        # in a parent running threads (the tool pool)
+        command = [sys.executable, "-I", "-S", WORKER_SCRIPT, "--exec"]
+        command += [json.dumps(limits), path, *argv]
+    t0 = time.monotonic()
+    deadline = t0 + timeout
+    captures = _captures(spill_prefix)
+    try:
+        with subprocess.Popen(
+            command,
+            cwd=cwd,
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            start_new_session=True,  # a timeout kills the whole tree
+        ) as proc:
+            tracker = ChildTracker(proc.pid)
+            fds = [proc.stdout.fileno(), proc.stderr.fileno()]
+            outcome = read_streams(
+                fds, captures, deadline, max_output_bytes, tracker.sample
+            )
+            if outcome != EOF:
+                _kill_group(proc.pid)
+            if outcome == TIMEOUT:
+                drain = time.monotonic() + DRAIN_GRACE
+                read_streams(fds, captures, drain, max_output_bytes)
+            rusage = _wait4(proc, max(0, deadline - time.monotonic()))
+            if rusage is None:
+                _kill_group(proc.pid)
+                rusage = _wait4(proc, None)
+                outcome = TIMEOUT
+        raw = {
+            "utime": rusage.ru_utime,
+            "stime": rusage.ru_stime,
+            "maxrss": rusage.ru_maxrss,
+            "wall": time.monotonic() - t0,
+        }
+        usage = make_usage(raw, tracker.count)
+        if outcome == TIMEOUT:
+            raise _timeout_error(args, timeout, captures, usage)
+        for capture in captures:
+            capture.close()
+        return RunResult(
+            args,
+            proc.returncode,
+            captures,
+            limit_exceeded=outcome == LIMIT,
+            usage=usage,
+        )
+    finally:
+        for capture in captures:
+            capture.close()
+
+
+def run_python(
+    path,
+    cwd,
+    argv=(),
+    env=None,
+    timeout=30,
+    max_output_bytes=MAX_OUTPUT_BYTES,
+    spill_prefix=None,
+    limits=None,
+):
+    """
+    Run a script on the warm pool, or in a fresh interpreter when disabled.
+    Output beyond `max_output_bytes` kills the script; with `spill_prefix`
+    streams that had to be cut are kept in full in <prefix>.stdout.log and
+    <prefix>.stderr.log. `limits` defaults to `sandbox_limits()` (pass {} for
+    none); the result's `usage` reports wall and CPU time, peak RSS and the
+    child processes seen.
+    """
+    if limits is None:
+        limits = sandbox_limits()
+    if warm_pool_enabled():
+        return get_pool().run(
+            path, cwd, argv, env, timeout, max_output_bytes, spill_prefix, limits
+        )
+    return _run_cold(
+        path, cwd, argv, env, timeout, max_output_bytes, spill_prefix, limits
+    )
@@ -0,0 +1,154 @@
+import mmap
+import os
+import threading
+from array import array
+from collections import OrderedDict
+
+# Files whose line-offset index is kept between calls
+MAX_CACHED_FILES = 32
+COUNT_CHUNK = 1 << 20
+
+
+class _Index:
+    """Line-start offsets of one file version, extended only as far as needed."""
+
+    def __init__(self, size):
+        self.size = size
+        # Per file version, so reads of unrelated files never wait on each other
+        self.lock = threading.Lock()
+        self.offsets = array("Q", [0] if size else [])
+        self.complete = size == 0
+        self.total_lines = None
+
+    def extend(self, mm, lines):
+        """Make sure the starts of lines 1..`lines` (if any) are known."""
+        offsets = self.offsets
+        pos = offsets[-1] if offsets else 0
+        while not self.complete and len(offsets) < lines:
+            nl = mm.find(b"\n", pos)
+            if nl == -1 or nl + 1 >= self.size:
+                self.complete = True
+                break
+            pos = nl + 1
+            offsets.append(pos)
+
+    def count_lines(self, mm):
+        if self.total_lines is None:
+            if self.complete:
+                self.total_lines = len(self.offsets)
+            else:
+                # Counted in C over the mapping; the index itself stays lazy
+                newlines = sum(
+                    mm[i : i + COUNT_CHUNK].count(b"\n")
+                    for i in range(0, self.size, COUNT_CHUNK)
+                )
+                self.total_lines = newlines + (mm[self.size - 1 :] != b"\n")
+        return self.total_lines
+
+    def line_end(self, line):
+        """Byte offset just past `line` (1-based), once extended to line + 1."""
+        return self.offsets[line] if line < len(self.offsets) else self.size
+
+
+_cache = OrderedDict()  # path -> ((mtime_ns, size, inode), _Index)
+_lock = threading.Lock()  # guards `_cache` only
+
+
+def _index_for(path, st):
+    key = (st.st_mtime_ns, st.st_size, st.st_ino)
+    with _lock:
+        cached = _cache.get(path)
+        if cached and cached[0] == key:
+            _cache.move_to_end(path)
+            return cached[1]
+        index = _Index(st.st_size)
+        _cache[path] = (key, index)
+        while len(_cache) > MAX_CACHED_FILES:
+            _cache.popitem(last=False)
+        return index
+
+
+def _open_mapped(f, size):
+    # mmap rejects empty files
+    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+
+def read_lines(path, start_line=1, end_line=None, max_chars=None, count_total=True):
+    """
+    Return (text, meta) for lines `start_line`..`end_line` (1-based, inclusive)
+    of `path`; `meta` holds the shown range and the file's total lines and
+    bytes. The line index only grows up to the range, but counting the total
+    lines scans the whole file once per file version: with `count_total=False`
+    and an `end_line`, only the bytes up to the range are touched and
+    `total_lines` is None unless the range reached the end of the file. With
+    `max_chars` the text stops at the last whole line that fits.
+    """
+    start_line = max(1, int(start_line or 1))
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        index = _index_for(path, st)
+        mm = _open_mapped(f, st.st_size)
+        try:
+            with index.lock:
+                wanted = end_line if end_line is not None else start_line
+                index.extend(mm, max(start_line, int(wanted)) + 1)
+                if count_total or end_line is None:
+                    total_lines = index.count_lines(mm)
+                else:
+                    # Indexed up to the range only: the total is known at EOF
+                    total_lines = len(index.offsets) if index.complete else None
+                lines = int(end_line) if total_lines is None else total_lines
+                if start_line > lines:
+                    return "", _meta(start_line, start_line - 1, total_lines, st)
+                last = min(int(end_line or lines), lines)
+                begin = index.offsets[start_line - 1]
+                stop = index.line_end(last)
+            if max_chars is not None:
+                # UTF-8: a char is at least one byte, so this bounds the decode
+                stop = min(stop, begin + max_chars * 4)
+            text = mm[begin:stop].decode("utf-8", errors="replace")
+        finally:
+            if st.st_size:
+                mm.close()
+
+    meta = _meta(start_line, last, total_lines, st)
+    if max_chars is not None and len(text) > max_chars:
+        cut = text.rfind("\n", 0, max_chars)
+        if cut >= 0:
+            text = text[: cut + 1]
+            meta["line_end"] = start_line + text.count("\n") - 1
+        else:
+            # One line longer than the budget: continue it by byte offset
+            text = text[:max_chars]
+            meta["line_end"] = start_line
+            meta["partial_line_next_byte"] = begin + len(text.encode("utf-8"))
+    return text, meta
+
+
+def read_bytes(path, offset=0, length=None):
+    """Return (text, meta) for `length` bytes of `path` from `offset`."""
+    offset = max(0, int(offset or 0))
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        mm = _open_mapped(f, st.st_size)
+        try:
+            stop = st.st_size if length is None else min(st.st_size, offset + length)
+            data = mm[offset:stop] if offset < st.st_size else b""
+        finally:
+            if st.st_size:
+                mm.close()
+    meta = {
+        "byte_start": offset,
+        "byte_end": offset + len(data),
+        "total_bytes": st.st_size,
+    }
+    return data.decode("utf-8", errors="replace"), meta
+
+
+def _meta(first, last, total_lines, st):
+    return {
+        "line_start": first,
+        "line_end": last,
+        "total_lines": total_lines,
+        "total_bytes": st.st_size,
+    }
@@ -0,0 +1,111 @@
+import locale
+import os
+import selectors
+import time
+
+# Bytes kept from the start and the end of each stream
+HEAD_BYTES = 8192
+TAIL_BYTES = 8192
+# Output (stdout + stderr) after which the script is killed
+MAX_OUTPUT_BYTES = 10 * 1024 * 1024
+
+# read_streams outcomes
+EOF = "eof"
+TIMEOUT = "timeout"
+LIMIT = "limit"
+# Seconds between two `on_tick` calls of read_streams
+TICK = 0.05
+
+
+def decode(data):
+    # As subprocess.run(text=True): locale encoding, universal newlines
+    text = data.decode(locale.getpreferredencoding(False), errors="replace")
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+class StreamCapture:
+    """
+    Bounded capture of one output stream: the first `head` bytes, a ring
+    buffer of the last `tail` bytes and the total byte count. With
+    `spill_path` every byte is also written to that file.
+    """
+
+    def __init__(self, head=HEAD_BYTES, tail=TAIL_BYTES, spill_path=None):
+        self.head_size = head
+        self.tail_size = tail
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.total = 0
+        self.spill_path = spill_path
+        self._spill = open(spill_path, "wb") if spill_path else None
+
+    def write(self, data):
+        self.total += len(data)
+        if self._spill:
+            self._spill.write(data)
+        room = self.head_size - len(self.head)
+        if room > 0:
+            self.head += data[:room]
+            data = data[room:]
+        if data:
+            self.tail += data
+            if len(self.tail) > self.tail_size:
+                del self.tail[: len(self.tail) - self.tail_size]
+
+    @property
+    def omitted(self):
+        return self.total - len(self.head) - len(self.tail)
+
+    def close(self, keep_spill=None):
+        """Close the spill file; drop it unless output was cut (or `keep_spill`)."""
+        if not self._spill:
+            return
+        self._spill.close()
+        self._spill = None
+        keep = self.omitted > 0 if keep_spill is None else keep_spill
+        if not keep:
+            os.unlink(self.spill_path)
+            self.spill_path = None
+
+    def text(self):
+        """Captured text, with a marker where bytes were left out."""
+        if self.omitted <= 0:
+            return decode(bytes(self.head + self.tail))
+        where = f"; full output in {self.spill_path}" if self.spill_path else ""
+        marker = (
+            f"\n[... {self.omitted} bytes omitted: {self.total} bytes in total, "
+            f"first {len(self.head)} and last {len(self.tail)} shown{where} ...]\n"
+        )
+        return decode(bytes(self.head)) + marker + decode(bytes(self.tail))
+
+
+def read_streams(fds, captures, deadline, max_bytes=None, on_tick=None):
+    """
+    Copy `fds` into `captures` until every fd hits EOF, `deadline` passes or
+    more than `max_bytes` were read in total; return EOF, TIMEOUT or LIMIT.
+    `on_tick` is called about every TICK seconds meanwhile.
+    """
+    targets = dict(zip(fds, captures))
+    next_tick = time.monotonic()
+    with selectors.DefaultSelector() as selector:
+        for fd in fds:
+            selector.register(fd, selectors.EVENT_READ)
+        while selector.get_map():
+            now = time.monotonic()
+            remaining = deadline - now
+            if remaining <= 0:
+                return TIMEOUT
+            if on_tick is not None:
+                if now >= next_tick:
+                    on_tick()
+                    next_tick = now + TICK
+                remaining = min(remaining, max(0, next_tick - now))
+            for key, _ in selector.select(remaining):
+                data = os.read(key.fd, 1 << 16)
+                if not data:
+                    selector.unregister(key.fd)
+                    continue
+                targets[key.fd].write(data)
+                if max_bytes is not None and sum(c.total for c in captures) > max_bytes:
+                    return LIMIT
+    return EOF
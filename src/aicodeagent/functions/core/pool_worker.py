@@ -0,0 +1,193 @@
+"""
+Fork server of the warm interpreter pool (see `interpreter_pool`).
+
+Started as `python pool_worker.py <fd>`, where <fd> is one end of a Unix
+socketpair. For every job received (a length-prefixed JSON message carrying
+the stdout/stderr pipe ends as SCM_RIGHTS) it forks a child that becomes the
+script's process: new session, job cwd/argv/env, fresh `__main__` and a
+`sys.modules` trimmed back to interpreter startup, and the job's rlimits.
+The server reports the child's pid, reaps it with `wait4` and reports its
+exit code, rusage and wall time. Stdlib only, so that the forked children
+start from an interpreter as bare as `python script.py`.
+
+`python pool_worker.py --exec <limits json> <script> <args>...` applies the
+rlimits and execs `python <script> <args>...`: the pool-less (cold) path.
+"""
+
+import sys
+
+# Modules of a bare interpreter; everything imported later is dropped in children
+_STARTUP_MODULES = frozenset(sys.modules)
+
+import json  # noqa: E402
+import os  # noqa: E402
+import resource  # noqa: E402
+import socket  # noqa: E402
+import struct  # noqa: E402
+import time  # noqa: E402
+
+_HEADER = struct.Struct("!I")
+
+
+def _recv_message(sock):
+    """Return (job dict, fds), or (None, []) once the pool closed the socket."""
+    data, fds, _, _ = socket.recv_fds(sock, 1 << 16, 2)
+    if not data:
+        return None, fds
+    while len(data) < _HEADER.size:
+        chunk = sock.recv(1 << 16)
+        if not chunk:
+            return None, fds
+        data += chunk
+    (size,) = _HEADER.unpack_from(data)
+    data = data[_HEADER.size :]
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            return None, fds
+        data += chunk
+    return json.loads(data.decode("utf-8")), fds
+
+
+def _send_message(sock, message):
+    payload = json.dumps(message).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(payload)) + payload)
+
+
+def apply_limits(limits):
+    """setrlimit each {"RLIMIT_*": value}, never above the current hard limit."""
+    for name, value in limits.items():
+        kind = getattr(resource, name)
+        # The CPU cap sends SIGXCPU, then SIGKILL one second later
+        soft, hard = value, value + 1 if name == "RLIMIT_CPU" else value
+        _, current = resource.getrlimit(kind)
+        if current != resource.RLIM_INFINITY:
+            soft, hard = min(soft, current), min(hard, current)
+        resource.setrlimit(kind, (soft, hard))
+
+
+def _exec_script(job):
+    """Run the script as `python path args...` would; return its exit code."""
+    import builtins
+    import traceback
+    import types
+
+    path = job["path"]
+    try:
+        with open(path, "rb") as f:
+            source = f.read()
+        code = compile(source, path, "exec")
+    except BaseException as e:  # SyntaxError, unreadable file
+        traceback.print_exception(type(e), e, None)
+        return 1
+
+    main = types.ModuleType("__main__")
+    main.__file__ = path
+    main.__builtins__ = builtins
+    sys.modules["__main__"] = main
+    try:
+        exec(code, main.__dict__)
+    except SystemExit as e:
+        if e.code is None:
+            return 0
+        if isinstance(e.code, int):
+            return e.code
+        print(e.code, file=sys.stderr)
+        return 1
+    except BaseException as e:
+        # Hide this frame, like the interpreter's own traceback
+        traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+        return 1
+    return 0
+
+
+def _child(job, out_fd, err_fd, sock):
+    """Become the script process; never returns."""
+    code = 1
+    try:
+        sock.close()
+        os.setsid()  # own process group: a timeout kills the whole tree
+        null = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(null, 0)
+        os.dup2(out_fd, 1)
+        os.dup2(err_fd, 2)
+        for fd in (null, out_fd, err_fd):
+            os.close(fd)
+
+        apply_limits(job.get("limits") or {})
+        os.chdir(job["cwd"])
+        os.environ.clear()
+        os.environ.update(job["env"])
+        sys.argv = [job["path"], *job["argv"]]
+        sys.path[0] = os.path.dirname(job["path"])
+        for name in set(sys.modules) - _STARTUP_MODULES:
+            del sys.modules[name]
+
+        code = _exec_script(job)
+
+        # Interpreter shutdown: non-daemon threads, then atexit handlers
+        import atexit
+        import threading
+
+        shutdown = getattr(threading, "_shutdown", None)
+        if shutdown is not None:
+            shutdown()
+        atexit._run_exitfuncs()
+    except BaseException:
+        # Setup failed (e.g. missing cwd): report it like the script would
+        try:
+            import traceback
+
+            traceback.print_exc()
+        except BaseException:
+            pass
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        except BaseException:
+            pass
+        os._exit(code & 0xFF if isinstance(code, int) else 1)
+
+
+def serve(fd):
+    sock = socket.socket(fileno=fd)
+    while True:
+        job, fds = _recv_message(sock)
+        if job is None:
+            return
+        out_fd, err_fd = fds
+        t0 = time.monotonic()
+        pid = os.fork()
+        if pid == 0:
+            _child(job, out_fd, err_fd, sock)
+        os.close(out_fd)
+        os.close(err_fd)
+        _send_message(sock, {"event": "started", "pid": pid})
+        _, status, rusage = os.wait4(pid, 0)
+        _send_message(
+            sock,
+            {
+                "event": "exit",
+                "exit_code": os.waitstatus_to_exitcode(status),
+                "rusage": {
+                    "utime": rusage.ru_utime,
+                    "stime": rusage.ru_stime,
+                    "maxrss": rusage.ru_maxrss,
+                    "wall": time.monotonic() - t0,
+                },
+            },
+        )
+
+
+def exec_limited(limits, args):
+    """Apply `limits`, then become `python args...` (rlimits survive exec)."""
+    apply_limits(limits)
+    os.execv(sys.executable, [sys.executable, *args])
+
+
+if __name__ == "__main__":
+    if sys.argv[1] == "--exec":
+        # Cold runs: `python pool_worker.py --exec <limits json> <script> <args>...`
+        exec_limited(json.loads(sys.argv[2]), sys.argv[3:])
+    serve(int(sys.argv[1]))
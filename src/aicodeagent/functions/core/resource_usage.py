@@ -0,0 +1,132 @@
+import json
+import os
+import sys
+
+from aicodeagent.functions.pipeline.init_run_session import get_run_dir
+
+# Caps applied to every sandboxed script; "0" lifts one
+ENV_RLIMIT_CPU = "AICODEAGENT_RLIMIT_CPU"  # CPU seconds
+ENV_RLIMIT_AS = "AICODEAGENT_RLIMIT_AS_MB"  # address space, MiB
+ENV_RLIMIT_NOFILE = "AICODEAGENT_RLIMIT_NOFILE"  # open file descriptors
+DEFAULT_RLIMIT_CPU = 60
+DEFAULT_RLIMIT_AS_MB = 4096
+DEFAULT_RLIMIT_NOFILE = 1024
+
+USAGE_FILE = "sandbox_usage.jsonl"
+# Most expensive executions listed in run_summary.json
+TOP_RUNS = 5
+
+
+def _env_int(name, default):
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def sandbox_limits():
+    """{"RLIMIT_*": value} from the environment (defaults: 60 s CPU, 4 GiB, 1024 fds)."""
+    limits = {
+        "RLIMIT_CPU": _env_int(ENV_RLIMIT_CPU, DEFAULT_RLIMIT_CPU),
+        "RLIMIT_AS": _env_int(ENV_RLIMIT_AS, DEFAULT_RLIMIT_AS_MB) * 1024 * 1024,
+        "RLIMIT_NOFILE": _env_int(ENV_RLIMIT_NOFILE, DEFAULT_RLIMIT_NOFILE),
+    }
+    return {name: value for name, value in limits.items() if value > 0}
+
+
+class ChildTracker:
+    """
+    Descendants of a running script, sampled from /proc/<pid>/task/*/children
+    (Linux). Processes that start and exit between two samples are missed, so
+    `count` is a lower bound; it is None where /proc is not available.
+    """
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.seen = set()
+        self.supported = os.path.isdir(f"/proc/{os.getpid()}/task")
+
+    def _children(self, pid):
+        try:
+            tasks = os.listdir(f"/proc/{pid}/task")
+        except OSError:
+            return []
+        children = []
+        for tid in tasks:
+            try:
+                with open(f"/proc/{pid}/task/{tid}/children") as f:
+                    children += [int(p) for p in f.read().split()]
+            except OSError:
+                pass
+        return children
+
+    def sample(self):
+        if not self.supported:
+            return
+        pending = [self.pid]
+        while pending:
+            for child in self._children(pending.pop()):
+                if child not in self.seen:
+                    self.seen.add(child)
+                    pending.append(child)
+
+    @property
+    def count(self):
+        return len(self.seen) if self.supported else None
+
+
+def make_usage(raw, children=None):
+    """
+    Usage dict from a `wait4` rusage ({"utime", "stime", "maxrss", "wall"}).
+    The rusage covers the script and the descendants it waited for.
+    """
+    maxrss = raw["maxrss"]
+    if sys.platform == "darwin":  # bytes there, KiB on Linux
+        maxrss //= 1024
+    return {
+        "wall_s": round(raw["wall"], 3),
+        "user_s": round(raw["utime"], 3),
+        "sys_s": round(raw["stime"], 3),
+        "max_rss_kb": maxrss,
+        "child_processes": children,
+    }
+
+
+def format_usage(usage):
+    children = usage["child_processes"]
+    return (
+        f"wall {usage['wall_s']:.3f}s, cpu {usage['user_s']:.3f}s user + "
+        f"{usage['sys_s']:.3f}s sys, peak RSS {usage['max_rss_kb'] / 1024:.1f} MiB, "
+        f"child processes {'n/a' if children is None else children}"
+    )
+
+
+def record_usage(run_id, file_path, usage, exit_code):
+    """Append one execution to <run_dir>/sandbox_usage.jsonl."""
+    path = os.path.join(get_run_dir(run_id), USAGE_FILE)
+    entry = {"file": file_path, "exit_code": exit_code, **usage}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    return entry
+
+
+def usage_totals(run_id):
+    """Per-run totals, as stored under "sandbox" in run_summary.json (None if no runs)."""
+    path = os.path.join(get_run_dir(run_id), USAGE_FILE)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+    except (OSError, json.JSONDecodeError):
+        return None
+    if not entries:
+        return None
+    totals = {"executions": len(entries)}
+    for key in ("wall_s", "user_s", "sys_s"):
+        totals[key] = round(sum(e[key] for e in entries), 3)
+    totals["max_rss_kb"] = max(e["max_rss_kb"] for e in entries)
+    totals["child_processes"] = sum(e["child_processes"] or 0 for e in entries)
+    totals["most_expensive"] = sorted(
+        entries, key=lambda e: e["user_s"] + e["sys_s"], reverse=True
+    )[:TOP_RUNS]
+    return totals
@@ -0,0 +1,184 @@
+import ast
+import hashlib
+import json
+import os
+import sys
+import time
+
+from aicodeagent.functions.core.code_index import iter_files
+from aicodeagent.functions.pipeline.init_run_session import get_run_dir
+
+# Under the run directory: results never outlive the run that produced them
+CACHE_DIR = "run_cache"
+# Cached results kept per run (oldest evicted first)
+MAX_ENTRIES = 256
+# "1" reuses the results of identical executions (off by default)
+ENV_RUN_CACHE = "AICODEAGENT_RUN_CACHE"
+
+# sha1 of a module's source -> [(level, module or "", [imported names])]
+_imports_by_hash = {}
+
+
+def run_cache_enabled():
+    return os.getenv(ENV_RUN_CACHE, "0") == "1"
+
+
+def _imports(source, sha1):
+    refs = _imports_by_hash.get(sha1)
+    if refs is None:
+        refs = []
+        try:
+            tree = ast.parse(source)
+        except (SyntaxError, ValueError):
+            tree = None
+        # Every import statement counts, even inside functions or try blocks
+        for node in ast.walk(tree) if tree else ():
+            if isinstance(node, ast.Import):
+                refs += [(0, alias.name, []) for alias in node.names]
+            elif isinstance(node, ast.ImportFrom):
+                names = [alias.name for alias in node.names if alias.name != "*"]
+                refs.append((node.level, node.module or "", names))
+        _imports_by_hash[sha1] = refs
+    return refs
+
+
+def _module_files(base, dotted):
+    """Files executed by importing `dotted` from directory `base` (packages first)."""
+    files = []
+    parts = dotted.split(".") if dotted else []
+    for n, part in enumerate(parts):
+        path = os.path.join(base, part)
+        init = os.path.join(path, "__init__.py")
+        if os.path.isfile(init):
+            files.append(init)
+        elif n == len(parts) - 1 and os.path.isfile(path + ".py"):
+            files.append(path + ".py")
+            break
+        elif not os.path.isdir(path):  # not a sandbox module (stdlib, site)
+            break
+        base = path
+    return files
+
+
+def local_sources(full_path, root, search_path=None):
+    """
+    The script plus every module under `root` it imports, transitively,
+    resolved statically the way `python script.py` would find them: from the
+    script's folder (sys.path[0]), or the first folder of `search_path` that
+    has the module, and, for relative imports, from the importing module's
+    package. Returns {path: bytes}.
+    """
+    root = os.path.realpath(root)
+    if search_path:
+        search_path = [os.path.realpath(p) for p in search_path]
+    else:
+        search_path = [os.path.dirname(os.path.realpath(full_path))]
+    sources, pending = {}, [os.path.realpath(full_path)]
+    while pending:
+        path = pending.pop()
+        if path in sources:
+            continue
+        with open(path, "rb") as f:
+            data = f.read()
+        sources[path] = data
+        sha1 = hashlib.sha1(data).hexdigest()
+        for level, module, names in _imports(data, sha1):
+            if level:
+                base = os.path.dirname(path)
+                for _ in range(level - 1):
+                    base = os.path.dirname(base)
+                bases = [base]
+            else:
+                bases = search_path
+            for base in bases:
+                found = _module_files(base, module)
+                # `from pkg import name` may import the submodule pkg/name.py
+                for name in names:
+                    found += _module_files(base, f"{module}.{name}" if module else name)
+                if found:
+                    break
+            for dep in found:
+                dep = os.path.realpath(dep)
+                if os.path.commonpath([root, dep]) == root:
+                    pending.append(dep)
+    return sources
+
+
+def fingerprint(full_path, root, argv=(), env=None):
+    """
+    Hash of the script, its sandbox-local imports, argv, env and interpreter,
+    and the size and mtime of every other (non-.py) file of the sandbox: data
+    files and fixtures it may read, and whatever an earlier run wrote there.
+    """
+    env = dict(os.environ if env is None else env)
+    h = hashlib.sha256()
+    h.update(json.dumps([sys.executable, full_path, list(argv)]).encode("utf-8"))
+    h.update(json.dumps(sorted(env.items())).encode("utf-8"))
+    for path, data in sorted(local_sources(full_path, root).items()):
+        h.update(path.encode("utf-8") + b"\0")
+        h.update(hashlib.sha1(data).digest())
+    h.update(json.dumps(data_files(root)).encode("utf-8"))
+    return h.hexdigest()
+
+
+def data_files(root):
+    """Sorted (relative path, size, mtime_ns) of the non-.py files under `root`."""
+    found = []
+    for rel, entry in iter_files(root):
+        if not rel.endswith(".py"):
+            st = entry.stat(follow_symlinks=False)
+            found.append((rel, st.st_size, st.st_mtime_ns))
+    return sorted(found)
+
+
+def _cache_dir(run_id):
+    return os.path.join(get_run_dir(run_id), CACHE_DIR)
+
+
+def lookup(run_id, key):
+    """This run's cached {"stdout", "stderr", "exit_code", "created"}, or None."""
+    try:
+        path = os.path.join(_cache_dir(run_id), f"{key}.json")
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def store(run_id, key, stdout, stderr, exit_code):
+    cache_dir = _cache_dir(run_id)
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f"{key}.json")
+    tmp = f"{path}.{os.getpid()}.tmp"
+    entry = {
+        "stdout": stdout,
+        "stderr": stderr,
+        "exit_code": exit_code,
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(entry, f)
+    os.replace(tmp, path)
+
+    entries = sorted(
+        (e for e in os.scandir(cache_dir) if e.name.endswith(".json")),
+        key=lambda e: e.stat().st_mtime_ns,
+    )
+    for old in entries[: max(0, len(entries) - MAX_ENTRIES)]:
+        try:
+            os.unlink(old.path)
+        except OSError:
+            pass
+
+
+def invalidate(run_id):
+    """Drop the run's cached results (called after conclude_edit writes a file)."""
+    try:
+        entries = list(os.scandir(_cache_dir(run_id)))
+    except OSError:
+        return
+    for entry in entries:
+        try:
+            os.unlink(entry.path)
+        except OSError:
+            pass
@@ -1,6 +1,7 @@
 import os
 from datetime import datetime
 
+from aicodeagent.functions.core.append_entry import append_entry
 from aicodeagent.functions.fs.get_project_root import get_project_root
 
 
@@ -101,6 +102,71 @@ def save_logs(
                 s = _clip(str(data).rstrip("\n"))
                 log_line += f"   + {s}\n"
 
+    elif function_name == "get_files_content":
+        log_line = (
+            f"\n[{timestamp}] Function {function_name}: "
+            f"read content of files: {file_name}\n"
+            f" Result: {result}\n"
+        )
+        if details:
+            log_line += f"   + details: {details}\n"
+        if list_data:
+            for data in list_data:
+                s = _clip(str(data).rstrip("\n"))
+                log_line += f"   + {s}\n"
+
+    elif function_name == "search_code":
+        log_line = (
+            f"\n[{timestamp}] Function {function_name}: "
+            f"search the code for: {file_name}\n"
+            f" Result: {result}\n"
+        )
+        if details:
+            log_line += f"   + details: {details}\n"
+        if list_data:
+            for data in list_data:
+                s = _clip(str(data).rstrip("\n"))
+                log_line += f"   + {s}\n"
+
+    elif function_name == "find_symbol":
+        log_line = (
+            f"\n[{timestamp}] Function {function_name}: "
+            f"find the symbol: {file_name}\n"
+            f" Result: {result}\n"
+        )
+        if details:
+            log_line += f"   + details: {details}\n"
+        if list_data:
+            for data in list_data:
+                s = _clip(str(data).rstrip("\n"))
+                log_line += f"   + {s}\n"
+
+    elif function_name == "get_symbol_source":
+        log_line = (
+            f"\n[{timestamp}] Function {function_name}: "
+            f"get source of symbol: {file_name}\n"
+            f" Result: {result}\n"
+        )
+        if details:
+            log_line += f"   + details: {details}\n"
+        if list_data:
+            for data in list_data:
+                s = _clip(str(data).rstrip("\n"))
+                log_line += f"   + {s}\n"
+
+    elif function_name == "run_tests":
+        log_line = (
+            f"\n[{timestamp}] Function {function_name}: "
+            f"run the tests under: {file_name}\n"
+            f" Result: {result}\n"
+        )
+        if details:
+            log_line += f"   + details: {details}\n"
+        if list_data:
+            for data in list_data:
+                s = _clip(str(data).rstrip("\n"))
+                log_line += f"   + {s}\n"
+
     elif function_name == "run_python_file":
         log_line = (
             f"\n[{timestamp}] Function {function_name}: "
@@ -118,7 +184,6 @@ def save_logs(
 
     # Write to log file
     if log_line:
-        with open(log_path, "a", encoding="utf-8") as log_file:
-            log_file.write(log_line)
+        append_entry(log_path, log_line)
 
     return log_line
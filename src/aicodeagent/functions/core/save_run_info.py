@@ -4,13 +4,13 @@ import os
 import re
 import time
 
-from aicodeagent.functions.fs.get_project_root import get_project_root
+from aicodeagent.functions.pipeline.init_run_session import get_run_dir
 
 
 def save_run_info(messages, run_id, proposed_content=None, extra_data=None):
     """
     Build a compact, structured ledger of the last run from `messages`
-    and save two files under <PROJECT_ROOT>/__ai_outputs__/run_<id>/:
+    and save two files under <OUTPUT_DIR>/run_<id>/ (default <PROJECT_ROOT>/__ai_outputs__):
       - run_summary.json  (structured)
       - llm_message       (plain last assistant text)
     """
@@ -22,8 +22,7 @@ def save_run_info(messages, run_id, proposed_content=None, extra_data=None):
     ):
         extra_data, proposed_content = proposed_content, None
 
-    project_root = get_project_root(__file__)
-    base_dir = os.path.join(project_root, "__ai_outputs__", run_id)
+    base_dir = get_run_dir(run_id)
     os.makedirs(base_dir, exist_ok=True)
 
     def brief_text(s, n=160):
@@ -122,6 +121,9 @@ def save_run_info(messages, run_id, proposed_content=None, extra_data=None):
                     stderr = (me.group(1) if me else "").strip()
                     extras["stdout_len"] = len(stdout)
                     extras["stderr_len"] = len(stderr)
+                elif name == "run_tests" and isinstance(result, str):
+                    m = re.search(r"^Ran [^\n]+", result, re.M)
+                    extras["tests"] = m.group(0) if m else None
 
                 # --- conclude_edit: record feed data from injected data (extra_data) ---
                 if name == "conclude_edit" and isinstance(extra_data, dict):
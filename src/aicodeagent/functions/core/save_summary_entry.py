@@ -1,5 +1,6 @@
 import os
 
+from aicodeagent.functions.core.append_entry import entry_writer
 from aicodeagent.functions.core.make_human_readable_diff import make_human_readable_diff
 
 
@@ -22,7 +23,7 @@ def save_summary_entry(
             # Convert diff lines to a human-readable format
             readable_diff = make_human_readable_diff(diff_lines) if diff_lines else ""
 
-            with open(summary_path, "a", encoding="utf-8") as f:
+            with entry_writer(summary_path) as f:
                 # Header
                 f.write(f"\n### FUNCTION: {function_name}\n\n")
 
@@ -48,14 +49,14 @@ def save_summary_entry(
                 f.write("\n---\n")
         else:
 
-            with open(summary_path, "a", encoding="utf-8") as f:
+            with entry_writer(summary_path) as f:
                 # Header
                 f.write(f"\n### FUNCTION: {function_name}\n\n")
                 f.write("\n---\n")
 
     # Save summary get_file_content function
     elif function_name == "get_file_content":
-        with open(summary_path, "a", encoding="utf-8") as f:
+        with entry_writer(summary_path) as f:
             # Header
             f.write(f"\n### FUNCTION: {function_name}\n\n")
 
@@ -74,9 +75,15 @@ def save_summary_entry(
                         for line in lines[1:]:
                             f.write(f"     {line}\n")
 
-    # Save summary get_files_info function
-    elif function_name == "get_files_info":
-        with open(summary_path, "a", encoding="utf-8") as f:
+    # Save summary of the listing/search tools
+    elif function_name in (
+        "get_files_info",
+        "get_files_content",
+        "search_code",
+        "find_symbol",
+        "get_symbol_source",
+    ):
+        with entry_writer(summary_path) as f:
             # Header
             f.write(f"\n### FUNCTION: {function_name}\n\n")
 
@@ -95,9 +102,9 @@ def save_summary_entry(
                         for line in lines[1:]:
                             f.write(f"     {line}\n")
 
-    # Save summary run_python_file function
-    elif function_name == "run_python_file":
-        with open(summary_path, "a", encoding="utf-8") as f:
+    # Save summary of the script/test execution tools
+    elif function_name in ("run_python_file", "run_tests"):
+        with entry_writer(summary_path) as f:
             # Header
             f.write(f"\n### FUNCTION: {function_name}\n\n")
 
@@ -0,0 +1,258 @@
+"""
+Runs one shard of test files for run_tests (see `affected_tests`).
+
+Started as `python shard_runner.py <root> <results.jsonl> <pytest|unittest>
+<file>...`, on the interpreter pool like any sandbox script. Every outcome is
+appended to <results.jsonl> as one JSON line {"id", "file", "outcome",
+"duration", "message"}, with outcome passed, failed, error or skipped.
+{"event": "file_done", "file"} follows the last test of each file, and a
+last {"event": "finished"} line tells a complete shard from a killed one.
+Stdlib only, plus pytest in pytest mode.
+"""
+
+import importlib
+import inspect
+import json
+import os
+import sys
+import time
+import traceback
+import unittest
+
+# Characters kept from the end of a failure message
+MAX_MESSAGE = 4000
+
+
+def _clip(text):
+    text = str(text or "")
+    return text if len(text) <= MAX_MESSAGE else "[...]\n" + text[-MAX_MESSAGE:]
+
+
+class _Results:
+    def __init__(self, path):
+        self.file = open(path, "a", encoding="utf-8")
+        self.files = set()
+
+    def emit(self, **record):
+        if "file" in record:
+            self.files.add(record["file"])
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+
+
+# ---- pytest ---------------------------------------------------------------------
+
+
+class _PytestCollector:
+    """pytest plugin forwarding collection errors and test reports."""
+
+    def __init__(self, results, files):
+        self.results = results
+        self.files = files
+        self.pending = {}  # file -> tests not finished yet
+
+    def _emit(self, report, outcome):
+        if outcome == "passed":
+            message = ""
+        elif outcome == "skipped" and isinstance(report.longrepr, tuple):
+            message = report.longrepr[2]  # (file, line, reason)
+        else:
+            message = report.longreprtext
+        nodeid = report.nodeid
+        self.results.emit(
+            id=nodeid,
+            file=nodeid.split("::")[0],
+            outcome=outcome,
+            duration=round(getattr(report, "duration", 0.0), 4),
+            message=_clip(message),
+        )
+
+    def pytest_collectreport(self, report):
+        if report.failed:
+            self._emit(report, "error")
+
+    def pytest_collection_modifyitems(self, items):
+        for item in items:
+            rel = item.nodeid.split("::")[0]
+            self.pending[rel] = self.pending.get(rel, 0) + 1
+        for rel in self.files:
+            if rel not in self.pending:
+                self.results.emit(event="file_done", file=rel)
+
+    def pytest_runtest_logfinish(self, nodeid):
+        rel = nodeid.split("::")[0]
+        self.pending[rel] -= 1
+        if not self.pending[rel]:
+            self.results.emit(event="file_done", file=rel)
+
+    def pytest_runtest_logreport(self, report):
+        if report.skipped:
+            self._emit(report, "skipped")
+        elif report.when == "call":
+            self._emit(report, report.outcome)
+        elif report.failed:  # setup or teardown
+            self._emit(report, "error")
+
+
+def _run_pytest(root, files, results):
+    import pytest
+
+    code = pytest.main(
+        ["-q", "-p", "no:cacheprovider", "--rootdir", root, *files],
+        plugins=[_PytestCollector(results, files)],
+    )
+    # Interrupted, internal or usage error: pytest stopped before the tests
+    if code in (2, 3, 4):
+        for rel in files:
+            if rel not in results.files:
+                results.emit(
+                    id=rel,
+                    file=rel,
+                    outcome="error",
+                    duration=0,
+                    message=f"pytest exited with code {int(code)} (see its output)",
+                )
+
+
+# ---- unittest -------------------------------------------------------------------
+
+
+def import_root(path):
+    """(sys.path entry, module name) of a test file, as pytest's default import."""
+    folder = os.path.dirname(path)
+    parts = [os.path.splitext(os.path.basename(path))[0]]
+    while os.path.isfile(os.path.join(folder, "__init__.py")):
+        parts.insert(0, os.path.basename(folder))
+        folder = os.path.dirname(folder)
+    return folder, ".".join(parts)
+
+
+class _UnittestResult(unittest.TestResult):
+    """TestResult emitting one record per test, with pytest-style ids."""
+
+    def __init__(self, results, rel):
+        super().__init__()
+        self.results = results
+        self.rel = rel
+        self.started = time.perf_counter()
+
+    def _id(self, test):
+        if isinstance(test, unittest.FunctionTestCase):
+            return f"{self.rel}::{test._testFunc.__name__}"
+        if hasattr(test, "test_case"):  # subTest
+            return f"{self._id(test.test_case)} {test._subDescription()}"
+        if hasattr(test, "_testMethodName"):
+            return f"{self.rel}::{type(test).__name__}::{test._testMethodName}"
+        return f"{self.rel}::{getattr(test, 'description', test)}"  # setUpClass
+
+    def _emit(self, test, outcome, message=""):
+        self.results.emit(
+            id=self._id(test),
+            file=self.rel,
+            outcome=outcome,
+            duration=round(time.perf_counter() - self.started, 4),
+            message=_clip(message),
+        )
+
+    def startTest(self, test):
+        super().startTest(test)
+        self.started = time.perf_counter()
+
+    def addSuccess(self, test):
+        super().addSuccess(test)
+        self._emit(test, "passed")
+
+    def addFailure(self, test, err):
+        super().addFailure(test, err)
+        self._emit(test, "failed", self._exc_info_to_string(err, test))
+
+    def addError(self, test, err):
+        super().addError(test, err)
+        self._emit(test, "error", self._exc_info_to_string(err, test))
+
+    def addSkip(self, test, reason):
+        super().addSkip(test, reason)
+        self._emit(test, "skipped", reason)
+
+    def addExpectedFailure(self, test, err):
+        super().addExpectedFailure(test, err)
+        self._emit(test, "skipped", "expected failure")
+
+    def addUnexpectedSuccess(self, test):
+        super().addUnexpectedSuccess(test)
+        self._emit(test, "failed", "unexpected success")
+
+    def addSubTest(self, test, subtest, err):
+        super().addSubTest(test, subtest, err)
+        if err is not None:
+            failed = issubclass(err[0], test.failureException)
+            message = self._exc_info_to_string(err, test)
+            self._emit(subtest, "failed" if failed else "error", message)
+
+
+def _load(module):
+    """TestCase tests, plus module-level `test*` functions (pytest style)."""
+    suite = unittest.defaultTestLoader.loadTestsFromModule(module)
+    skipped = []
+    for name, func in vars(module).items():
+        if not name.startswith("test") or not inspect.isfunction(func):
+            continue
+        if func.__module__ != module.__name__:
+            continue
+        if inspect.signature(func).parameters:
+            skipped.append(name)  # fixtures need pytest
+        else:
+            suite.addTest(unittest.FunctionTestCase(func))
+    return suite, skipped
+
+
+def _run_unittest(files, results):
+    for rel in files:
+        path = os.path.abspath(rel)
+        folder, name = import_root(path)
+        if folder not in sys.path:
+            sys.path.insert(0, folder)
+        try:
+            module = importlib.import_module(name)
+            if os.path.realpath(module.__file__) != os.path.realpath(path):
+                raise ImportError(
+                    f"import file mismatch: module {name!r} is {module.__file__}; "
+                    "give the test folders an __init__.py or unique file names"
+                )
+            suite, skipped = _load(module)
+        except BaseException:
+            results.emit(
+                id=rel,
+                file=rel,
+                outcome="error",
+                duration=0,
+                message=_clip(traceback.format_exc()),
+            )
+            results.emit(event="file_done", file=rel)
+            continue
+        for func in skipped:
+            results.emit(
+                id=f"{rel}::{func}",
+                file=rel,
+                outcome="skipped",
+                duration=0,
+                message="takes fixture arguments: needs pytest",
+            )
+        suite.run(_UnittestResult(results, rel))
+        results.emit(event="file_done", file=rel)
+
+
+def main(argv):
+    root, results_path, mode, *files = argv
+    sys.path[0] = root  # the sandbox, not this folder
+    results = _Results(results_path)
+    if mode == "pytest":
+        _run_pytest(root, files, results)
+    else:
+        _run_unittest(files, results)
+    results.emit(event="finished")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
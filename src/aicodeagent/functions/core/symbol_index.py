@@ -0,0 +1,256 @@
+import ast
+import fnmatch
+import hashlib
+import os
+import pickle
+import threading
+
+from aicodeagent.functions.core.code_index import iter_files
+from aicodeagent.functions.pipeline.init_run_session import get_output_dir
+
+INDEX_VERSION = 1
+INDEX_DIR = "symbol_index"
+
+
+def _signature(node):
+    if isinstance(node, ast.ClassDef):
+        bases = [ast.unparse(b) for b in node.bases]
+        bases += [ast.unparse(k) for k in node.keywords]
+        return (
+            f"class {node.name}({', '.join(bases)})" if bases else f"class {node.name}"
+        )
+    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+    returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+    return f"{prefix} {node.name}({ast.unparse(node.args)}){returns}"
+
+
+def module_name(rel_path):
+    """Dotted module name of a relative .py path ('pkg/__init__.py' -> 'pkg')."""
+    module = rel_path[: -len(".py")].replace("/", ".")
+    if module.endswith(".__init__"):
+        module = module[: -len(".__init__")]
+    return module
+
+
+def parse_symbols(source, rel_path):
+    """
+    Symbols defined in one module: the module itself, then every class,
+    function and method (nested ones included) in source order. Each is a dict
+    with name, qualname (dotted, within the module), module, kind, file,
+    line/end_line (decorators included) and signature.
+    Raises SyntaxError for modules that do not parse.
+    """
+    tree = ast.parse(source, filename=rel_path)
+    module = module_name(rel_path)
+    lines = source.count("\n") + (not source.endswith("\n") and bool(source))
+    symbols = [
+        {
+            "name": module.rsplit(".", 1)[-1],
+            "qualname": module,
+            "module": module,
+            "kind": "module",
+            "file": rel_path,
+            "line": 1,
+            "end_line": max(1, lines),
+            "signature": f"module {module}",
+        }
+    ]
+
+    def visit(body, scope, in_class):
+        for node in body:
+            if isinstance(node, ast.ClassDef):
+                kind = "class"
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                kind = "method" if in_class else "function"
+            else:
+                continue
+            qualname = f"{scope}.{node.name}" if scope else node.name
+            start = min([node.lineno] + [d.lineno for d in node.decorator_list])
+            symbols.append(
+                {
+                    "name": node.name,
+                    "qualname": qualname,
+                    "module": module,
+                    "kind": kind,
+                    "file": rel_path,
+                    "line": start,
+                    "end_line": node.end_lineno,
+                    "signature": _signature(node),
+                }
+            )
+            visit(node.body, qualname, kind == "class")
+
+    visit(tree.body, "", False)
+    return symbols
+
+
+def index_path(root):
+    """Pickle file of the symbol index of `root` under the current output directory."""
+    digest = hashlib.sha1(os.path.abspath(root).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(get_output_dir(), INDEX_DIR, f"{digest}.pickle")
+
+
+class SymbolIndex:
+    """
+    Symbols of the Python files under `root`, persisted in
+    <output dir>/symbol_index/<root hash>.pickle.
+
+    Parsed symbols are cached per file content hash, so `refresh` parses only
+    files whose (mtime, size, inode) changed *and* whose SHA-1 is new; moved,
+    touched or reverted files reuse their previous parse.
+    """
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self.path = index_path(self.root)
+        self.lock = threading.Lock()
+        self.files = {}  # rel path -> ((mtime_ns, size, inode), sha1)
+        self.by_hash = {}  # sha1 -> symbols parsed with the path seen first
+        self.errors = {}  # sha1 -> syntax error message
+        self._load()
+
+    # ---- PERSISTENCE ----
+    def _load(self):
+        try:
+            with open(self.path, "rb") as f:
+                data = pickle.load(f)
+        except (OSError, pickle.PickleError, EOFError, AttributeError):
+            return
+        if data.get("version") != INDEX_VERSION or data.get("root") != self.root:
+            return
+        self.files = data["files"]
+        self.by_hash = data["by_hash"]
+        self.errors = data["errors"]
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(
+                {
+                    "version": INDEX_VERSION,
+                    "root": self.root,
+                    "files": self.files,
+                    "by_hash": self.by_hash,
+                    "errors": self.errors,
+                },
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        os.replace(tmp, self.path)  # readers never see a partial index
+
+    # ---- INCREMENTAL UPDATE ----
+    def refresh(self):
+        """Bring the index up to date with the files on disk. Returns #parsed."""
+        parsed, changed = 0, False
+        seen = set()
+        for rel, entry in iter_files(self.root):
+            if not rel.endswith(".py"):
+                continue
+            seen.add(rel)
+            try:
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            stat_key = (st.st_mtime_ns, st.st_size, st.st_ino)
+            known = self.files.get(rel)
+            if known and known[0] == stat_key:
+                continue
+            with open(entry.path, "rb") as f:
+                data = f.read()
+            sha1 = hashlib.sha1(data).hexdigest()
+            self.files[rel] = (stat_key, sha1)
+            changed = True
+            if sha1 in self.by_hash:
+                continue
+            try:
+                symbols = parse_symbols(data.decode("utf-8", errors="replace"), rel)
+            except (SyntaxError, ValueError) as e:
+                self.errors[sha1] = str(e)
+                symbols = []
+            self.by_hash[sha1] = symbols
+            parsed += 1
+
+        for rel in set(self.files) - seen:
+            del self.files[rel]
+            changed = True
+        if changed:
+            live = {sha1 for _, sha1 in self.files.values()}
+            for sha1 in set(self.by_hash) - live:
+                del self.by_hash[sha1]
+                self.errors.pop(sha1, None)
+            self._save()
+        return parsed
+
+    def symbols(self):
+        """Every symbol, in path then source order."""
+        for rel in sorted(self.files):
+            symbols = self.by_hash.get(self.files[rel][1], [])
+            if symbols and symbols[0]["file"] != rel:
+                # Same content under another path: re-anchor the cached parse
+                symbols = [_rebase(s, rel, module_name(rel)) for s in symbols]
+            yield from symbols
+
+    def unparsable(self):
+        """{rel path: syntax error} of the files that could not be indexed."""
+        return {
+            rel: self.errors[sha1]
+            for rel, (_, sha1) in sorted(self.files.items())
+            if sha1 in self.errors
+        }
+
+    # ---- QUERY ----
+    def find(self, name, kind=None, file_path=None):
+        """
+        Symbols matching `name`: a plain name, a dotted qualified name (or its
+        tail, e.g. 'Calculator.evaluate'), optionally module-qualified, or a
+        glob ('parse_*'). `kind` and `file_path` narrow the result.
+        """
+        wildcard = any(c in name for c in "*?[")
+        found = []
+        for symbol in self.symbols():
+            if kind and symbol["kind"] != kind:
+                continue
+            if file_path and symbol["file"] != file_path:
+                continue
+            full = f"{symbol['module']}.{symbol['qualname']}"
+            if symbol["kind"] == "module":
+                full = symbol["module"]
+            if wildcard:
+                hit = any(
+                    fnmatch.fnmatchcase(value, name)
+                    for value in (symbol["name"], symbol["qualname"], full)
+                )
+            else:
+                hit = name in (symbol["name"], symbol["qualname"], full) or symbol[
+                    "qualname"
+                ].endswith("." + name)
+            if hit:
+                found.append(symbol)
+        return found
+
+
+def _rebase(symbol, rel, module):
+    symbol = dict(symbol, file=rel, module=module)
+    if symbol["kind"] == "module":
+        symbol.update(
+            name=module.rsplit(".", 1)[-1],
+            qualname=module,
+            signature=f"module {module}",
+        )
+    return symbol
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_symbol_index(root):
+    """Process-wide SymbolIndex of `root` (loaded from disk on first use)."""
+    root = os.path.abspath(root)
+    with _indexes_lock:
+        index = _indexes.get(root)
+        # A different output directory (tests, AICODEAGENT_OUTPUT_DIR) reloads
+        if index is None or index.path != index_path(root):
+            index = _indexes[root] = SymbolIndex(root)
+        return index
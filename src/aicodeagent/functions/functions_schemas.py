@@ -1,100 +1,313 @@
-from google.genai import types
-
 from aicodeagent.functions.llm_calls.conclude_edit import conclude_edit
+from aicodeagent.functions.llm_calls.find_symbol import find_symbol
 from aicodeagent.functions.llm_calls.get_file_content import get_file_content
+from aicodeagent.functions.llm_calls.get_files_content import get_files_content
 from aicodeagent.functions.llm_calls.get_files_info import get_files_info
+from aicodeagent.functions.llm_calls.get_symbol_source import get_symbol_source
 from aicodeagent.functions.llm_calls.propose_changes import propose_changes
 from aicodeagent.functions.llm_calls.run_python import run_python_file
+from aicodeagent.functions.llm_calls.run_tests import run_tests
+from aicodeagent.functions.llm_calls.search_code import search_code
 
 # Define the dictionary of functions
 function_dict = {
     "get_files_info": get_files_info,
     "get_file_content": get_file_content,
+    "get_files_content": get_files_content,
+    "search_code": search_code,
+    "find_symbol": find_symbol,
+    "get_symbol_source": get_symbol_source,
     "run_python_file": run_python_file,
+    "run_tests": run_tests,
     "propose_changes": propose_changes,
     "conclude_edit": conclude_edit,
 }
 
-schema_get_files_info = types.FunctionDeclaration(
-    name="get_files_info",
-    description="Lists files in the specified directory along with their sizes, constrained to the working directory.",
-    parameters=types.Schema(
-        type=types.Type.OBJECT,
-        properties={
-            "directory": types.Schema(
-                type=types.Type.STRING,
-                description="The directory to list files from, relative to the 'code_to_fix' directory. Use None or omit the field to list the root of 'code_to_fix'.",
-            ),
-        },
-    ),
-)
-
-schema_get_file_content = types.FunctionDeclaration(
-    name="get_file_content",
-    description="Return a string representing the content of the input file.",
-    parameters=types.Schema(
-        type=types.Type.OBJECT,
-        properties={
-            "working_directory": types.Schema(
-                type=types.Type.STRING,
-                description="Path relative to the 'code_to_fix' directory. Use this to specify the subfolder containing the project to analyze (e.g., 'calculator' or 'project_01/module'). If not provided, 'file_path' is considered relative to 'code_to_fix'.",
-            ),
-            "file_path": types.Schema(
-                type=types.Type.STRING,
-                description="The relative path to the target file, starting from the working directory.",
-            ),
-        },
-        required=["file_path"],
-    ),
-)
-
-schema_run_python_file = types.FunctionDeclaration(
-    name="run_python_file",
-    description="Run a Python file and return its output, errors, and exit code.",
-    parameters=types.Schema(
-        type=types.Type.OBJECT,
-        properties={
-            "working_directory": types.Schema(
-                type=types.Type.STRING,
-                description="Path relative to the 'code_to_fix' directory. Use this to specify the subfolder containing the project to analyze (e.g., 'calculator' or 'project_01/module'). If not provided, 'file_path' is considered relative to 'code_to_fix'.",
-            ),
-            "file_path": types.Schema(
-                type=types.Type.STRING,
-                description="The relative path to the target file, starting from the working directory.",
-            ),
-        },
-        required=["file_path"],
-    ),
-)
-
-schema_propose_changes = types.FunctionDeclaration(
-    name="propose_changes",
-    description="Generate a preview of the proposed changes to a file. No actual file is modified. The diff and summary are saved in the __ai_outputs__ directory.",
-    parameters=types.Schema(
-        type=types.Type.OBJECT,
-        properties={
-            "working_directory": types.Schema(
-                type=types.Type.STRING,
-                description="Path relative to the 'code_to_fix' directory. Use this to specify the subfolder containing the project to analyze (e.g., 'calculator' or 'project_01/module'). If not provided, 'file_path' is considered relative to 'code_to_fix'",
-            ),
-            "file_path": types.Schema(
-                type=types.Type.STRING,
-                description="The relative path to the target file, starting from the working directory.",
-            ),
-            "content": types.Schema(
-                type=types.Type.STRING,
-                description="The proposed content to preview in the target file.",
-            ),
-        },
-        required=["file_path", "content"],
-    ),
-)
-
-schema_conclude_edit = types.FunctionDeclaration(
-    name="conclude_edit",
-    description=(
-        "Apply the last approved proposal saved in the previous run summary. "
-        "It requires no input parameters; the tool automatically loads file and content from the previous summary."
-    ),
-    parameters=types.Schema(type=types.Type.OBJECT, properties={}, required=[]),
-)
+
+def _build_schemas():
+    """Build every tool declaration (imports google-genai)."""
+    from google.genai import types
+
+    schema_get_files_info = types.FunctionDeclaration(
+        name="get_files_info",
+        description="Lists files in the specified directory (optionally its whole subtree, filtered and paginated) along with their sizes, constrained to the working directory.",
+        parameters=types.Schema(
+            type=types.Type.OBJECT,
+            properties={
+                "directory": types.Schema(
+                    type=types.Type.STRING,
+                    description="The directory to list files from, relative to the 'code_to_fix' directory. Use None or omit the field to list the root of 'code_to_fix'.",
+                ),
+                "recursive": types.Schema(
+                    type=types.Type.BOOLEAN,
+                    description="List subfolders too (paths relative to 'directory'), so a whole tree is discovered in one call. Default false.",
+                ),
+                "max_depth": types.Schema(
+                    type=types.Type.INTEGER,
+                    description="Levels to descend when recursive (1 = only 'directory' itself). Default 8.",
+                ),
+                "include": types.Schema(
+                    type=types.Type.ARRAY,
+                    items=types.Schema(type=types.Type.STRING),
+                    description="Glob patterns a file's relative path or name must match (e.g. ['*.py']). Folders are then omitted from the listing.",
+                ),
+                "exclude": types.Schema(
+                    type=types.Type.ARRAY,
+                    items=types.Schema(type=types.Type.STRING),
+                    description="Glob patterns of files/folders to skip. Recursive listings always skip .git, .venv, __pycache__, tool caches and hidden folders.",
+                ),
+                "page_size": types.Schema(
+                    type=types.Type.INTEGER,
+                    description="Maximum entries to return (default 200 when recursive, max 1000).",
+                ),
+                "cursor": types.Schema(
+                    type=types.Type.INTEGER,
+                    description="Offset of the first entry, from the 'cursor=' hint at the end of the previous page.",
+                ),
+                "line_counts": types.Schema(
+                    type=types.Type.BOOLEAN,
+                    description="Also report the number of lines of each file.",
+                ),
+            },
+        ),
+    )
+
+    schema_get_file_content = types.FunctionDeclaration(
+        name="get_file_content",
+        description="Return the content of the input file, or of a line/byte range of it. Partial reads end with a footer giving the total lines and bytes and the arguments to continue.",
+        parameters=types.Schema(
+            type=types.Type.OBJECT,
+            properties={
+                "working_directory": types.Schema(
+                    type=types.Type.STRING,
+                    description="Path relative to the 'code_to_fix' directory. Use this to specify the subfolder containing the project to analyze (e.g., 'calculator' or 'project_01/module'). If not provided, 'file_path' is considered relative to 'code_to_fix'.",
+                ),
+                "file_path": types.Schema(
+                    type=types.Type.STRING,
+                    description="The relative path to the target file, starting from the working directory.",
+                ),
+                "start_line": types.Schema(
+                    type=types.Type.INTEGER,
+                    description="First line to return (1-based). Use with end_line to page through large files.",
+                ),
+                "end_line": types.Schema(
+                    type=types.Type.INTEGER,
+                    description="Last line to return (inclusive). Defaults to the end of the file.",
+                ),
+                "byte_offset": types.Schema(
+                    type=types.Type.INTEGER,
+                    description="Read raw bytes from this offset instead of lines (e.g. to continue a very long line).",
+                ),
+                "max_bytes": types.Schema(
+                    type=types.Type.INTEGER,
+                    description="Bytes to read from byte_offset (max 10000).",
+                ),
+            },
+            required=["file_path"],
+        ),
+    )
+
+    schema_get_files_content = types.FunctionDeclaration(
+        name="get_files_content",
+        description="Return the contents of several files in one call (paths and/or glob patterns such as 'pkg/**/*.py'). Prefer it to repeated get_file_content calls when exploring a package. Each file is capped, and the whole response stops at a total character budget.",
+        parameters=types.Schema(
+            type=types.Type.OBJECT,
+            properties={
+                "working_directory": types.Schema(
+                    type=types.Type.STRING,
+                    description="Path relative to the 'code_to_fix' directory. Use this to specify the subfolder containing the project to analyze (e.g., 'calculator' or 'project_01/module'). If not provided, 'paths' are considered relative to 'code_to_fix'.",
+                ),
+                "paths": types.Schema(
+                    type=types.Type.ARRAY,
+                    items=types.Schema(type=types.Type.STRING),
+                    description="File paths or glob patterns ('*', '?', '**' for any depth), relative to the working directory.",
+                ),
+                "max_chars_per_file": types.Schema(
+                    type=types.Type.INTEGER,
+                    description="Characters returned per file (default 10000); longer files end with a hint to continue with get_file_content.",
+                ),
+                "max_total_chars": types.Schema(
+                    type=types.Type.INTEGER,
+                    description="Characters returned in total (default 40000, max 100000); files past the budget are listed as not read.",
+                ),
+            },
+            required=["paths"],
+        ),
+    )
+
+    schema_search_code = types.FunctionDeclaration(
+        name="search_code",
+        description="Search every text file of the project for a regular expression (Python syntax) and return matching lines as 'path:line: text' with surrounding context. Backed by an index, so it is fast even on large trees; prefer it to reading files one by one when looking for a name, string or pattern.",
+        parameters=types.Schema(
+            type=types.Type.OBJECT,
+            properties={
+                "working_directory": types.Schema(
+                    type=types.Type.STRING,
+                    description="Path relative to the 'code_to_fix' directory. Use this to specify the subfolder containing the project to analyze (e.g., 'calculator' or 'project_01/module'). If not provided, the whole 'code_to_fix' directory is searched.",
+                ),
+                "query": types.Schema(
+                    type=types.Type.STRING,
+                    description="Regular expression matched against each line (e.g. 'def parse_', 'import (os|sys)').",
+                ),
+                "path": types.Schema(
+                    type=types.Type.STRING,
+                    description="Optional subfolder or glob (e.g. 'pkg/utils' or '*.py') limiting the files searched.",
+                ),
+                "context_lines": types.Schema(
+                    type=types.Type.INTEGER,
+                    description="Lines of context shown before and after each match (default 2, max 10).",
+                ),
+                "max_results": types.Schema(
+                    type=types.Type.INTEGER,
+                    description="Maximum number of matching lines returned (default 50, max 500).",
+                ),
+                "ignore_case": types.Schema(
+                    type=types.Type.BOOLEAN,
+                    description="Match case-insensitively (default false).",
+                ),
+            },
+            required=["query"],
+        ),
+    )
+
+    schema_find_symbol = types.FunctionDeclaration(
+        name="find_symbol",
+        description="Find Python modules, classes, functions and methods by name and return, for each, its file, line span, kind, qualified name and signature. Use it to locate a definition before reading it.",
+        parameters=types.Schema(
+            type=types.Type.OBJECT,
+            properties={
+                "working_directory": types.Schema(
+                    type=types.Type.STRING,
+                    description="Path relative to the 'code_to_fix' directory. Use this to specify the subfolder containing the project to analyze (e.g., 'calculator' or 'project_01/module'). If not provided, the whole 'code_to_fix' directory is indexed.",
+                ),
+                "name": types.Schema(
+                    type=types.Type.STRING,
+                    description="Symbol name: plain ('evaluate'), dotted ('Calculator.evaluate', 'pkg.calc.Calculator') or a glob ('parse_*').",
+                ),
+                "kind": types.Schema(
+                    type=types.Type.STRING,
+                    description="Optional filter: 'module', 'class', 'function' or 'method'.",
+                ),
+                "max_results": types.Schema(
+                    type=types.Type.INTEGER,
+                    description="Maximum number of symbols listed (default 50, max 500).",
+                ),
+            },
+            required=["name"],
+        ),
+    )
+
+    schema_get_symbol_source = types.FunctionDeclaration(
+        name="get_symbol_source",
+        description="Return the source code of a single class, function or method (e.g. 'Calculator.evaluate'), decorators included, without reading the whole file. Prefer it to get_file_content when only one definition is needed.",
+        parameters=types.Schema(
+            type=types.Type.OBJECT,
+            properties={
+                "working_directory": types.Schema(
+                    type=types.Type.STRING,
+                    description="Path relative to the 'code_to_fix' directory. Use this to specify the subfolder containing the project to analyze (e.g., 'calculator' or 'project_01/module'). If not provided, the whole 'code_to_fix' directory is indexed.",
+                ),
+                "symbol": types.Schema(
+                    type=types.Type.STRING,
+                    description="Name of the definition, preferably qualified ('Calculator.evaluate').",
+                ),
+                "file_path": types.Schema(
+                    type=types.Type.STRING,
+                    description="Optional file containing the symbol, relative to the working directory, to pick one of several definitions with the same name.",
+                ),
+            },
+            required=["symbol"],
+        ),
+    )
+
+    schema_run_python_file = types.FunctionDeclaration(
+        name="run_python_file",
+        description="Run a Python file and return its output, errors, and exit code.",
+        parameters=types.Schema(
+            type=types.Type.OBJECT,
+            properties={
+                "working_directory": types.Schema(
+                    type=types.Type.STRING,
+                    description="Path relative to the 'code_to_fix' directory. Use this to specify the subfolder containing the project to analyze (e.g., 'calculator' or 'project_01/module'). If not provided, 'file_path' is considered relative to 'code_to_fix'.",
+                ),
+                "file_path": types.Schema(
+                    type=types.Type.STRING,
+                    description="The relative path to the target file, starting from the working directory.",
+                ),
+                "use_cache": types.Schema(
+                    type=types.Type.BOOLEAN,
+                    description="Default true: when the result cache is enabled and neither the file, the sandbox modules it imports nor the sandbox's other files changed since an earlier execution in this run, that result is returned (marked as cached). Set false to force a new execution, e.g. for scripts with random or time-dependent output.",
+                ),
+            },
+            required=["file_path"],
+        ),
+    )
+
+    schema_run_tests = types.FunctionDeclaration(
+        name="run_tests",
+        description="Run the project's unittest/pytest tests and return a compact summary: counts of passed/failed/error/skipped tests, then each failure with its traceback. By default only test files affected by changes since their last green run are run (found through the imports of each test file), in parallel. Prefer it to run_python_file on a test script to verify a fix.",
+        parameters=types.Schema(
+            type=types.Type.OBJECT,
+            properties={
+                "working_directory": types.Schema(
+                    type=types.Type.STRING,
+                    description="Path relative to the 'code_to_fix' directory. Use this to specify the subfolder containing the project to test (e.g., 'calculator' or 'project_01/module'). If not provided, tests are discovered in the whole 'code_to_fix' directory.",
+                ),
+                "path": types.Schema(
+                    type=types.Type.STRING,
+                    description="Optional test file or folder, relative to the working directory, limiting the tests discovered.",
+                ),
+                "select": types.Schema(
+                    type=types.Type.STRING,
+                    description="'affected' (default): only test files whose code or imported modules changed since they last passed, or that did not pass. 'all': every test file.",
+                ),
+                "runner": types.Schema(
+                    type=types.Type.STRING,
+                    description="Optional 'pytest' or 'unittest'; by default unittest, or pytest when a test file needs it (fixtures, conftest.py, pytest imports).",
+                ),
+            },
+        ),
+    )
+
+    schema_propose_changes = types.FunctionDeclaration(
+        name="propose_changes",
+        description="Generate a preview of the proposed changes to a file. No actual file is modified. The diff and summary are saved in the __ai_outputs__ directory.",
+        parameters=types.Schema(
+            type=types.Type.OBJECT,
+            properties={
+                "working_directory": types.Schema(
+                    type=types.Type.STRING,
+                    description="Path relative to the 'code_to_fix' directory. Use this to specify the subfolder containing the project to analyze (e.g., 'calculator' or 'project_01/module'). If not provided, 'file_path' is considered relative to 'code_to_fix'",
+                ),
+                "file_path": types.Schema(
+                    type=types.Type.STRING,
+                    description="The relative path to the target file, starting from the working directory.",
+                ),
+                "content": types.Schema(
+                    type=types.Type.STRING,
+                    description="The proposed content to preview in the target file.",
+                ),
+            },
+            required=["file_path", "content"],
+        ),
+    )
+
+    schema_conclude_edit = types.FunctionDeclaration(
+        name="conclude_edit",
+        description=(
+            "Apply the last approved proposal saved in the previous run summary. "
+            "It requires no input parameters; the tool automatically loads file and content from the previous summary."
+        ),
+        parameters=types.Schema(type=types.Type.OBJECT, properties={}, required=[]),
+    )
+
+    return {k: v for k, v in locals().items() if k.startswith("schema_")}
+
+
+def __getattr__(name):
+    # Schemas are built on first access so importing this module stays light
+    if name.startswith("schema_"):
+        globals().update(_build_schemas())
+        if name in globals():
+            return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,5 +1,6 @@
 import os
 
+from aicodeagent.functions.core import code_index, run_cache
 from aicodeagent.functions.core.get_secure_path import get_secure_path
 from aicodeagent.functions.core.save_file import save_file
 from aicodeagent.functions.core.save_logs import save_logs
@@ -37,6 +38,9 @@ def conclude_edit(
                 )
             with open(full_path, "w", encoding="utf-8") as f:
                 f.write(content)
+            # Cached run_python_file results may depend on the old content
+            run_cache.invalidate(run_id)
+            code_index.mark_changed()
             return f'Successfully wrote to "{file_path}" ({len(content)} characters written)'
         else:
             file_name = os.path.basename(full_path)
@@ -55,6 +59,9 @@ def conclude_edit(
                 )
             with open(full_path, "w", encoding="utf-8") as f:
                 f.write(content)
+            # Cached run_python_file results may depend on the old content
+            run_cache.invalidate(run_id)
+            code_index.mark_changed()
             return f'Successfully wrote to "{file_path}" ({len(content)} characters written)'
 
     except Exception as e:
@@ -0,0 +1,98 @@
+import os
+
+from aicodeagent.functions.core.get_secure_path import get_secure_path
+from aicodeagent.functions.core.save_logs import save_logs
+from aicodeagent.functions.core.save_summary_entry import save_summary_entry
+from aicodeagent.functions.core.symbol_index import get_symbol_index
+
+# Symbols listed per call (default and hard ceiling)
+DEFAULT_MAX_RESULTS = 50
+MAX_RESULTS = 500
+KINDS = ("module", "class", "function", "method")
+
+
+def format_symbol(symbol):
+    return (
+        f"- {symbol['file']}:{symbol['line']}-{symbol['end_line']} "
+        f"{symbol['kind']} {symbol['qualname']}: {symbol['signature']}"
+    )
+
+
+def find_symbol(
+    working_directory,
+    name,
+    run_id,
+    kind=None,
+    max_results=None,
+    function_args=None,
+):
+    """
+    Locate modules, classes, functions and methods by name.
+
+    - Backed by an AST index of the working directory's Python files
+      (see `symbol_index`), refreshed incrementally on every call.
+    - `name` is a plain or dotted name ('evaluate', 'Calculator.evaluate',
+      'pkg.calc.Calculator') or a glob ('parse_*'); `kind` narrows the result.
+    - Returns one line per symbol: file, line span, kind, qualified name and
+      signature.
+    """
+
+    # Function name
+    function_name = "find_symbol"
+    # Define summary directory
+    base_dir = os.path.abspath(os.path.join("__ai_outputs__", run_id))
+    # Get the file name
+    file_name = "unknown"
+
+    try:
+        if not name:
+            raise ValueError("Empty symbol name")
+        file_name = str(name)[:200]
+        if kind and kind not in KINDS:
+            raise ValueError(f"Unknown kind '{kind}' (expected one of {KINDS})")
+        cap = DEFAULT_MAX_RESULTS if max_results is None else max_results
+        cap = min(max(1, int(cap)), MAX_RESULTS)
+        root = get_secure_path(working_directory, ".")
+
+        index = get_symbol_index(root)
+        with index.lock:
+            parsed = index.refresh()
+            found = index.find(name, kind)
+            unparsable = index.unparsable()
+
+        if found:
+            lines = [format_symbol(s) for s in found[:cap]]
+            if len(found) > cap:
+                lines.append(f"[{len(found) - cap} more symbols; narrow the name]")
+        else:
+            lines = [f"No symbols match '{name}'"]
+        if unparsable:
+            lines.append(
+                "[not indexed, syntax errors: " + ", ".join(sorted(unparsable)) + "]"
+            )
+
+        status = [
+            f"symbols: {len(found)}",
+            f"files indexed: {len(index.files)}, parsed: {parsed}",
+        ]
+        # Save logs
+        log_line = save_logs(
+            file_name, base_dir, function_name, list_data=status, result="OK"
+        )
+        # Save summary
+        if log_line:
+            save_summary_entry(base_dir, function_name, function_args, log_line)
+
+        return "\n".join(lines)
+
+    except Exception as e:
+        details = str(e)
+        # Save logs
+        log_line = save_logs(
+            file_name, base_dir, function_name, result="ERROR", details=details
+        )
+        # Save summary
+        if log_line:
+            save_summary_entry(base_dir, function_name, function_args, log_line)
+
+        return "Error: " + str(e)
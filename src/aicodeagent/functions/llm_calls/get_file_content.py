@@ -1,11 +1,45 @@
 import os
 
 from aicodeagent.functions.core.get_secure_path import get_secure_path
+from aicodeagent.functions.core.line_index import read_bytes, read_lines
 from aicodeagent.functions.core.save_logs import save_logs
 from aicodeagent.functions.core.save_summary_entry import save_summary_entry
 
+# Characters returned per call; larger files are read in ranges
+MAX_CHARS = 10000
 
-def get_file_content(working_directory, file_path, run_id, function_args=None):
+
+def _footer(text, file_path, meta, next_hint):
+    if "line_start" in meta:
+        shown = f"lines {meta['line_start']}-{meta['line_end']}"
+        size = f"{meta['total_lines']} lines, {meta['total_bytes']} bytes"
+    else:
+        shown = f"bytes {meta['byte_start']}-{meta['byte_end']}"
+        size = f"{meta['total_bytes']} bytes"
+    more = f"; continue with {next_hint}" if next_hint else ""
+    sep = "\n" if text.endswith("\n") else "\n\n"
+    return f'{sep}[File "{file_path}": {shown} of {size}{more}]'
+
+
+def get_file_content(
+    working_directory,
+    file_path,
+    run_id,
+    start_line=None,
+    end_line=None,
+    byte_offset=None,
+    max_bytes=None,
+    function_args=None,
+):
+    """
+    Return the content of a file inside the working directory.
+
+    - Whole files up to MAX_CHARS characters are returned as is.
+    - Otherwise, or when `start_line`/`end_line` (1-based, inclusive) or
+      `byte_offset`/`max_bytes` are given, the requested range is served from
+      an mmap with a cached line-offset index and followed by a footer with
+      the total lines/bytes and the arguments for the next range.
+    """
     # Function name
     function_name = "get_file_content"
     # Define summary directory
@@ -18,15 +52,38 @@ def get_file_content(working_directory, file_path, run_id, function_args=None):
         full_path = get_secure_path(working_directory, file_path)
         # Get the file name
         file_name = os.path.basename(full_path)
+
         # File content extraction
-        MAX_CHARS = 10000
-        with open(full_path, "r", encoding="utf-8", errors="replace") as f:
-            file_content_string = f.read(MAX_CHARS + 1)
-            if len(file_content_string) > MAX_CHARS:
-                file_content_string = (
-                    file_content_string[:-1]
-                    + f'\n\n[...File "{file_path}" truncated at 10000 characters]'
+        if byte_offset is not None or max_bytes is not None:
+            length = min(int(max_bytes or MAX_CHARS), MAX_CHARS)
+            text, meta = read_bytes(full_path, byte_offset, length)
+            more = meta["byte_end"] < meta["total_bytes"]
+            file_content_string = text + _footer(
+                text, file_path, meta, more and f"byte_offset={meta['byte_end']}"
+            )
+        else:
+            text, meta = read_lines(full_path, start_line, end_line, MAX_CHARS)
+            total_lines = meta["total_lines"]
+            if meta["line_start"] > max(1, total_lines):
+                raise ValueError(
+                    f"start_line={meta['line_start']} is past the end of the file "
+                    f"({total_lines} lines)"
                 )
+            asked_end = total_lines
+            if end_line is not None:
+                asked_end = min(int(end_line), total_lines)
+            partial = "partial_line_next_byte" in meta
+            more = partial or meta["line_end"] < asked_end
+            if partial:
+                hint = f"byte_offset={meta['partial_line_next_byte']}"
+            elif more:
+                hint = f"start_line={meta['line_end'] + 1}"
+            else:
+                hint = None
+            ranged = start_line is not None or end_line is not None
+            file_content_string = (
+                text + _footer(text, file_path, meta, hint) if ranged or more else text
+            )
 
         # Save logs
         log_line = save_logs(file_name, base_dir, function_name, result="OK")
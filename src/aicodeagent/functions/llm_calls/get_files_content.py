@@ -0,0 +1,183 @@
+import glob
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from aicodeagent.functions.core.create_snapshot import EXCLUDED_DIRS
+from aicodeagent.functions.core.get_secure_path import get_secure_path
+from aicodeagent.functions.core.line_index import read_lines
+from aicodeagent.functions.core.save_logs import save_logs
+from aicodeagent.functions.core.save_summary_entry import save_summary_entry
+
+# Characters per file and per response (defaults and hard ceilings)
+DEFAULT_FILE_CHARS = 10000
+DEFAULT_TOTAL_CHARS = 40000
+MAX_TOTAL_CHARS = 100000
+MAX_FILES = 50
+READ_WORKERS = 8
+
+
+def _as_list(value):
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [p.strip() for p in value.split(",") if p.strip()]
+    return [str(p) for p in value]
+
+
+def _expand(working_directory, patterns):
+    """Resolve paths and globs (with `**`) to secure file paths, in order, once."""
+    seen, files = set(), []
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            # Same traversal rules as get_secure_path before touching the disk
+            if ".." in pattern or os.path.isabs(pattern):
+                raise PermissionError(
+                    f"Invalid filename: '{pattern}' contains disallowed characters or path traversal"
+                )
+            matches = sorted(
+                glob.glob(pattern, root_dir=working_directory, recursive=True)
+            )
+            matches = [
+                m
+                for m in matches
+                if not EXCLUDED_DIRS.intersection(m.split(os.sep))
+                and os.path.isfile(os.path.join(working_directory, m))
+            ]
+        else:
+            matches = [pattern]
+        for rel_path in matches:
+            full_path = get_secure_path(working_directory, rel_path)
+            if full_path not in seen:
+                seen.add(full_path)
+                files.append((os.path.normpath(rel_path), full_path))
+    return files
+
+
+def _read(full_path, max_chars):
+    try:
+        return read_lines(full_path, 1, None, max_chars)
+    except (OSError, ValueError) as e:
+        return e, None
+
+
+def _fit(text, budget):
+    """Cut `text` to `budget` chars at a line boundary; return (text, lines kept)."""
+    cut = text.rfind("\n", 0, budget)
+    text = text[: cut + 1] if cut >= 0 else ""
+    return text, text.count("\n")
+
+
+def get_files_content(
+    working_directory,
+    paths,
+    run_id,
+    max_chars_per_file=None,
+    max_total_chars=None,
+    function_args=None,
+):
+    """
+    Return the contents of several files in one response.
+
+    - `paths` is a list of paths and/or glob patterns (`**` recurses) relative
+      to the working directory; every match goes through `get_secure_path` and
+      folders in `EXCLUDED_DIRS` are skipped.
+    - Files are read in parallel, each capped at `max_chars_per_file`; the
+      response stops at `max_total_chars`, listing the files left out.
+    - One actions.log entry and one summary record cover the whole batch.
+    """
+
+    # Function name
+    function_name = "get_files_content"
+    # Define summary directory
+    base_dir = os.path.abspath(os.path.join("__ai_outputs__", run_id))
+    # Get the file name
+    file_name = "unknown"
+
+    try:
+        patterns = _as_list(paths)
+        if not patterns:
+            raise ValueError("No paths provided")
+        file_name = ", ".join(patterns)[:200]
+
+        per_file = int(max_chars_per_file or DEFAULT_FILE_CHARS)
+        budget = min(int(max_total_chars or DEFAULT_TOTAL_CHARS), MAX_TOTAL_CHARS)
+        files = _expand(working_directory, patterns)
+        if not files:
+            raise FileNotFoundError(f"No files match: {', '.join(patterns)}")
+        skipped_files = files[MAX_FILES:]
+        files = files[:MAX_FILES]
+
+        # Parallel reads: the batch waits on the slowest file, not on their sum
+        with ThreadPoolExecutor(min(READ_WORKERS, len(files))) as pool:
+            results = list(pool.map(lambda f: _read(f[1], per_file), files))
+
+        # ---- ASSEMBLE IN REQUEST ORDER WITHIN THE TOTAL BUDGET ----
+        sections, status = [], []
+        for (rel_path, _), (text, meta) in zip(files, results):
+            if meta is None:
+                sections.append(f"===== {rel_path} =====\nError: {text}")
+                status.append(f"{rel_path}: ERROR {text}")
+                continue
+            header = (
+                f"===== {rel_path} ({meta['total_lines']} lines, "
+                f"{meta['total_bytes']} bytes) ====="
+            )
+            if budget <= len(header):
+                status.append(f"{rel_path}: SKIPPED (total budget exhausted)")
+                skipped_files.append((rel_path, None))
+                continue
+
+            shown = meta["line_end"]
+            # A line longer than max_chars_per_file is cut inside the line
+            next_byte = meta.get("partial_line_next_byte")
+            if len(header) + 1 + len(text) > budget:
+                text, shown = _fit(text, budget - len(header) - 1)
+                next_byte = None
+            section = f"{header}\n{text}"
+            if next_byte is not None:
+                section += (
+                    f"\n[line {shown} shown in part; continue with get_file_content("
+                    f"file_path='{rel_path}', byte_offset={next_byte})]"
+                )
+            elif shown < meta["total_lines"]:
+                sep = "" if section.endswith("\n") else "\n"
+                section += (
+                    f"{sep}[truncated after line {shown}; continue with "
+                    f"get_file_content(file_path='{rel_path}', start_line={shown + 1})]"
+                )
+            sections.append(section)
+            budget -= len(section)
+            status.append(
+                f"{rel_path}: OK lines 1-{shown}{' (partial)' if next_byte else ''} "
+                f"of {meta['total_lines']}"
+            )
+
+        if skipped_files:
+            status += [f"{p}: SKIPPED (file limit)" for p, f in skipped_files if f]
+            sections.append(
+                "[not read, total budget or file limit reached: "
+                + ", ".join(p for p, _ in skipped_files)
+                + "]"
+            )
+
+        # Save logs (one entry for the whole batch)
+        log_line = save_logs(
+            file_name, base_dir, function_name, list_data=status, result="OK"
+        )
+        # Save summary
+        if log_line:
+            save_summary_entry(base_dir, function_name, function_args, log_line)
+
+        return "\n\n".join(sections)
+
+    except Exception as e:
+        details = str(e)
+        # Save logs
+        log_line = save_logs(
+            file_name, base_dir, function_name, result="ERROR", details=details
+        )
+        # Save summary
+        if log_line:
+            save_summary_entry(base_dir, function_name, function_args, log_line)
+
+        return "Error: " + str(e)
@@ -1,17 +1,97 @@
+import fnmatch
 import os
 
+from aicodeagent.functions.core.create_snapshot import EXCLUDED_DIRS
 from aicodeagent.functions.core.get_secure_path import get_secure_path
 from aicodeagent.functions.core.save_logs import save_logs
 from aicodeagent.functions.core.save_summary_entry import save_summary_entry
 
+# Recursive mode defaults
+DEFAULT_MAX_DEPTH = 8
+MAX_DEPTH = 32
+DEFAULT_PAGE_SIZE = 200
+MAX_PAGE_SIZE = 1000
+# Files larger than this are not read for line counts
+MAX_LINE_COUNT_BYTES = 5 * 1024 * 1024
 
-def get_files_info(working_directory, run_id, directory=None, function_args=None):
+
+def _count_lines(path, size):
+    if size > MAX_LINE_COUNT_BYTES:
+        return "?"
+    lines = 0
+    last = b"\n"
+    with open(path, "rb") as f:
+        while chunk := f.read(1 << 16):
+            lines += chunk.count(b"\n")
+            last = chunk[-1:]
+    return lines + (last != b"\n")
+
+
+def _matches(rel_path, name, patterns):
+    return any(
+        fnmatch.fnmatch(rel_path, p) or fnmatch.fnmatch(name, p) for p in patterns
+    )
+
+
+def _walk(path, prefix, depth, max_depth, include, exclude):
+    """
+    Yield (relative path, DirEntry) depth-first in name order, so that a page
+    cursor addresses the same entry from one call to the next. Excluded
+    directories (and hidden ones, when recursing) are pruned; `include`
+    filters files only.
+    """
+    with os.scandir(path) as it:
+        entries = sorted(it, key=lambda e: e.name)
+    for entry in entries:
+        rel_path = prefix + entry.name
+        if _matches(rel_path, entry.name, exclude):
+            continue
+        if entry.is_dir():
+            if max_depth > 1 and entry.name.startswith("."):
+                continue
+            if not include:
+                yield rel_path, entry
+            # Never follow directory symlinks out of (or around) the tree
+            if depth < max_depth and not entry.is_symlink():
+                yield from _walk(
+                    entry.path, rel_path + "/", depth + 1, max_depth, include, exclude
+                )
+        elif not include or _matches(rel_path, entry.name, include):
+            yield rel_path, entry
+
+
+def _as_list(value):
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [p.strip() for p in value.split(",") if p.strip()]
+    return [str(p) for p in value]
+
+
+def get_files_info(
+    working_directory,
+    run_id,
+    directory=None,
+    recursive=False,
+    max_depth=None,
+    include=None,
+    exclude=None,
+    page_size=None,
+    cursor=None,
+    line_counts=False,
+    function_args=None,
+):
     """
     Lists all files and directories inside the specified target folder.
 
     - Uses `get_secure_path` to resolve the path securely within the project sandbox.
     - If `directory` is None, defaults to listing the root of the working_directory.
     - Returns file names with their sizes and directory status.
+    - `recursive` walks subfolders (up to `max_depth` levels) with paths relative
+      to `directory`; `include`/`exclude` are glob lists matched on the relative
+      path or the name; recursive listings skip `EXCLUDED_DIRS` and hidden folders.
+    - Results are paged by `page_size` from offset `cursor`; a trailing line
+      gives the cursor of the next page. `line_counts` adds lines per file.
     """
 
     # Function name
@@ -32,17 +112,50 @@ def get_files_info(working_directory, run_id, directory=None, function_args=None
         if not os.path.isdir(full_path):
             return f'Error: "{full_path}" is not a directory'
 
+        # ---- OPTIONS (model args may arrive as floats/strings) ----
+        if max_depth is not None:
+            max_depth = min(max(1, int(max_depth)), MAX_DEPTH)
+        else:
+            max_depth = DEFAULT_MAX_DEPTH if recursive else 1
+        if page_size is not None:
+            page_size = min(max(1, int(page_size)), MAX_PAGE_SIZE)
+        elif max_depth > 1:
+            page_size = DEFAULT_PAGE_SIZE
+        start = max(0, int(cursor or 0))
+        include = _as_list(include)
+        exclude = _as_list(exclude)
+        if max_depth > 1:
+            # Same folders the project snapshot skips
+            exclude += sorted(EXCLUDED_DIRS)
+
         # Directory content extraction
-        directory_content = os.listdir(full_path)
         file_list = []
-        for file in directory_content:
-            file_path = os.path.join(full_path, file)
-            if os.path.isdir(file_path):
-                file_list.append(f"- {file}: is_dir=True")
-            else:
-                file_list.append(
-                    f"- {file}: file_size={os.path.getsize(file_path)} bytes, is_dir=False"
-                )
+        has_more = False
+        for n, (rel_path, entry) in enumerate(
+            _walk(full_path, "", 1, max_depth, include, exclude)
+        ):
+            if n < start:
+                continue
+            if page_size is not None and len(file_list) >= page_size:
+                has_more = True
+                break
+            if entry.is_dir():
+                file_list.append(f"- {rel_path}: is_dir=True")
+                continue
+            try:
+                size = entry.stat().st_size
+            except OSError:  # dangling symlink
+                file_list.append(f"- {rel_path}: file_size=? bytes, is_dir=False")
+                continue
+            line = f"- {rel_path}: file_size={size} bytes, is_dir=False"
+            if line_counts:
+                line += f", lines={_count_lines(entry.path, size)}"
+            file_list.append(line)
+
+        if has_more:
+            file_list.append(
+                f"[more entries: call again with cursor={start + len(file_list)}]"
+            )
 
         # Save logs
         log_line = save_logs(
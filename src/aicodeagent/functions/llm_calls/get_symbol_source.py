@@ -0,0 +1,107 @@
+import os
+
+from aicodeagent.functions.core.get_secure_path import get_secure_path
+from aicodeagent.functions.core.line_index import read_lines
+from aicodeagent.functions.core.save_logs import save_logs
+from aicodeagent.functions.core.save_summary_entry import save_summary_entry
+from aicodeagent.functions.core.symbol_index import get_symbol_index
+from aicodeagent.functions.llm_calls.find_symbol import format_symbol
+
+# Characters returned per call (same budget as get_file_content)
+MAX_CHARS = 10000
+
+
+def get_symbol_source(
+    working_directory,
+    symbol,
+    run_id,
+    file_path=None,
+    function_args=None,
+):
+    """
+    Return the source of one class, function or method (decorators included).
+
+    - The symbol is resolved through the AST index used by `find_symbol`, so
+      only its line span is read instead of the whole file.
+    - When `symbol` matches several definitions, `file_path` or a more
+      qualified name picks one; otherwise the candidates are listed.
+    - Spans longer than MAX_CHARS end with the get_file_content range that
+      continues them.
+    """
+
+    # Function name
+    function_name = "get_symbol_source"
+    # Define summary directory
+    base_dir = os.path.abspath(os.path.join("__ai_outputs__", run_id))
+    # Get the file name
+    file_name = "unknown"
+
+    try:
+        if not symbol:
+            raise ValueError("Empty symbol name")
+        file_name = str(symbol)[:200]
+        root = get_secure_path(working_directory, ".")
+        if file_path:
+            # Same sandbox rules as the other tools; the index keys use '/'
+            rel_path = os.path.relpath(get_secure_path(root, file_path), root)
+            file_path = rel_path.replace(os.sep, "/")
+
+        index = get_symbol_index(root)
+        with index.lock:
+            index.refresh()
+            found = index.find(symbol, file_path=file_path)
+        if len(found) > 1:
+            # A class or function wins over a module of the same name
+            code = [s for s in found if s["kind"] != "module"]
+            found = code or found
+        if not found:
+            raise LookupError(f"No symbol matches '{symbol}'")
+        if len(found) > 1:
+            raise LookupError(
+                f"'{symbol}' matches {len(found)} symbols; pass file_path or a "
+                "qualified name:\n" + "\n".join(format_symbol(s) for s in found[:20])
+            )
+
+        match = found[0]
+        full_path = get_secure_path(root, match["file"])
+        text, meta = read_lines(
+            full_path, match["line"], match["end_line"], MAX_CHARS, count_total=False
+        )
+        header = (
+            f"===== {match['file']}:{match['line']}-{match['end_line']} "
+            f"{match['kind']} {match['qualname']} ====="
+        )
+        output = f"{header}\n{text}"
+        if meta["line_end"] < match["end_line"]:
+            sep = "" if output.endswith("\n") else "\n"
+            output += (
+                f"{sep}[truncated after line {meta['line_end']}; continue with "
+                f"get_file_content(file_path='{match['file']}', "
+                f"start_line={meta['line_end'] + 1}, end_line={match['end_line']})]"
+            )
+
+        status = [
+            f"{match['file']}:{match['line']}-{match['end_line']} "
+            f"{match['kind']} {match['qualname']}"
+        ]
+        # Save logs
+        log_line = save_logs(
+            file_name, base_dir, function_name, list_data=status, result="OK"
+        )
+        # Save summary
+        if log_line:
+            save_summary_entry(base_dir, function_name, function_args, log_line)
+
+        return output
+
+    except Exception as e:
+        details = str(e)
+        # Save logs
+        log_line = save_logs(
+            file_name, base_dir, function_name, result="ERROR", details=details
+        )
+        # Save summary
+        if log_line:
+            save_summary_entry(base_dir, function_name, function_args, log_line)
+
+        return "Error: " + str(e)
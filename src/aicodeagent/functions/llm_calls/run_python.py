@@ -1,8 +1,17 @@
 import os
+import signal
 import subprocess
-import sys
 
+from aicodeagent.functions.core import code_index, run_cache
 from aicodeagent.functions.core.get_secure_path import get_secure_path
+from aicodeagent.functions.core.get_versioned_path import get_versioned_path
+from aicodeagent.functions.core.interpreter_pool import run_python
+from aicodeagent.functions.core.output_capture import MAX_OUTPUT_BYTES
+from aicodeagent.functions.core.resource_usage import (
+    format_usage,
+    record_usage,
+    sandbox_limits,
+)
 from aicodeagent.functions.core.save_logs import save_logs
 from aicodeagent.functions.core.save_summary_entry import save_summary_entry
 
@@ -12,13 +21,56 @@ def pack_run_data(stdout, stderr, exit_code):
     return [stdout, stderr, exit_code]
 
 
-def run_python_file(working_directory, file_path, run_id, function_args=None):
+# "0": do not keep the full text of truncated output in the run directory
+ENV_SPILL_OUTPUT = "AICODEAGENT_SPILL_OUTPUT"
+
+
+def _spill_prefix(base_dir, file_name):
+    if os.getenv(ENV_SPILL_OUTPUT, "1") == "0":
+        return None
+    os.makedirs(base_dir, exist_ok=True)
+    stem = os.path.splitext(file_name)[0]
+    stdout_path = get_versioned_path(
+        os.path.join(base_dir, f"{stem}_output.stdout.log")
+    )
+    return stdout_path[: -len(".stdout.log")]
+
+
+def _record_resources(run_data, run_id, file_path, usage):
+    """Add the execution's resource usage to the log and the run's usage ledger."""
+    if usage:
+        run_data["resources"] = format_usage(usage)
+        record_usage(run_id, file_path, usage, run_data["exit_code"])
+
+
+def _format_output(stdout, stderr, exit_code):
+    if stdout.strip() == "" and stderr.strip() == "":
+        return "No output produced."
+    return f"STDOUT:{stdout}\nSTDERR:{stderr}\nExit code:{exit_code}"
+
+
+def run_python_file(
+    working_directory, file_path, run_id, use_cache=True, function_args=None
+):
     """
     Securely runs a Python file within the project sandbox.
 
     - Verifies the file path using `get_secure_path` and ensures it's a `.py` file.
-    - Executes the script in a subprocess with a timeout and captures output/errors.
+    - Executes the script in a subprocess with a timeout and captures output/errors
+      (a child forked from a warm interpreter, see `interpreter_pool`).
+    - Output is streamed into bounded head/tail buffers: long streams are cut
+      with a marker giving their byte counts (the full text is kept in the
+      run directory), and past MAX_OUTPUT_BYTES the script is killed.
+    - The script runs under the RLIMIT_CPU / RLIMIT_AS / RLIMIT_NOFILE caps of
+      `sandbox_limits()`; its wall and CPU time, peak RSS and child processes
+      are logged and added up in run_summary.json (see `resource_usage`).
     - Returns stdout, stderr, and exit code.
+    - With AICODEAGENT_RUN_CACHE=1, a finished execution is cached for the
+      rest of the run under a fingerprint of the script, the sandbox modules
+      it imports (resolved statically), argv, env and the size and mtime of
+      the sandbox's other files; while they are unchanged the cached result
+      is returned, marked as such. `conclude_edit` clears the run's cache,
+      and `use_cache=False` forces an execution.
     """
     # Function name
     function_name = "run_python_file"
@@ -38,21 +90,59 @@ def run_python_file(working_directory, file_path, run_id, function_args=None):
         if not full_path.endswith(".py"):
             return f'Error: "{file_path}" is not a Python file.'
 
+        # ---- RESULT CACHE ----
+        key = None
+        if use_cache and run_cache.run_cache_enabled():
+            key = run_cache.fingerprint(full_path, working_directory)
+            cached = run_cache.lookup(run_id, key)
+            if cached:
+                run_data = {
+                    "stdout": cached["stdout"],
+                    "stderr": cached["stderr"],
+                    "exit_code": cached["exit_code"],
+                    "cached_from": cached["created"],
+                }
+                # Save log
+                log_line = save_logs(
+                    file_name,
+                    base_dir,
+                    function_name,
+                    result="OK (cached)",
+                    details=run_data,
+                )
+                # Save summary
+                if log_line:
+                    save_summary_entry(base_dir, function_name, function_args, log_line)
+                return (
+                    _format_output(
+                        cached["stdout"], cached["stderr"], cached["exit_code"]
+                    )
+                    + "\n[cached result of an identical execution at "
+                    f"{cached['created']} in this run: the script, the sandbox modules it imports and the "
+                    "sandbox's other files are unchanged; call with use_cache=false "
+                    "to run it again]"
+                )
+
         # Run the file, timeout handling
+        limits = sandbox_limits()
         try:
-            output = subprocess.run(
-                [sys.executable, full_path],
-                timeout=30,
-                capture_output=True,
-                text=True,
+            output = run_python(
+                full_path,
                 cwd=working_directory,
+                timeout=30,
+                spill_prefix=_spill_prefix(base_dir, file_name),
+                limits=limits,
             )
+            # Files the script wrote are searched from the next query on
+            code_index.mark_changed()
 
         except subprocess.TimeoutExpired as te:
+            code_index.mark_changed()
             stdout = te.stdout or ""
             stderr = te.stderr or ""
             exit_code = "TIMEOUT"
             run_data = {"stdout": stdout, "stderr": stderr, "exit_code": exit_code}
+            _record_resources(run_data, run_id, file_path, te.usage)
 
             # Save log
             log_line = save_logs(
@@ -74,6 +164,23 @@ def run_python_file(working_directory, file_path, run_id, function_args=None):
         stderr = output.stderr or ""
         exit_code = output.returncode
         run_data = {"stdout": stdout, "stderr": stderr, "exit_code": exit_code}
+        if output.truncated:
+            run_data["output_bytes"] = (
+                f"stdout {output.stdout_bytes}, stderr {output.stderr_bytes}"
+            )
+            if output.spill_paths:
+                run_data["full_output"] = ", ".join(output.spill_paths)
+        _record_resources(run_data, run_id, file_path, output.usage)
+        # RLIMIT_CPU ends the script with SIGXCPU
+        cpu_limit = limits.get("RLIMIT_CPU")
+        cpu_killed = bool(cpu_limit) and exit_code == -signal.SIGXCPU
+        if output.limit_exceeded:
+            # Runaway output: report it, do not cache it
+            run_data["killed"] = f"output limit of {MAX_OUTPUT_BYTES} bytes exceeded"
+        elif cpu_killed:
+            run_data["killed"] = f"CPU time limit of {cpu_limit} s exceeded"
+        elif key:
+            run_cache.store(run_id, key, stdout, stderr, exit_code)
 
         # Save log
         log_line = save_logs(
@@ -85,9 +192,19 @@ def run_python_file(working_directory, file_path, run_id, function_args=None):
             save_summary_entry(base_dir, function_name, function_args, log_line)
 
         # Output
-        if stdout.strip() == "" and stderr.strip() == "":
-            return "No output produced."
-        return f"STDOUT:{stdout}\nSTDERR:{stderr}\nExit code:{exit_code}"
+        if output.limit_exceeded:
+            return (
+                _format_output(stdout, stderr, exit_code)
+                + f"\n[output limit of {MAX_OUTPUT_BYTES} bytes exceeded: "
+                "the script was killed]"
+            )
+        if cpu_killed:
+            return (
+                _format_output(stdout, stderr, exit_code)
+                + f"\n[CPU time limit of {cpu_limit} s exceeded: "
+                "the script was killed]"
+            )
+        return _format_output(stdout, stderr, exit_code)
 
     except Exception as e:
         details = str(e)
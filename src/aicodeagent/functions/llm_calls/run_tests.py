@@ -0,0 +1,190 @@
+import os
+import signal
+import time
+from collections import Counter
+
+from aicodeagent.functions.core import affected_tests, code_index
+from aicodeagent.functions.core.get_secure_path import get_secure_path
+from aicodeagent.functions.core.resource_usage import record_usage
+from aicodeagent.functions.core.save_logs import save_logs
+from aicodeagent.functions.core.save_summary_entry import save_summary_entry
+
+RUNNERS = ("pytest", "unittest")
+# Failures shown with their message, message lines kept, further ids listed
+MAX_FAILURES = 10
+MAX_FAILURE_LINES = 15
+MAX_LISTED = 50
+# Characters of a crashed shard's output shown
+MAX_SHARD_OUTPUT = 2000
+
+OUTCOMES = ("passed", "failed", "error", "skipped")
+
+
+def _indent(text, max_lines):
+    lines = text.rstrip().splitlines()
+    if len(lines) > max_lines:
+        lines = ["[...]", *lines[-max_lines:]]
+    return "\n".join(f"    {line}" for line in lines)
+
+
+def _shard_problems(results):
+    """Error blocks for shards that timed out or died before finishing."""
+    blocks = []
+    for n, shard in enumerate(results, 1):
+        if shard["finished"]:
+            continue
+        if shard["exit_code"] == "TIMEOUT":
+            why = f"timed out after {affected_tests.SHARD_TIMEOUT} seconds"
+        elif shard["cpu_limit"] and shard["exit_code"] == -signal.SIGXCPU:
+            why = f"killed after exceeding its CPU time limit of {shard['cpu_limit']} s"
+        else:
+            why = f"exited with code {shard['exit_code']} before finishing"
+        block = f"ERROR shard {n} ({', '.join(shard['files'])}): {why}"
+        output = shard["output"].strip()[-MAX_SHARD_OUTPUT:]
+        if output:
+            block += "\n" + _indent(output, MAX_FAILURE_LINES)
+        blocks.append(block)
+    return blocks
+
+
+def _format(selected, discovered, results, runner, elapsed):
+    records = [r for shard in results for r in shard["records"]]
+    counts = Counter(r["outcome"] for r in records)
+    reasons = Counter(selected.values())
+    skipped_files = discovered - len(selected)
+
+    why = ", ".join(f"{n} {reason}" for reason, n in sorted(reasons.items()))
+    lines = [
+        f"Selected {len(selected)} of {discovered} test files ({why}"
+        + (
+            f"; {skipped_files} unchanged and green, not run)" if skipped_files else ")"
+        ),
+        f"Ran {len(records)} tests with {runner} in {len(results)} "
+        f"shard{'s' if len(results) != 1 else ''}, "
+        f"{elapsed:.2f}s: " + ", ".join(f"{counts[o]} {o}" for o in OUTCOMES),
+    ]
+
+    failures = [r for r in records if r["outcome"] in affected_tests.FAILED_OUTCOMES]
+    problems = _shard_problems(results)
+    if not failures and not problems:
+        lines.append("All selected tests passed.")
+        return "\n".join(lines)
+
+    blocks = problems
+    for r in failures[:MAX_FAILURES]:
+        block = f"{r['outcome'].upper()} {r['id']}"
+        if r["message"]:
+            block += "\n" + _indent(r["message"], MAX_FAILURE_LINES)
+        blocks.append(block)
+    rest = failures[MAX_FAILURES:]
+    if rest:
+        listed = "\n".join(
+            f"{r['outcome'].upper()} {r['id']}" for r in rest[:MAX_LISTED]
+        )
+        more = len(rest) - MAX_LISTED
+        blocks.append(listed + (f"\n[... {more} more]" if more > 0 else ""))
+    return "\n".join(lines) + "\n\n" + "\n\n".join(blocks)
+
+
+def run_tests(
+    working_directory,
+    run_id,
+    path=None,
+    select="affected",
+    runner=None,
+    function_args=None,
+):
+    """
+    Run the project's unittest/pytest tests and return a pass/fail summary.
+
+    - Test files (test*.py, *_test.py) are discovered under the working
+      directory, or `path` inside it.
+    - With select="affected" (default) only the files whose tests may have
+      changed since their last green run are run: a file is fingerprinted
+      with every sandbox module it imports, transitively, and the data
+      files under its folder (see `affected_tests`); new, changed and
+      previously failing files run, the others are skipped. select="all" runs every file.
+    - Selected files are split into shards, balanced by their last duration,
+      and run in parallel, one shard per CPU core, on the interpreter pool
+      (so under the sandbox limits of `run_python`), with unittest or, when
+      a file needs it (fixtures, conftest.py, pytest imports), pytest.
+    - Returns counts per outcome, then each failure with its message.
+    """
+    # Function name
+    function_name = "run_tests"
+    # Define summary directory
+    base_dir = os.path.abspath(os.path.join("__ai_outputs__", run_id))
+    # Get the file name
+    file_name = path or "."
+
+    try:
+        if select not in ("affected", "all"):
+            raise ValueError(f"Invalid select: {select!r} (use 'affected' or 'all')")
+        if runner is not None and runner not in RUNNERS:
+            raise ValueError(f"Invalid runner: {runner!r} (use 'pytest' or 'unittest')")
+
+        root = get_secure_path(working_directory, ".")
+        rel = None
+        if path and path not in (".", "./"):
+            full_path = get_secure_path(working_directory, path)
+            if not os.path.exists(full_path):
+                return f'Error: Path not found: "{path}"'
+            rel = os.path.relpath(full_path, root)
+
+        files = affected_tests.discover(root, rel)
+        if not files:
+            patterns = ", ".join(affected_tests.TEST_PATTERNS)
+            return f'No test files ({patterns}) found under "{file_name}".'
+
+        state = affected_tests.load_state(root)
+        if rel is None:
+            # Deleted test files leave the state
+            state = {f: s for f, s in state.items() if f in files}
+        selected, fingerprints = affected_tests.select(
+            root, files, state, select_all=select == "all"
+        )
+
+        if not selected:
+            output = (
+                f"None of the {len(files)} test files is affected by changes since "
+                "its last green run: all green. Call with select='all' to run "
+                "them anyway."
+            )
+            status = [f"test files: {len(files)}, selected: 0"]
+        else:
+            runner = runner or affected_tests.default_runner(root, selected)
+            t0 = time.perf_counter()
+            results = affected_tests.run_shards(root, sorted(selected), runner, state)
+            # Tests may write into the sandbox
+            code_index.mark_changed()
+            elapsed = time.perf_counter() - t0
+            affected_tests.update_state(state, results, fingerprints)
+            for n, shard in enumerate(results, 1):
+                if shard["usage"]:
+                    label = f"run_tests shard {n}: {', '.join(shard['files'])}"
+                    record_usage(run_id, label, shard["usage"], shard["exit_code"])
+            output = _format(selected, len(files), results, runner, elapsed)
+            status = output.split("\n\n")[0].splitlines()
+        affected_tests.save_state(root, state)
+
+        # Save logs
+        log_line = save_logs(
+            file_name, base_dir, function_name, list_data=status, result="OK"
+        )
+        # Save summary
+        if log_line:
+            save_summary_entry(base_dir, function_name, function_args, log_line)
+
+        return output
+
+    except Exception as e:
+        details = str(e)
+        # Save logs
+        log_line = save_logs(
+            file_name, base_dir, function_name, result="ERROR", details=details
+        )
+        # Save summary
+        if log_line:
+            save_summary_entry(base_dir, function_name, function_args, log_line)
+
+        return "Error: " + str(e)
@@ -0,0 +1,143 @@
+import os
+import re
+
+from aicodeagent.functions.core.code_index import get_index
+from aicodeagent.functions.core.get_secure_path import get_secure_path
+from aicodeagent.functions.core.save_logs import save_logs
+from aicodeagent.functions.core.save_summary_entry import save_summary_entry
+
+# Result cap and context lines (defaults and hard ceilings)
+DEFAULT_MAX_RESULTS = 50
+MAX_RESULTS = 500
+DEFAULT_CONTEXT_LINES = 2
+MAX_CONTEXT_LINES = 10
+# Characters shown per line
+MAX_LINE_CHARS = 300
+
+
+def _clip(line):
+    return line if len(line) <= MAX_LINE_CHARS else line[:MAX_LINE_CHARS] + " [...]"
+
+
+def _format(matches):
+    """grep-style blocks: `path:N: line` for hits, `path-N- line` for context."""
+    shown = {}  # path -> {line number: (text, is_hit)}, in first-hit order
+    for m in matches:
+        lines = shown.setdefault(m["path"], {})
+        for n, text in enumerate(m["before"], m["line"] - len(m["before"])):
+            lines.setdefault(n, (text, False))
+        for n, text in enumerate(m["after"], m["line"] + 1):
+            lines.setdefault(n, (text, False))
+        lines[m["line"]] = (m["text"], True)
+
+    blocks = []
+    for rel_path, lines in shown.items():
+        block, prev = [], None
+        for n in sorted(lines):
+            if prev is not None and n != prev + 1:
+                # Gap between context windows starts a new block
+                blocks.append(block)
+                block = []
+            text, is_hit = lines[n]
+            sep = ":" if is_hit else "-"
+            block.append(f"{rel_path}{sep}{n}{sep} {_clip(text)}")
+            prev = n
+        blocks.append(block)
+    return "\n--\n".join("\n".join(b) for b in blocks)
+
+
+def search_code(
+    working_directory,
+    query,
+    run_id,
+    path=None,
+    context_lines=None,
+    max_results=None,
+    ignore_case=False,
+    function_args=None,
+):
+    """
+    Search the project for a regular expression.
+
+    - Candidate files come from a trigram index of the working directory
+      (see `code_index`), persisted in the output directory and refreshed by
+      file mtime/size and hash after sandbox writes (edits, script and test
+      runs) or every REFRESH_INTERVAL seconds, so only changed files are read
+      again and only files that can match are scanned.
+    - `path` limits the search to a subfolder or glob (relative paths).
+    - Returns `path:line: text` hits with `context_lines` around them, at most
+      `max_results` hits; a trailing line says when the cap was reached.
+    """
+
+    # Function name
+    function_name = "search_code"
+    # Define summary directory
+    base_dir = os.path.abspath(os.path.join("__ai_outputs__", run_id))
+    # Get the file name
+    file_name = "unknown"
+
+    try:
+        if not query:
+            raise ValueError("Empty query")
+        file_name = str(query)[:200]
+
+        # ---- OPTIONS (model args may arrive as floats/strings) ----
+        context = DEFAULT_CONTEXT_LINES if context_lines is None else context_lines
+        context = min(max(0, int(context)), MAX_CONTEXT_LINES)
+        cap = DEFAULT_MAX_RESULTS if max_results is None else max_results
+        cap = min(max(1, int(cap)), MAX_RESULTS)
+        try:
+            regex = re.compile(query, re.IGNORECASE if ignore_case else 0)
+        except re.error as e:
+            raise ValueError(f"Invalid regular expression: {e}") from e
+        path_glob = None
+        if path and path not in (".", "./"):
+            if ".." in path or os.path.isabs(path):
+                raise PermissionError(
+                    f"Invalid filename: '{path}' contains disallowed characters or path traversal"
+                )
+            path_glob = path.strip("/")
+        root = get_secure_path(working_directory, ".")
+
+        index = get_index(root)
+        with index.lock:
+            reindexed = index.refresh()
+            matches, files_matched, capped = index.search(
+                regex, path_glob, context, cap
+            )
+
+        if not matches:
+            output = f"No matches for /{query}/"
+        else:
+            output = _format(matches)
+            if capped:
+                output += (
+                    f"\n[results capped at {cap} matches; narrow the query or "
+                    "the path, or raise max_results]"
+                )
+
+        status = [
+            f"matches: {len(matches)}{'+' if capped else ''} in {files_matched} files",
+            f"files indexed: {len(index.files)}, re-indexed: {reindexed}",
+        ]
+        # Save logs
+        log_line = save_logs(
+            file_name, base_dir, function_name, list_data=status, result="OK"
+        )
+        # Save summary
+        if log_line:
+            save_summary_entry(base_dir, function_name, function_args, log_line)
+
+        return output
+
+    except Exception as e:
+        details = str(e)
+        # Save logs
+        log_line = save_logs(
+            file_name, base_dir, function_name, result="ERROR", details=details
+        )
+        # Save summary
+        if log_line:
+            save_summary_entry(base_dir, function_name, function_args, log_line)
+
+        return "Error: " + str(e)
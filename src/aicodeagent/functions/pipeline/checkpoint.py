@@ -0,0 +1,149 @@
+import json
+import os
+
+from aicodeagent.functions.pipeline.init_run_session import get_run_dir
+from aicodeagent.lazy_import import LazyModule
+
+types = LazyModule("google.genai.types")
+
+CHECKPOINT_FILE = "checkpoint.jsonl"
+
+
+def _dump(obj):
+    return obj.model_dump(mode="json", exclude_none=True)
+
+
+class Checkpoint:
+    """
+    Append-only journal of a run in <run_dir>/checkpoint.jsonl, one JSON record
+    per line:
+
+      session  prompt, options, previous-run context (written once)
+      msg      a conversation message, journaled once
+      model    a model response whose tool calls are not all done yet
+      tool     the result of the n-th dispatched tool call of that response
+      turn     end of an iteration: message count, counters and next phase
+      end      the run finished and was finalized
+
+    Only records up to the last `turn` are authoritative; `load_checkpoint`
+    turns a trailing `model` + `tool` records into pending work.
+    """
+
+    def __init__(self, run_id, n_messages=0):
+        self.path = os.path.join(get_run_dir(run_id), CHECKPOINT_FILE)
+        # Messages of RunState.messages already in the journal
+        self.n_messages = n_messages
+
+    def _append(self, *records):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            for rec in records:
+                f.write(json.dumps(rec, ensure_ascii=False, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _new_messages(self, state):
+        records = [
+            {"kind": "msg", "content": _dump(m)}
+            for m in state.messages[self.n_messages :]
+        ]
+        self.n_messages = len(state.messages)
+        return records
+
+    def session(self, state, options):
+        self._append(
+            {
+                "kind": "session",
+                "run_id": state.run_id,
+                "prompt": state.prompt,
+                "options": vars(options),
+                "prev_summary_path": state.prev_summary_path,
+                "last_prop": state.last_prop,
+            },
+            *self._new_messages(state),
+        )
+
+    def model_turn(self, state, response):
+        self._append(
+            *self._new_messages(state),
+            {"kind": "model", "cycle": state.cycle_number, "response": _dump(response)},
+        )
+
+    def tool_result(self, state, index, result):
+        self._append(
+            {
+                "kind": "tool",
+                "cycle": state.cycle_number,
+                "n": index,
+                "result": _dump(result),
+            }
+        )
+
+    def commit(self, state):
+        self._append(
+            *self._new_messages(state),
+            {
+                "kind": "turn",
+                "cycle": state.cycle_number,
+                "phase": state.phase,
+                "n_messages": self.n_messages,
+                "run_stats": state.run_stats,
+                "transient_streak": state.transient_streak,
+                "save_type": state.save_type,
+                "extra_data": state.extra_data,
+                "proposed_content": state.proposed_content,
+            },
+        )
+
+    def end(self, state):
+        self._append({"kind": "end", "save_type": state.save_type})
+
+
+def load_checkpoint(run_id):
+    """
+    Read a run's journal. Returns a dict with the session record, the messages
+    and counters of the last completed turn, the pending model response (if the
+    process died while its tools ran), the tool results already recorded for it
+    and whether the run has ended. Raises FileNotFoundError without a journal.
+    """
+    path = os.path.join(get_run_dir(run_id), CHECKPOINT_FILE)
+    session, turn, pending, ended = None, None, None, False
+    messages, replay = [], {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except json.JSONDecodeError:
+                break  # torn last write: everything before it is intact
+            kind = rec.get("kind")
+            if kind == "session":
+                session = rec
+            elif kind == "msg":
+                messages.append(rec["content"])
+            elif kind == "model":
+                pending, replay = rec, {}
+            elif kind == "tool" and pending is not None:
+                replay[rec["n"]] = rec["result"]
+            elif kind == "turn":
+                turn, pending, replay = rec, None, {}
+            elif kind == "end":
+                ended = True
+
+    if session is None:
+        raise ValueError(f"{path}: missing session record")
+    n_messages = turn["n_messages"] if turn else len(messages)
+    return {
+        "session": session,
+        "turn": turn,
+        "messages": [types.Content.model_validate(m) for m in messages[:n_messages]],
+        "pending": (
+            types.GenerateContentResponse.model_validate(pending["response"])
+            if pending
+            else None
+        ),
+        "pending_cycle": pending["cycle"] if pending else None,
+        "replay": {
+            n: types.Content.model_validate(r) for n, r in sorted(replay.items())
+        },
+        "ended": ended,
+    }
@@ -1,4 +1,6 @@
-from google.genai import types
+from aicodeagent.lazy_import import LazyModule
+
+types = LazyModule("google.genai.types")
 
 
 def emit(_name, kind, reason, steps, I_O, function_response_list):
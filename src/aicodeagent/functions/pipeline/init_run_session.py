@@ -21,6 +21,16 @@ def _resolve_output_dir(base_dir: str | None = None) -> str:
     return os.path.join(get_project_root(__file__), "__ai_outputs__")
 
 
+def get_output_dir(base_dir: str | None = None) -> str:
+    """Absolute output root shared by all runs (indexes, caches, run_XXX dirs)."""
+    return _resolve_output_dir(base_dir)
+
+
+def get_run_dir(run_id: str, base_dir: str | None = None) -> str:
+    """Absolute path of `run_id` under the resolved output directory."""
+    return os.path.join(_resolve_output_dir(base_dir), run_id)
+
+
 def init_run_session(
     max_runs: int = 10, max_global_runs: int = 1000, base_dir: str | None = None
 ) -> str:
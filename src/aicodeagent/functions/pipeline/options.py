@@ -7,3 +7,10 @@ class PipelineOptions:
     I_O: bool
     reset: bool
     demo: bool
+    stream: bool = False
+    context_budget: int = 32000
+    # Max concurrent read-only tool calls per turn (1 = sequential)
+    tool_workers: int = 4
+    parallel_run_python: bool = False
+    # Answer repeated read-only calls on unchanged files with a reference
+    memo_tools: bool = True
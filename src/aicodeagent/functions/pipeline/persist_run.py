@@ -0,0 +1,112 @@
+import json
+import shutil
+import time
+from pathlib import Path
+
+from aicodeagent.functions.core.resource_usage import usage_totals
+from aicodeagent.functions.core.save_run_info import save_run_info
+from aicodeagent.functions.pipeline.init_run_session import get_run_dir
+from aicodeagent.functions.pipeline.run_ledger import save_usage_totals
+
+
+def persist_run(result):
+    """
+    Write run_summary.json for a finished pipeline run according to its
+    save_type, then merge the run's usage totals into it (model calls, and
+    the resources used by the scripts it ran).
+    """
+    run_id = result["run_id"]
+    messages = result["messages"]
+    save_type = result["save_type"]
+    extra_data = result["extra_data"]
+    prev_summary_path = result["prev_summary_path"]
+    proposed_content = result["proposed_content"]
+
+    # ---- PERSIST RUN SUMMARY ------------------------------------------------------
+    match save_type:
+
+        case "Default":
+            # Save current run summary normally
+            save_run_info(messages, run_id, extra_data)
+
+        case "Discard_run":
+            # Copy previous summary if available
+            if prev_summary_path:
+                dst_dir = Path(get_run_dir(run_id))
+                dst_dir.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(prev_summary_path, dst_dir / "run_summary.json")
+
+        case "Error":
+            # Load previous summary if present
+            base = {}
+            if prev_summary_path and Path(prev_summary_path).exists():
+                try:
+                    with open(prev_summary_path, "r", encoding="utf-8") as f:
+                        base = json.load(f) or {}
+                except Exception:
+                    base = {}
+
+            # Add this run as error
+            ar = base.setdefault("additional_runs", [])
+            ar.append(
+                {
+                    "run_id": run_id,
+                    "type": "error",
+                    "ts": int(time.time()),
+                    "message": "Invalid apply; resume from previous proposals.",
+                }
+            )
+
+            dst_dir = Path(get_run_dir(run_id))
+            dst_dir.mkdir(parents=True, exist_ok=True)
+            with open(dst_dir / "run_summary.json", "w", encoding="utf-8") as f:
+                json.dump(base, f, indent=2, ensure_ascii=False)
+
+        case "Additional_run":
+            # Save current run
+            cur_path = save_run_info(messages, run_id, extra_data)
+
+            # Load previous run
+            base_prev = {}
+            if prev_summary_path and Path(prev_summary_path).exists():
+                try:
+                    with open(prev_summary_path, "r", encoding="utf-8") as f:
+                        base_prev = json.load(f) or {}
+                except Exception:
+                    base_prev = {}
+
+            # Load current run
+            with open(cur_path, "r", encoding="utf-8") as f:
+                cur_summary = json.load(f) or {}
+
+            # Merge two runs
+            merged = {
+                "proposals": base_prev.get("proposals", []),
+                "header": {
+                    "run_id": run_id,
+                    "ts": time.time(),
+                    "mode": "Additional_run",
+                },
+                "previous_summary": base_prev,
+                "current_summary": cur_summary,
+            }
+
+            dst_dir = Path(get_run_dir(run_id))
+            dst_dir.mkdir(parents=True, exist_ok=True)
+            with open(dst_dir / "run_summary.json", "w", encoding="utf-8") as f:
+                json.dump(merged, f, indent=2, ensure_ascii=False)
+
+        case "propose_run":
+            # Save proposal run
+            save_run_info(messages, run_id, proposed_content, extra_data)
+
+        case _:
+            raise ValueError(f"Invalid save_type: {save_type!r}")
+
+    # ---- RUN USAGE TOTALS ---------------------------------------------------------
+    # Per-call details are in __ai_outputs__/<run_id>/llm_ledger.jsonl
+    save_usage_totals(run_id, result["usage"])
+    # Per-execution details are in __ai_outputs__/<run_id>/sandbox_usage.jsonl
+    sandbox = usage_totals(run_id)
+    if sandbox:
+        save_usage_totals(run_id, sandbox, key="sandbox")
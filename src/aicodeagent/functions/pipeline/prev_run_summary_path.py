@@ -1,12 +1,12 @@
 import os
 
-from aicodeagent.functions.fs.get_project_root import get_project_root
+from aicodeagent.functions.pipeline.init_run_session import get_run_dir
 
 
 def prev_run_summary_path(current_run_id: str):
     """
     Return absolute path to the previous run summary JSON
-    under <PROJECT_ROOT>/__ai_outputs__/run_XXX/run_summary.json.
+    under <OUTPUT_DIR>/run_XXX/run_summary.json (see `get_run_dir`).
     """
     try:
         n = int(current_run_id.split("_")[-1])
@@ -17,6 +17,5 @@ def prev_run_summary_path(current_run_id: str):
     if prev < 1:
         return None
 
-    base_dir = os.path.join(get_project_root(__file__), "__ai_outputs__")
-    path = os.path.join(base_dir, f"run_{prev:03}", "run_summary.json")
+    path = os.path.join(get_run_dir(f"run_{prev:03}"), "run_summary.json")
     return path if os.path.isfile(path) else None
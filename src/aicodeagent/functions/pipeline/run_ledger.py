@@ -0,0 +1,102 @@
+import json
+import os
+import time
+
+from aicodeagent.functions.pipeline.init_run_session import get_run_dir
+
+LEDGER_FILE = "llm_ledger.jsonl"
+
+# usage_metadata attribute -> ledger field
+USAGE_FIELDS = {
+    "prompt_token_count": "prompt_tokens",
+    "candidates_token_count": "candidate_tokens",
+    "cached_content_token_count": "cached_tokens",
+    "total_token_count": "total_tokens",
+}
+
+
+def client_retries(llm) -> int:
+    """Cumulative client-side retries of the first wrapper that counts them."""
+    while llm is not None:
+        if hasattr(llm, "total_retries"):
+            return llm.total_retries
+        llm = getattr(llm, "inner", None)
+    return 0
+
+
+def timed(chunks, meter):
+    """Yield `chunks`, adding the time spent waiting on the model to meter["latency_s"]."""
+    it = iter(chunks)
+    while True:
+        t0 = time.perf_counter()
+        try:
+            chunk = next(it)
+        except StopIteration:
+            return
+        finally:
+            meter["latency_s"] += time.perf_counter() - t0
+        yield chunk
+
+
+class RunLedger:
+    """
+    Append-only record of every model call of a run, one JSON line per call in
+    <run_dir>/llm_ledger.jsonl: token counts, wall latency, client retries and
+    tool calls dispatched from the response.
+    """
+
+    def __init__(self, run_id, resume=False):
+        self.run_id = run_id
+        self.path = os.path.join(get_run_dir(run_id), LEDGER_FILE)
+        self.entries = []
+        if resume:
+            # Keep the calls made before the run was interrupted in the totals
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.entries = [json.loads(line) for line in f if line.strip()]
+            except (OSError, json.JSONDecodeError):
+                self.entries = []
+
+    def record(
+        self, cycle, usage=None, latency_s=0.0, retries=0, tool_calls=0, error=None
+    ):
+        entry = {"cycle": cycle, "ts": time.time()}
+        for attr, key in USAGE_FIELDS.items():
+            entry[key] = (getattr(usage, attr, None) if usage else None) or 0
+        entry["latency_s"] = round(latency_s, 4)
+        entry["retries"] = retries
+        entry["tool_calls"] = tool_calls
+        if error is not None:
+            entry["error"] = f"{type(error).__name__}: {error}"[:300]
+
+        self.entries.append(entry)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        return entry
+
+    def totals(self) -> dict:
+        """Per-run totals, as stored under "usage" in run_summary.json."""
+        totals = {"calls": len(self.entries), "errors": 0}
+        for key in (*USAGE_FIELDS.values(), "latency_s", "retries", "tool_calls"):
+            totals[key] = sum(e[key] for e in self.entries)
+        totals["errors"] = sum(1 for e in self.entries if "error" in e)
+        totals["latency_s"] = round(totals["latency_s"], 4)
+        totals["max_prompt_tokens"] = max(
+            (e["prompt_tokens"] for e in self.entries), default=0
+        )
+        return totals
+
+
+def save_usage_totals(run_id, totals, key="usage"):
+    """Merge `totals` into <run_dir>/run_summary.json (no-op if it was not written)."""
+    path = os.path.join(get_run_dir(run_id), "run_summary.json")
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            summary = json.load(f) or {}
+    except (OSError, json.JSONDecodeError):
+        return None
+    summary[key] = totals
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    return path
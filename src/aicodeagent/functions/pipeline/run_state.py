@@ -0,0 +1,52 @@
+from dataclasses import dataclass, field
+
+# Driver phases: query the model, run the tools of the journaled response, stop
+CALL_MODEL = "call_model"
+DISPATCH = "dispatch"
+DONE = "done"
+
+
+def _new_run_stats():
+    return {
+        "tool_calls": 0,
+        "text_only": False,
+        "propose_ok": 0,
+        "apply_ok": 0,
+        "file_info_blox": 0,
+        "read_ok": 0,
+        "transient_err": 0,
+    }
+
+
+@dataclass
+class RunState:
+    """Mutable state of one pipeline session, shared by the sync and async drivers."""
+
+    run_id: str
+    prompt: str
+    config: object
+    messages: list = field(default_factory=list)
+    prev_summary_path: str | None = None
+    last_prop: dict | None = None
+    # Variable to save data fed at conclude_edit
+    extra_data: dict | None = None
+    proposed_content: str | None = None
+    save_type: str = "Default"
+    cycle_number: int = 0
+    transient_streak: int = 0
+    run_stats: dict = field(default_factory=_new_run_stats)
+    # ContextCompactor deciding what part of `messages` is sent to the model
+    compactor: object = None
+    # RunLedger of model calls, and usage_metadata of the last processed turn
+    ledger: object = None
+    last_usage: object = None
+    # Bounded pool for read-only tool calls of one turn (None: run inline)
+    tool_pool: object = None
+    # ToolMemo of read-only results (None: memoization disabled)
+    memo: object = None
+    # Checkpoint journal, current phase, the model response being dispatched and
+    # the tool results of it journaled before a crash ({call index: Content})
+    checkpoint: object = None
+    phase: str = CALL_MODEL
+    pending_response: object = None
+    replay: dict = field(default_factory=dict)
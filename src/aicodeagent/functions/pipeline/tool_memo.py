@@ -0,0 +1,130 @@
+import json
+import os
+
+from aicodeagent.lazy_import import LazyModule
+
+types = LazyModule("google.genai.types")
+
+# Memoizable (read-only) tool -> argument naming the path it reads
+MEMO_TOOLS = {
+    "get_file_content": "file_path",
+    "get_files_info": "directory",
+}
+# Injected by the pipeline, not chosen by the model
+IGNORED_ARGS = ("function_args", "run_id")
+
+
+def _stat(path):
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def fingerprint(path):
+    """
+    (mtime, size, inode) of `path`; for a directory also of each entry, since
+    a file growing in place does not touch its directory's mtime.
+    None if the path cannot be read.
+    """
+    try:
+        if not os.path.isdir(path):
+            return _stat(path)
+        with os.scandir(path) as it:
+            entries = sorted((e.name, _stat(e.path)) for e in it if not e.is_symlink())
+        return (_stat(path), tuple(entries))
+    except OSError:
+        return None
+
+
+def _is_ok(response):
+    text = response.get("result") if isinstance(response, dict) else None
+    return isinstance(text, str) and not text.startswith("Error:")
+
+
+class ToolMemo:
+    """
+    Per-run memo of read-only tool results.
+
+    Keyed by tool name and normalized arguments; an entry is valid while the
+    fingerprint of the path it read is unchanged and its response is still
+    visible to the model (not elided by the context manager). A hit returns a
+    short "unchanged since call #N" reference instead of the payload.
+    """
+
+    def __init__(self):
+        # key -> (call number, fingerprint, function_response Part sent)
+        self.entries = {}
+        self.hits = 0
+
+    @staticmethod
+    def _key(function_call):
+        if function_call.name not in MEMO_TOOLS:
+            return None
+        args = function_call.args or {}
+        try:
+            deep = bool(args.get("recursive")) or float(args.get("max_depth") or 1) > 1
+        except (TypeError, ValueError):
+            deep = True
+        if deep:
+            return None  # the fingerprint only covers one directory level
+        args = {k: v for k, v in args.items() if k not in IGNORED_ARGS}
+        path_arg = MEMO_TOOLS[function_call.name]
+        args[path_arg] = os.path.normpath(args.get(path_arg) or ".")
+        path = os.path.join(args.get("working_directory") or "", args[path_arg])
+        return (function_call.name, json.dumps(args, sort_keys=True, default=str)), path
+
+    def lookup(self, function_call):
+        """Return a tool Content referencing an identical earlier result, or None."""
+        key_path = self._key(function_call)
+        if key_path is None:
+            return None
+        key, path = key_path
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        call_no, fp, _ = entry
+        if fingerprint(path) != fp:
+            del self.entries[key]
+            return None
+
+        self.hits += 1
+        target = function_call.args.get(MEMO_TOOLS[function_call.name]) or "."
+        return types.Content(
+            role="tool",
+            parts=[
+                types.Part.from_function_response(
+                    name=function_call.name,
+                    response={
+                        "result": f"[unchanged since call #{call_no}: "
+                        f"{function_call.name} on '{target}' returned the same "
+                        "result, reuse that response]",
+                        "unchanged_since_call": call_no,
+                    },
+                )
+            ],
+        )
+
+    def store(self, function_call, call_no, part):
+        """Remember a successful result, sent to the model as `part`."""
+        response = part.function_response.response
+        if "unchanged_since_call" in (response or {}) or not _is_ok(response):
+            return
+        key_path = self._key(function_call)
+        if key_path is None:
+            return
+        key, path = key_path
+        fp = fingerprint(path)
+        if fp is not None:
+            self.entries[key] = (call_no, fp, part)
+
+    def forget_elided(self, messages, elided):
+        """Drop entries whose response the context manager has elided."""
+        gone = {
+            id(messages[i].parts[j])
+            for i, j in elided
+            if i < len(messages) and j < len(messages[i].parts or [])
+        }
+        self.entries = {k: e for k, e in self.entries.items() if id(e[2]) not in gone}
+
+    def clear(self):
+        """Invalidate everything (after the sandbox was written)."""
+        self.entries.clear()
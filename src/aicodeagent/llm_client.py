@@ -1,12 +1,26 @@
+import asyncio
 import hashlib
 import json
 import os
+import queue
 import sys
+import threading
+import time
+from collections import OrderedDict, deque
 from pathlib import Path
 
-from dotenv import load_dotenv
-from google import genai
-from google.genai import types
+from aicodeagent.lazy_import import LazyModule
+from aicodeagent.rate_limiter import (
+    RateLimiter,
+    RetriesExhausted,
+    backoff_delay,
+    is_throttled,
+    is_transient,
+    server_retry_delay,
+)
+
+# google-genai is only imported once a model object or client is needed
+types = LazyModule("google.genai.types")
 
 
 class LLMClient:
@@ -15,22 +29,65 @@ class LLMClient:
     def complete(self, model: str, messages, config) -> object:
         raise NotImplementedError
 
+    def stream(self, model: str, messages, config):
+        """Yield response chunks. Backends without streaming yield one full response."""
+        yield self.complete(model=model, messages=messages, config=config)
+
+
+class AsyncLLMClient:
+    """Base interface for any asyncio-native LLM backend."""
+
+    async def complete(self, model: str, messages, config) -> object:
+        raise NotImplementedError
+
+
+def _make_genai_client():
+    from dotenv import load_dotenv
+    from google import genai
+
+    # Load environment variables from .env file
+    load_dotenv()
+    api_key = os.getenv("GEMINI_API_KEY")
+
+    # Fail fast if API key is missing
+    if not api_key:
+        print("Missing GEMINI_API_KEY in environment. Aborting.", file=sys.stderr)
+        sys.exit(1)
+
+    # Initialize the official Google GenAI client
+    return genai.Client(api_key=api_key)
+
+
+def merge_part(parts, part):
+    """Append `part` to `parts`, joining it to a trailing text part when both are text."""
+    if part.text and parts and parts[-1].text:
+        parts[-1] = types.Part(text=parts[-1].text + part.text)
+    else:
+        parts.append(part)
+
+
+def merge_chunks(chunks):
+    """Fold streamed chunks into one GenerateContentResponse (usage from the last chunk)."""
+    parts = []
+    usage = None
+    for chunk in chunks:
+        usage = chunk.usage_metadata or usage
+        if not chunk.candidates or not chunk.candidates[0].content:
+            continue
+        for p in chunk.candidates[0].content.parts or []:
+            merge_part(parts, p)
+
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role="model", parts=parts))],
+        usage_metadata=usage,
+    )
+
 
 class RealLLMClient(LLMClient):
     """Uses the real Gemini API."""
 
     def __init__(self):
-        # Load environment variables from .env file
-        load_dotenv()
-        api_key = os.getenv("GEMINI_API_KEY")
-
-        # Fail fast if API key is missing
-        if not api_key:
-            print("Missing GEMINI_API_KEY in environment. Aborting.", file=sys.stderr)
-            sys.exit(1)
-
-        # Initialize the official Google GenAI client
-        self.client = genai.Client(api_key=api_key)
+        self.client = _make_genai_client()
 
     def complete(self, model: str, messages, config) -> object:
         """Perform a real API call and return the raw response object."""
@@ -38,31 +95,84 @@ class RealLLMClient(LLMClient):
             model=model, contents=messages, config=config
         )
 
+    def stream(self, model: str, messages, config):
+        """Yield response chunks as the API produces them."""
+        yield from self.client.models.generate_content_stream(
+            model=model, contents=messages, config=config
+        )
+
 
 class FileLLMClient(LLMClient):
-    """Mock LLM backend that simulates responses from local JSON files."""
+    """
+    Mock LLM backend that simulates responses from local JSON files.
+
+    The canned directory is indexed once at construction and decoded responses
+    are kept in memory. Prompt hashing is incremental: the SHA1 state after each
+    message is remembered, so a growing history only hashes the new messages.
+    """
 
-    def __init__(self, canned_dir: Path):
+    def __init__(self, canned_dir: Path, chunk_delay: float = 0.0, chunk_chars=32):
         # Directory where canned responses are stored
-        self.canned_dir = Path(canned_dir)
+        self.canned_dir = Path(canned_dir).resolve()
+        # Streaming replay: pause between chunks and text slice size
+        self.chunk_delay = chunk_delay
+        self.chunk_chars = chunk_chars
 
-    def _hash_prompt(self, messages) -> str:
-        """Compute SHA1 hash exactly like save_canned.py."""
+        # hash -> canned file path, built with a single directory scan
+        self._index = {
+            p.stem[len("response_") :]: p
+            for p in self.canned_dir.glob("response_*.json")
+        }
+        # hash -> decoded response (or list of chunks for canned streams)
+        self._decoded = {}
+        # Rolling hash per conversation (keyed by its first message object):
+        # messages already hashed and the SHA1 state after each one
+        self._rolling = OrderedDict()
+
+    @staticmethod
+    def _message_bytes(m) -> bytes:
         concat = ""
-        for m in messages:
-            if hasattr(m, "role") and m.role:
-                concat += m.role
-            if hasattr(m, "parts"):
-                for p in m.parts:
-                    t = getattr(p, "text", None)
-                    if t:
-                        concat += t
-        return hashlib.sha1(concat.encode("utf-8")).hexdigest()
+        if hasattr(m, "role") and m.role:
+            concat += m.role
+        if hasattr(m, "parts"):
+            for p in m.parts:
+                t = getattr(p, "text", None)
+                if t:
+                    concat += t
+        return concat.encode("utf-8")
 
-    def complete(self, model: str, messages, config) -> object:
+    def _hash_prompt(self, messages) -> str:
+        """Compute SHA1 hash exactly like save_canned.py, reusing the shared prefix."""
+        # The list itself may be rebuilt every turn (context compaction)
+        key = id(messages[0]) if messages else None
+        hashed_msgs, states = self._rolling.pop(key, ([], [hashlib.sha1()]))
+        self._rolling[key] = (hashed_msgs, states)
+        # Bound memory when many conversations share one client
+        while len(self._rolling) > 64:
+            self._rolling.popitem(last=False)
+
+        # Longest prefix made of the very same message objects already hashed
+        n = 0
+        limit = min(len(messages), len(hashed_msgs))
+        while n < limit and messages[n] is hashed_msgs[n]:
+            n += 1
+        del hashed_msgs[n:]
+        del states[n + 1 :]
+
+        for m in messages[n:]:
+            h = states[-1].copy()
+            h.update(self._message_bytes(m))
+            hashed_msgs.append(m)
+            states.append(h)
+        return states[-1].hexdigest()
 
+    def _lookup(self, messages):
         h = self._hash_prompt(messages)
-        path = (self.canned_dir / f"response_{h}.json").resolve()
+        decoded = self._decoded.get(h)
+        if decoded is not None:
+            return decoded
+
+        path = self._index.get(h) or self.canned_dir / f"response_{h}.json"
         print(f"[FileLLMClient] loading {path}")
         if not path.exists():
             print("not exist")
@@ -71,5 +181,637 @@ class FileLLMClient(LLMClient):
         with open(path, "r", encoding="utf-8") as f:
             data = json.load(f)
 
-        resp = types.GenerateContentResponse.model_validate(data)
+        # A JSON list is a canned stream: one response per chunk
+        if isinstance(data, list):
+            decoded = [types.GenerateContentResponse.model_validate(c) for c in data]
+        else:
+            decoded = types.GenerateContentResponse.model_validate(data)
+        self._index[h] = path
+        self._decoded[h] = decoded
+        return decoded
+
+    def complete(self, model: str, messages, config) -> object:
+        resp = self._lookup(messages)
+        # A canned stream is folded back into one response
+        if isinstance(resp, list):
+            return merge_chunks(resp)
         return resp
+
+    def stream(self, model: str, messages, config):
+        """
+        Replay a canned response as chunks, sleeping `chunk_delay` between them.
+        A JSON list is replayed chunk by chunk; a single response is split into
+        text slices of `chunk_chars` and one chunk per function call.
+        """
+        resp = self._lookup(messages)
+        chunks = resp if isinstance(resp, list) else self._split(resp)
+
+        for i, chunk in enumerate(chunks):
+            if i and self.chunk_delay:
+                time.sleep(self.chunk_delay)
+            yield chunk
+
+    def _split(self, resp):
+        content = resp.candidates[0].content if resp.candidates else None
+        parts = []
+        for p in (content.parts if content else None) or []:
+            if p.text:
+                for i in range(0, len(p.text), self.chunk_chars):
+                    parts.append(types.Part(text=p.text[i : i + self.chunk_chars]))
+            else:
+                parts.append(p)
+
+        if not parts:
+            return [resp]
+
+        chunks = [
+            types.GenerateContentResponse(
+                candidates=[
+                    types.Candidate(content=types.Content(role="model", parts=[p]))
+                ]
+            )
+            for p in parts
+        ]
+        # Usage metadata travels with the last chunk, like the real API
+        chunks[-1].usage_metadata = resp.usage_metadata
+        return chunks
+
+
+class AsyncRealLLMClient(AsyncLLMClient):
+    """Uses the real Gemini API through the async (`client.aio`) surface."""
+
+    def __init__(self):
+        self.client = _make_genai_client()
+
+    async def complete(self, model: str, messages, config) -> object:
+        """Perform a non-blocking API call and return the raw response object."""
+        return await self.client.aio.models.generate_content(
+            model=model, contents=messages, config=config
+        )
+
+
+class AsyncFileLLMClient(AsyncLLMClient):
+    """Async mock backend over canned JSON files, with optional injected latency."""
+
+    def __init__(self, canned_dir: Path, latency: float = 0.0):
+        self.file_client = FileLLMClient(canned_dir)
+        # Seconds to wait before answering (simulates network round trip)
+        self.latency = latency
+
+    async def complete(self, model: str, messages, config) -> object:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self.file_client.complete(model, messages, config)
+
+
+class CachingLLMClient(LLMClient):
+    """
+    Content-addressed on-disk response cache around any `LLMClient`.
+
+    The key hashes the model id, the full `messages` list (text, function_call
+    and function_response parts) and the config (system prompt + tools).
+    Entries live as `<key>.json` under `cache_dir`; once the total size passes
+    `max_bytes` the least recently used entries are evicted.
+    """
+
+    def __init__(self, inner: LLMClient, cache_dir: Path, max_bytes=256 * 1024**2):
+        self.inner = inner
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # LRU index (oldest first) rebuilt from file mtimes, which hits refresh
+        entries = []
+        for path in self.cache_dir.glob("*.json"):
+            st = path.stat()
+            entries.append((st.st_mtime, path.stem, st.st_size))
+        self._index = OrderedDict((k, size) for _, k, size in sorted(entries))
+        self._total = sum(self._index.values())
+
+    @staticmethod
+    def cache_key(model: str, messages, config) -> str:
+        """SHA-256 over a canonical JSON dump of model, messages and config."""
+
+        def dump(obj):
+            if hasattr(obj, "model_dump"):
+                return obj.model_dump(mode="json", exclude_none=True)
+            return obj
+
+        payload = json.dumps(
+            [model, [dump(m) for m in messages], dump(config)],
+            sort_keys=True,
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._index),
+            "bytes": self._total,
+        }
+
+    def _get(self, key):
+        if key not in self._index:
+            return None
+        path = self.cache_dir / f"{key}.json"
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            os.utime(path)
+        except (OSError, json.JSONDecodeError):
+            # Evicted by another process or partially written: treat as a miss
+            self._total -= self._index.pop(key)
+            return None
+        self._index.move_to_end(key)
+        return types.GenerateContentResponse.model_validate(data)
+
+    def _put(self, key, response):
+        raw = json.dumps(
+            response.model_dump(mode="json", exclude_none=True), ensure_ascii=False
+        ).encode("utf-8")
+        if len(raw) > self.max_bytes:
+            return
+
+        # Atomic write so concurrent agents never read half an entry
+        path = self.cache_dir / f"{key}.json"
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(raw)
+        os.replace(tmp, path)
+
+        self._total -= self._index.pop(key, 0)
+        self._index[key] = len(raw)
+        self._total += len(raw)
+
+        while self._total > self.max_bytes and self._index:
+            old_key, size = self._index.popitem(last=False)
+            self._total -= size
+            self.evictions += 1
+            try:
+                os.remove(self.cache_dir / f"{old_key}.json")
+            except FileNotFoundError:
+                pass
+
+    def complete(self, model: str, messages, config) -> object:
+        key = self.cache_key(model, messages, config)
+        cached = self._get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        response = self.inner.complete(model=model, messages=messages, config=config)
+        self._put(key, response)
+        return response
+
+    def stream(self, model: str, messages, config):
+        key = self.cache_key(model, messages, config)
+        cached = self._get(key)
+        if cached is not None:
+            self.hits += 1
+            yield cached
+            return
+
+        self.misses += 1
+        chunks = []
+        for chunk in self.inner.stream(model=model, messages=messages, config=config):
+            chunks.append(chunk)
+            yield chunk
+        self._put(key, merge_chunks(chunks))
+
+
+class RateLimitedLLMClient(LLMClient):
+    """
+    Paces calls through a `RateLimiter` and retries transient errors
+    (429 / 503) with jittered exponential backoff, honouring server retry delays.
+    Raises `RetriesExhausted` once `max_retries` or `max_wait` seconds are spent.
+    """
+
+    def __init__(
+        self,
+        inner: LLMClient,
+        limiter: RateLimiter | None = None,
+        max_retries=5,
+        max_wait=180.0,
+        sleep=time.sleep,
+    ):
+        self.inner = inner
+        self.limiter = limiter or RateLimiter()
+        self.max_retries = max_retries
+        self.max_wait = max_wait
+        self.sleep = sleep
+        # Retries spent on the most recent call, and since creation (run ledger)
+        self.last_retries = 0
+        self.total_retries = 0
+
+    def _retry_delay(self, e, attempt, slept):
+        """Record the failure; return the backoff delay, or raise when out of budget."""
+        retry_after = server_retry_delay(e)
+        if is_throttled(e):
+            self.limiter.on_throttle(retry_after)
+        delay = backoff_delay(attempt, retry_after)
+        if attempt >= self.max_retries or slept + delay > self.max_wait:
+            raise RetriesExhausted(e, attempt + 1) from e
+        print(f"[rate limit] transient error, retry {attempt + 1} in {delay:.1f}s")
+        return delay
+
+    def complete(self, model: str, messages, config) -> object:
+        slept = 0.0
+        attempt = 0
+        while True:
+            self.limiter.acquire()
+            try:
+                response = self.inner.complete(
+                    model=model, messages=messages, config=config
+                )
+            except Exception as e:
+                if not is_transient(e):
+                    raise
+                delay = self._retry_delay(e, attempt, slept)
+                self.sleep(delay)
+                slept += delay
+                attempt += 1
+                self.last_retries = attempt
+                self.total_retries += 1
+                continue
+            self.limiter.on_success()
+            self.last_retries = attempt
+            return response
+
+    def stream(self, model: str, messages, config):
+        """Retry only while no chunk has been yielded; later errors propagate."""
+        slept = 0.0
+        attempt = 0
+        while True:
+            self.limiter.acquire()
+            started = False
+            try:
+                for chunk in self.inner.stream(
+                    model=model, messages=messages, config=config
+                ):
+                    started = True
+                    yield chunk
+            except Exception as e:
+                if started or not is_transient(e):
+                    raise
+                delay = self._retry_delay(e, attempt, slept)
+                self.sleep(delay)
+                slept += delay
+                attempt += 1
+                self.last_retries = attempt
+                self.total_retries += 1
+                continue
+            self.limiter.on_success()
+            self.last_retries = attempt
+            return
+
+
+class ContextCachingLLMClient(LLMClient):
+    """
+    Uploads the stable request prefix once as a server-side cached content.
+
+    The prefix is the system instruction, the tool declarations and any leading
+    PREV_RUN_JSON user message. Later calls send only the remaining messages
+    plus the `cached_content` handle. The handle's TTL is refreshed when it is
+    about to expire, and a new handle replaces the old one whenever the prefix
+    changes. Prefixes below `min_prefix_tokens`, or rejected by the server, go
+    through uncached. Call `close()` at the end of the run to delete the handle.
+    """
+
+    PREV_RUN_PREFIX = "PREV_RUN_JSON"
+
+    def __init__(
+        self,
+        inner: LLMClient,
+        caches,
+        ttl=3600,
+        min_prefix_tokens=4096,
+        refresh_margin=60,
+        clock=time.time,
+    ):
+        self.inner = inner
+        # Object exposing create/update/delete like `genai.Client().caches`
+        self.caches = caches
+        self.ttl = ttl
+        self.min_prefix_tokens = min_prefix_tokens
+        self.refresh_margin = refresh_margin
+        self.clock = clock
+        self._handle = None
+        self._rejected = set()
+        self.created = 0
+        self.refreshed = 0
+        self.reused = 0
+
+    def _prefix_len(self, messages):
+        n = 0
+        for m in messages[:-1]:
+            text = "".join(p.text or "" for p in m.parts or [])
+            if m.role != "user" or not text.startswith(self.PREV_RUN_PREFIX):
+                break
+            n += 1
+        return n
+
+    def _ensure_handle(self, model, prefix, config, fingerprint):
+        now = self.clock()
+        handle = self._handle
+        if handle and handle["fingerprint"] == fingerprint:
+            if now < handle["expires"] - self.refresh_margin:
+                self.reused += 1
+                return handle["name"]
+            try:
+                self.caches.update(
+                    name=handle["name"],
+                    config=types.UpdateCachedContentConfig(ttl=f"{self.ttl}s"),
+                )
+                handle["expires"] = now + self.ttl
+                self.refreshed += 1
+                return handle["name"]
+            except Exception as e:
+                print(f"[context cache] refresh failed, recreating: {e}")
+
+        # Prefix changed (or handle lost): invalidate before creating a new one
+        self.close()
+        if fingerprint in self._rejected:
+            return None
+        try:
+            cached = self.caches.create(
+                model=model,
+                config=types.CreateCachedContentConfig(
+                    contents=prefix or None,
+                    system_instruction=config.system_instruction,
+                    tools=config.tools,
+                    tool_config=config.tool_config,
+                    ttl=f"{self.ttl}s",
+                ),
+            )
+        except Exception as e:
+            print(f"[context cache] prefix not cached: {e}")
+            self._rejected.add(fingerprint)
+            return None
+
+        self._handle = {
+            "name": cached.name,
+            "fingerprint": fingerprint,
+            "expires": now + self.ttl,
+        }
+        self.created += 1
+        return cached.name
+
+    def _prepare(self, model, messages, config):
+        """Return (messages, config) for the inner call, using a cache handle if possible."""
+        if config is None or config.cached_content:
+            return messages, config
+
+        n = self._prefix_len(messages)
+        prefix = list(messages[:n])
+        stable = types.GenerateContentConfig(
+            system_instruction=config.system_instruction,
+            tools=config.tools,
+            tool_config=config.tool_config,
+        )
+        fingerprint = CachingLLMClient.cache_key(model, prefix, stable)
+        size = len(json.dumps([m.model_dump(mode="json") for m in prefix]))
+        size += len(json.dumps(stable.model_dump(mode="json", exclude_none=True)))
+        if size // 4 < self.min_prefix_tokens:
+            return messages, config
+
+        name = self._ensure_handle(model, prefix, config, fingerprint)
+        if not name:
+            return messages, config
+        cached_config = config.model_copy(
+            update={
+                "system_instruction": None,
+                "tools": None,
+                "tool_config": None,
+                "cached_content": name,
+            }
+        )
+        return messages[n:], cached_config
+
+    def complete(self, model: str, messages, config) -> object:
+        messages, config = self._prepare(model, messages, config)
+        return self.inner.complete(model=model, messages=messages, config=config)
+
+    def stream(self, model: str, messages, config):
+        messages, config = self._prepare(model, messages, config)
+        yield from self.inner.stream(model=model, messages=messages, config=config)
+
+    def close(self):
+        """Delete the current cached content handle, if any."""
+        if self._handle:
+            try:
+                self.caches.delete(name=self._handle["name"])
+            except Exception:
+                pass  # Expires on its own after the TTL
+            self._handle = None
+
+
+class HedgePolicy:
+    """
+    When to send a hedge (duplicate) request, and how often hedging paid off.
+
+    - The hedge delay is the `percentile` of the last `window` observed call
+      latencies; no hedging until `min_samples` latencies have been seen.
+    - Hedges are capped at `max_extra` times the number of calls (0.1 means at
+      most 10% extra request volume).
+    """
+
+    def __init__(self, percentile=0.95, window=100, min_samples=10, max_extra=0.1):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.max_extra = max_extra
+        self.latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.over_budget = 0
+
+    def start(self):
+        with self._lock:
+            self.calls += 1
+
+    def delay(self) -> float | None:
+        """Seconds to wait before hedging the current call, or None to not hedge."""
+        with self._lock:
+            if len(self.latencies) < self.min_samples:
+                return None
+            ordered = sorted(self.latencies)
+            idx = min(len(ordered) - 1, int(self.percentile * len(ordered)))
+            return ordered[idx]
+
+    def try_hedge(self) -> bool:
+        with self._lock:
+            if self.hedged + 1 > self.max_extra * self.calls:
+                self.over_budget += 1
+                return False
+            self.hedged += 1
+            return True
+
+    def done(self, latency, hedge_won=False):
+        with self._lock:
+            self.latencies.append(latency)
+            if hedge_won:
+                self.hedge_wins += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "hedged": self.hedged,
+                "hedge_wins": self.hedge_wins,
+                "over_budget": self.over_budget,
+            }
+
+
+class HedgedLLMClient(LLMClient):
+    """
+    Cuts tail latency by racing a duplicate request against a slow one.
+
+    If `complete` has not returned after the policy's percentile latency, the
+    same request is sent again and the first successful answer wins. Calls run
+    on daemon threads: the loser cannot be interrupted mid-request, so its
+    result is discarded and it never delays shutdown. `stream` is not hedged.
+    """
+
+    def __init__(self, inner: LLMClient, policy: HedgePolicy | None = None):
+        self.inner = inner
+        self.policy = policy or HedgePolicy()
+
+    def _submit(self, model, messages, config, results):
+        """Start one attempt; its (worker, response, error) lands on `results`."""
+
+        def run():
+            try:
+                response = self.inner.complete(model, messages, config)
+                results.put((worker, response, None))
+            except Exception as e:
+                results.put((worker, None, e))
+
+        worker = threading.Thread(target=run, daemon=True)
+        worker.start()
+        return worker
+
+    def complete(self, model: str, messages, config) -> object:
+        self.policy.start()
+        started = time.perf_counter()
+        results = queue.Queue()
+        primary = self._submit(model, messages, config, results)
+        pending = {primary}
+
+        delay = self.policy.delay()
+        try:
+            first = results.get(timeout=delay) if delay is not None else results.get()
+        except queue.Empty:
+            first = None
+            if self.policy.try_hedge():
+                pending.add(self._submit(model, messages, config, results))
+
+        error = None
+        while True:
+            if first is None:
+                first = results.get()
+            worker, response, e = first
+            pending.discard(worker)
+            if e is None:
+                self.policy.done(
+                    time.perf_counter() - started, hedge_won=worker is not primary
+                )
+                return response
+            # One attempt failed: fall back to the other one if it is still running
+            error = error or e
+            if not pending:
+                raise error
+            first = None
+
+    def stats(self) -> dict:
+        return self.policy.stats()
+
+    def stream(self, model: str, messages, config):
+        yield from self.inner.stream(model=model, messages=messages, config=config)
+
+
+class AsyncHedgedLLMClient(AsyncLLMClient):
+    """asyncio twin of `HedgedLLMClient`; here the losing request is cancelled."""
+
+    def __init__(self, inner: AsyncLLMClient, policy: HedgePolicy | None = None):
+        self.inner = inner
+        self.policy = policy or HedgePolicy()
+
+    async def complete(self, model: str, messages, config) -> object:
+        self.policy.start()
+        started = time.perf_counter()
+        primary = asyncio.ensure_future(self.inner.complete(model, messages, config))
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=self.policy.delay())
+            if not done and self.policy.try_hedge():
+                pending.add(
+                    asyncio.ensure_future(self.inner.complete(model, messages, config))
+                )
+
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        self.policy.done(
+                            time.perf_counter() - started,
+                            hedge_won=task is not primary,
+                        )
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> dict:
+        return self.policy.stats()
+
+
+def find_client(llm, cls):
+    """First client of type `cls` in the `.inner` wrapper chain, if any."""
+    while llm is not None and not isinstance(llm, cls):
+        llm = getattr(llm, "inner", None)
+    return llm
+
+
+def build_llm_client(
+    offline=False,
+    canned_dir=None,
+    rpm=15,
+    rate_state_path=None,
+    hedge=None,
+    context_cache=True,
+    cache_dir=None,
+):
+    """
+    Assemble the client stack used by the CLI:
+    backend -> rate limiter -> hedging -> context cache -> response cache.
+    """
+    if offline:
+        llm = FileLLMClient(canned_dir=canned_dir)
+    else:
+        # Token bucket state is shared across processes through a lock file
+        limiter = RateLimiter(rpm=rpm, state_path=rate_state_path)
+        real = RealLLMClient()
+        llm = RateLimitedLLMClient(real, limiter)
+        if hedge:
+            # Each hedge goes through the limiter like any other request
+            llm = HedgedLLMClient(llm, HedgePolicy(percentile=hedge))
+        if context_cache:
+            llm = ContextCachingLLMClient(llm, real.client.caches)
+
+    if cache_dir:
+        llm = CachingLLMClient(llm, cache_dir)
+    return llm
@@ -1,16 +1,9 @@
 # ---- IMPORTS & INTERNALS -----------------------------------------------------
 import argparse
-import json
-import shutil
 import sys
-import time
 from pathlib import Path
 
-from aicodeagent.functions.core.save_run_info import save_run_info
 from aicodeagent.functions.fs.get_project_root import get_project_root
-from aicodeagent.functions.pipeline.options import PipelineOptions
-from aicodeagent.llm_client import FileLLMClient, RealLLMClient
-from aicodeagent.pipeline import run_pipeline
 
 # ---- CLI ARGS PARSING --------------------------------------------------------
 # - CLI parser for user prompt and debug flags
@@ -37,6 +30,65 @@ parser.add_argument("--demo", action="store_true", help="Access to bugged demo f
 
 parser.add_argument("--offline", action="store_true", help="Use canned llm")
 
+parser.add_argument(
+    "--stream",
+    action="store_true",
+    help="Stream model output and dispatch tool calls as they arrive",
+)
+
+parser.add_argument(
+    "--rpm",
+    type=int,
+    default=15,
+    help="Requests-per-minute ceiling shared by all agents on this output root",
+)
+
+parser.add_argument(
+    "--hedge",
+    type=float,
+    metavar="PCT",
+    help="Send a duplicate request when a call is slower than this latency "
+    "percentile (e.g. 0.95); extra requests are capped at 10%% of calls",
+)
+
+parser.add_argument(
+    "--context-budget",
+    type=int,
+    default=32000,
+    help="Estimated token budget for the history sent to the model on each call",
+)
+
+parser.add_argument(
+    "--no-context-cache",
+    action="store_true",
+    help="Do not upload the system prompt/tools/previous-run prefix as cached content",
+)
+
+parser.add_argument(
+    "--tool-workers",
+    type=int,
+    default=4,
+    help="Read-only tool calls of one model turn run concurrently on this many threads",
+)
+
+parser.add_argument(
+    "--parallel-run-python",
+    action="store_true",
+    help="Also run run_python_file calls of one turn concurrently",
+)
+
+parser.add_argument(
+    "--no-tool-memo",
+    action="store_true",
+    help="Always re-run repeated file reads/listings, even on unchanged files",
+)
+
+parser.add_argument(
+    "--cache",
+    action="store_true",
+    help="Reuse LLM responses cached under __ai_outputs__/llm_cache",
+)
+
 args = parser.parse_args()
 
 # Validate user input (stderr + non-zero exit code)
@@ -44,11 +96,27 @@ if not args.prompt:
     print("No prompt provided", file=sys.stderr)
     sys.exit(1)
 
-if args.offline:
-    p = Path("tests/integration/data/canned_llm")
-    llm = FileLLMClient(canned_dir=p)
-else:
-    llm = RealLLMClient()
+# ---- PIPELINE IMPORTS ----------------------------------------------------------
+# Deferred until the arguments are valid: `--help` and usage errors stay instant
+from aicodeagent.functions.pipeline.options import PipelineOptions  # noqa: E402
+from aicodeagent.functions.pipeline.persist_run import persist_run  # noqa: E402
+from aicodeagent.llm_client import (  # noqa: E402
+    ContextCachingLLMClient,
+    HedgedLLMClient,
+    build_llm_client,
+    find_client,
+)
+from aicodeagent.pipeline import run_pipeline  # noqa: E402
+
+llm = build_llm_client(
+    offline=args.offline,
+    canned_dir=Path("tests/integration/data/canned_llm"),
+    rpm=args.rpm,
+    rate_state_path=str(Path("__ai_outputs__") / "rate_limit.json"),
+    hedge=args.hedge,
+    context_cache=not args.no_context_cache,
+    cache_dir=Path("__ai_outputs__") / "llm_cache" if args.cache else None,
+)
 
 # ---- USER PROMPT & OPTIONS & PATH-----------------------------------------------------
 user_prompt = args.prompt
@@ -58,96 +126,28 @@ options = PipelineOptions(
     I_O=args.I_O,
     reset=args.reset,
     demo=args.demo,
+    stream=args.stream,
+    context_budget=args.context_budget,
+    tool_workers=args.tool_workers,
+    parallel_run_python=args.parallel_run_python,
+    memo_tools=not args.no_tool_memo,
 )
 project_root = Path(get_project_root(__file__))
 
 # ---- CALL PIPELINE----------------------------------------------------
 result = run_pipeline(user_prompt, llm, options, project_root)
 
-run_id = result["run_id"]
-messages = result["messages"]
-save_type = result["save_type"]
-extra_data = result["extra_data"]
-prev_summary_path = result["prev_summary_path"]
-proposed_content = result["proposed_content"]
+if args.cache and args.verbose:
+    print(f"[llm cache] {llm.stats()}")
+if args.hedge and args.verbose:
+    print(f"[hedging] {find_client(llm, HedgedLLMClient).stats()}")
+
+# Release the server-side cached prefix (it would otherwise live until its TTL)
+client = find_client(llm, ContextCachingLLMClient)
+if client is not None:
+    client.close()
 
 # ---- PERSIST RUN SUMMARY ------------------------------------------------------
-match save_type:
-
-    case "Default":
-        # Save current run summary normally
-        save_run_info(messages, run_id, extra_data)
-
-    case "Discard_run":
-        # Copy previous summary if available
-        if prev_summary_path:
-            dst_dir = Path("__ai_outputs__") / run_id
-            dst_dir.mkdir(parents=True, exist_ok=True)
-            shutil.copy2(prev_summary_path, dst_dir / "run_summary.json")
-
-    case "Error":
-        # Load previous summary if present
-        base = {}
-        if prev_summary_path and Path(prev_summary_path).exists():
-            try:
-                with open(prev_summary_path, "r", encoding="utf-8") as f:
-                    base = json.load(f) or {}
-            except Exception:
-                base = {}
-
-        # Add this run as error
-        ar = base.setdefault("additional_runs", [])
-        ar.append(
-            {
-                "run_id": run_id,
-                "type": "error",
-                "ts": int(time.time()),
-                "message": "Invalid apply; resume from previous proposals.",
-            }
-        )
-
-        dst_dir = Path("__ai_outputs__") / run_id
-        dst_dir.mkdir(parents=True, exist_ok=True)
-        with open(dst_dir / "run_summary.json", "w", encoding="utf-8") as f:
-            json.dump(base, f, indent=2, ensure_ascii=False)
-
-    case "Additional_run":
-        # Save current run
-        cur_path = save_run_info(messages, run_id, extra_data)
-
-        # Load previous run
-        base_prev = {}
-        if prev_summary_path and Path(prev_summary_path).exists():
-            try:
-                with open(prev_summary_path, "r", encoding="utf-8") as f:
-                    base_prev = json.load(f) or {}
-            except Exception:
-                base_prev = {}
-
-        # Load current run
-        with open(cur_path, "r", encoding="utf-8") as f:
-            cur_summary = json.load(f) or {}
-
-        # Merge two runs
-        merged = {
-            "proposals": base_prev.get("proposals", []),
-            "header": {
-                "run_id": run_id,
-                "ts": time.time(),
-                "mode": "Additional_run",
-            },
-            "previous_summary": base_prev,
-            "current_summary": cur_summary,
-        }
-
-        dst_dir = Path("__ai_outputs__") / run_id
-        dst_dir.mkdir(parents=True, exist_ok=True)
-        with open(dst_dir / "run_summary.json", "w", encoding="utf-8") as f:
-            json.dump(merged, f, indent=2, ensure_ascii=False)
-
-    case "propose_run":
-        # Save proposal run
-        save_run_info(messages, run_id, proposed_content, extra_data)
-
-    case _:
-        raise ValueError(f"Invalid save_type: {save_type!r}")
+persist_run(result)
+if args.verbose:
+    print(f"[usage] {result['usage']}")
@@ -1,23 +1,82 @@
 # ---- IMPORTS & INTERNALS -----------------------------------------------------
+import asyncio
+import json
+import os
 import re
 import shutil
 import sys
 import time
-
-from google.genai import types
+from concurrent.futures import ThreadPoolExecutor
 
 from aicodeagent.functions import functions_schemas as schemas
 from aicodeagent.functions.call_function import call_function
+from aicodeagent.functions.core.interpreter_pool import prewarm_pool
 from aicodeagent.functions.functions_schemas import function_dict
+from aicodeagent.functions.pipeline.checkpoint import Checkpoint
+from aicodeagent.functions.pipeline.compact_context import ContextCompactor
 from aicodeagent.functions.pipeline.emit import emit
-from aicodeagent.functions.pipeline.init_run_session import init_run_session
+from aicodeagent.functions.pipeline.init_run_session import (
+    get_run_dir,
+    init_run_session,
+)
 from aicodeagent.functions.pipeline.prev_proposal import prev_proposal
 from aicodeagent.functions.pipeline.prev_run_summary_path import prev_run_summary_path
-from aicodeagent.llm_client import RealLLMClient
+from aicodeagent.functions.pipeline.run_ledger import RunLedger, client_retries, timed
+from aicodeagent.functions.pipeline.run_state import (
+    CALL_MODEL,
+    DISPATCH,
+    DONE,
+    RunState,
+)
+from aicodeagent.functions.pipeline.tool_memo import ToolMemo
+from aicodeagent.lazy_import import LazyModule
+from aicodeagent.llm_client import AsyncRealLLMClient, RealLLMClient, merge_part
 from aicodeagent.prompts.system_prompt import model, system_prompt
-
-
-def run_pipeline(prompt, llm, options, project_root):
+from aicodeagent.rate_limiter import (
+    RetriesExhausted,
+    backoff_delay,
+    is_throttled,
+    is_transient,
+    server_retry_delay,
+)
+
+types = LazyModule("google.genai.types")
+
+MAX_CYCLES = 16
+# Tools without side effects on the sandbox: safe to run concurrently
+READ_ONLY_TOOLS = (
+    "get_files_info",
+    "get_file_content",
+    "get_files_content",
+    "search_code",
+    "find_symbol",
+    "get_symbol_source",
+)
+# Consecutive transient LLM errors tolerated before the run is stopped
+MAX_TRANSIENT_RETRIES = 3
+
+# If the model is asking for target directory
+PAT_ASK_DIR = re.compile(
+    r"""
+    (specify|which|what|where|indicate|choose|select|target|root
+    |working\s*directory|project\s*root|path|folder|dir|tree|structure
+    |cartella|percorso|quale|dove)
+    .{0,60}
+    (directory|folder|path|root|cartella|percorso|dir)
+""",
+    re.I | re.X,
+)
+
+
+def _base_client(llm):
+    # Wrappers (cache, limiter, ...) expose the wrapped backend as `.inner`
+    while hasattr(llm, "inner"):
+        llm = llm.inner
+    return llm
+
+
+def _init_session(prompt, llm, options, project_root):
+    """Create the run directory, bootstrap messages and build the model config."""
 
     # ---- RUN SESSION INIT --------------------------------------------------------
     # - Create run_id only after validating arguments (avoid empty/garbage runs)
@@ -27,10 +86,12 @@ def run_pipeline(prompt, llm, options, project_root):
     prev_summary_path = prev_run_summary_path(run_id)
     messages = []
     last_prop = None
-    # Variable to save data fed at conclude_edit
-    extra_data = None
 
-    if isinstance(llm, RealLLMClient) and prev_summary_path and not options.reset:
+    if (
+        isinstance(_base_client(llm), (RealLLMClient, AsyncRealLLMClient))
+        and prev_summary_path
+        and not options.reset
+    ):
         prev_context, last_prop = prev_proposal(
             prev_summary_path
         )  # last_prop: file_path, content, run_id, wd
@@ -42,14 +103,45 @@ def run_pipeline(prompt, llm, options, project_root):
 
     messages.append(types.Content(role="user", parts=[types.Part(text=prompt)]))
 
+    # ---- DEMO SANDBOX COPY -------------------------------------------------------
+    if options.demo:
+        demo_src = project_root / "examples/minirepo"
+        demo_dst = project_root / "__demo_sandbox__"
+
+        if demo_dst.exists():
+            shutil.rmtree(demo_dst)
+
+        shutil.copytree(demo_src, demo_dst)
+
+    state = RunState(
+        run_id=run_id,
+        prompt=prompt,
+        config=_build_config(has_prev_proposal=bool(last_prop)),
+        messages=messages,
+        prev_summary_path=prev_summary_path,
+        last_prop=last_prop,
+        compactor=ContextCompactor(budget_tokens=options.context_budget),
+        ledger=RunLedger(run_id),
+        checkpoint=Checkpoint(run_id),
+        tool_pool=_tool_pool(options),
+        memo=ToolMemo() if options.memo_tools else None,
+    )
+    state.checkpoint.session(state, options)
+    return state
+
+
+def _build_config(has_prev_proposal):
     # ---- TOOL DECLARATIONS (FUNCTION SCHEMAS) ------------------------------------
     # - Register available tools for the model: list/read/run/propose/apply
-    has_prev_proposal = bool(last_prop)
-
     fn_decls = [
         schemas.schema_get_files_info,
         schemas.schema_get_file_content,
+        schemas.schema_get_files_content,
+        schemas.schema_search_code,
+        schemas.schema_find_symbol,
+        schemas.schema_get_symbol_source,
         schemas.schema_run_python_file,
+        schemas.schema_run_tests,
         schemas.schema_propose_changes,
     ]
     # Register conclude_edit only if previous proposal is present
@@ -58,413 +150,664 @@ def run_pipeline(prompt, llm, options, project_root):
 
     available_functions = types.Tool(function_declarations=fn_decls)
 
-    # ---- DEMO SANDBOX COPY -------------------------------------------------------
-    if options.demo:
-        demo_src = project_root / "examples/minirepo"
-        demo_dst = project_root / "__demo_sandbox__"
+    # ---- SYSTEM PROMPT & MODEL CONFIG -------------------------------------------
+    return types.GenerateContentConfig(
+        tools=[available_functions], system_instruction=system_prompt
+    )
 
-        if demo_dst.exists():
-            shutil.rmtree(demo_dst)
 
-        shutil.copytree(demo_src, demo_dst)
+def _tool_pool(options):
+    if options.tool_workers > 1:
+        return ThreadPoolExecutor(options.tool_workers, thread_name_prefix="tool")
+    return None
+
+
+def resume_session(checkpoint, llm, options):
+    """
+    Rebuild the RunState of an interrupted run from `load_checkpoint` output,
+    as of its last committed turn. A model response whose tools were cut short
+    is dispatched again without querying the model: results journaled before
+    the crash are replayed, the remaining calls run.
+    """
+    session, turn = checkpoint["session"], checkpoint["turn"]
+    run_id = session["run_id"]
+    state = RunState(
+        run_id=run_id,
+        prompt=session["prompt"],
+        config=_build_config(has_prev_proposal=bool(session["last_prop"])),
+        messages=checkpoint["messages"],
+        prev_summary_path=session["prev_summary_path"],
+        last_prop=session["last_prop"],
+        compactor=ContextCompactor(budget_tokens=options.context_budget),
+        ledger=RunLedger(run_id, resume=True),
+        checkpoint=Checkpoint(run_id, n_messages=len(checkpoint["messages"])),
+        tool_pool=_tool_pool(options),
+        memo=ToolMemo() if options.memo_tools else None,
+    )
+    if turn:
+        state.cycle_number = turn["cycle"]
+        state.phase = turn["phase"]
+        state.run_stats = turn["run_stats"]
+        state.transient_streak = turn["transient_streak"]
+        state.save_type = turn["save_type"]
+        state.extra_data = turn["extra_data"]
+        state.proposed_content = turn["proposed_content"]
+    if checkpoint["pending"] is not None:
+        state.cycle_number = checkpoint["pending_cycle"]
+        state.pending_response = checkpoint["pending"]
+        state.replay = dict(checkpoint["replay"])
+        state.phase = DISPATCH
+    return state
+
+
+def _context_for_call(state):
+    """
+    Compact the history for the next model call and record what was dropped
+    in <run_dir>/context_compaction.jsonl.
+    """
+    messages, dropped = state.compactor.compact(state.messages)
+    if dropped:
+        log_path = os.path.join(get_run_dir(state.run_id), "context_compaction.jsonl")
+        with open(log_path, "a", encoding="utf-8") as f:
+            for rec in dropped:
+                rec = {"cycle": state.cycle_number, **rec}
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        if state.memo is not None:
+            state.memo.forget_elided(state.messages, state.compactor.elided)
+    return messages
+
+
+def _start_call(state, llm):
+    """Snapshot the counters a ledger entry is computed against."""
+    state.last_usage = None
+    return {
+        "latency_s": 0.0,
+        "retries": client_retries(llm),
+        "tool_calls": state.run_stats["tool_calls"],
+    }
 
-    # ---- GUARDS & TRACKERS INIT -------------------------------
-    proposed_content = None
 
-    run_save = {
-        "save_type": "Default",
-    }
+def _record_call(state, llm, meter, error=None):
+    """Append one model call (usage, latency, retries, tool calls) to the run ledger."""
+    state.ledger.record(
+        state.cycle_number,
+        usage=state.last_usage,
+        latency_s=meter["latency_s"],
+        retries=client_retries(llm) - meter["retries"],
+        tool_calls=state.run_stats["tool_calls"] - meter["tool_calls"],
+        error=error,
+    )
 
-    run_stats = {
-        "tool_calls": 0,
-        "text_only": False,
-        "propose_ok": 0,
-        "apply_ok": 0,
-        "file_info_blox": 0,
-        "read_ok": 0,
-        "transient_err": 0,
-    }
 
-    # ---- SYSTEM PROMPT & MODEL CONFIG -------------------------------------------
+def _print_last_messages(state, options):
+    print(f"--------------- Iteration #{state.cycle_number} ----------------")
+    if options.I_O:
+        print("\n--- LAST MESSAGES ---")
+        for m in state.messages[-3:]:
+            print(f"[{m.role}] →", end=" ")
+            for part in m.parts:
+                if hasattr(part, "text") and part.text:
+                    print(part.text)
+                elif hasattr(part, "function_call") and part.function_call:
+                    print(
+                        f"[FunctionCall] {part.function_call.name} {part.function_call.args}"
+                    )
+                else:
+                    print(part)
 
-    config = types.GenerateContentConfig(
-        tools=[available_functions], system_instruction=system_prompt
-    )
 
-    # ---- MAIN LOOP (ITERATIVE DRIVER) -------------------------------------------
-    cycle_number = 0
-    while cycle_number <= 15:  # runs up to 16 iters (0..15)
-        cycle_number += 1
-        try:
-            # ---- MODEL CALL & OPTIONAL DEBUG DUMP --------------------------------
-            print(f"--------------- Iteration #{cycle_number} ----------------")
-            if options.I_O:
-                print("\n--- LAST MESSAGES ---")
-                for m in messages[-3:]:
-                    print(f"[{m.role}] →", end=" ")
-                    for part in m.parts:
-                        if hasattr(part, "text") and part.text:
-                            print(part.text)
-                        elif hasattr(part, "function_call") and part.function_call:
-                            print(
-                                f"[FunctionCall] {part.function_call.name} {part.function_call.args}"
-                            )
-                        else:
-                            print(part)
-            try:
-                response = llm.complete(model=model, messages=messages, config=config)
-            except FileNotFoundError as e:
-                print("Error llm call", e)
-                break
+def _prepare_function_call(state, part, function_response_list, options, project_root):
+    """
+    Run guards and normalize args of one function_call part.
+    Returns the FunctionCall to dispatch, or None when a guard tripped (its
+    payload is appended to `function_response_list`) and the turn must stop.
+    """
+    run_stats = state.run_stats
 
-            # ---- APPEND MODEL MESSAGE & INIT LOOP FLAGS --------------------------
-            # Add model response to the message stream for the next turn
-            messages.append(response.candidates[0].content)
+    # Extract the function call and arguments
+    function_call_part = types.FunctionCall(
+        name=part.function_call.name, args=part.function_call.args
+    )
+    name = function_call_part.name
+
+    # ---- PRE-CHECK ------------------
+    # 1) Only text response after a proposal
+    if run_stats.get("propose_ok", 0) >= 1:
+        emit(
+            "propose_changes",
+            "throttled",
+            "duplicate_proposal_this_run",
+            [
+                "Reply with TEXT ONLY. Summarize the proposed edit in 3 bullets.",
+                "Ask: 'Approve apply in next run?'",
+            ],
+            options.I_O,
+            function_response_list,
+        )
+        return None
+
+    # 2) Deny apply in same run as a proposal (enforce two-step)
+    if name == "conclude_edit" and run_stats.get("propose_ok", 0) >= 1:
+        emit(
+            "conclude_edit",
+            "apply_denied",
+            "same_run_apply_not_allowed",
+            [
+                "Summarize the proposed edits in 3 bullet points and ask for user approval.",
+                "End the run. In the next run, call conclude_edit with no arguments.",
+            ],
+            options.I_O,
+            function_response_list,
+        )
+        return None
+
+    # 3) Deny repeated apply in same run
+    if name == "conclude_edit" and run_stats.get("apply_ok", 0) >= 1:
+        emit(
+            "conclude_edit",
+            "apply_denied",
+            "duplicate_apply_this_run",
+            [
+                "Do not call conclude_edit again in this run.",
+                "Ask whether further changes or a new proposal cycle are needed.",
+            ],
+            options.I_O,
+            function_response_list,
+        )
+        return None
+    # -------------------------------------------------------
 
-            # Control flags for this iteration
-            only_text_response = True
+    # ---- NORMALIZE ARGS & DISPATCH --------------------------------------
+    if options.I_O:
+        print(f"function arguments -> {function_call_part.args}")
 
-            # Collect tool responses (to be appended as a single 'tool' message)
-            function_response_list = []
-            stop_after_tool = False
-            # ---- HANDLER: FUNCTION CALL PARTS THROTTLE ------------------------
-            # Loop over each LLM response part (text + single/multi function calls)
-            for part in response.candidates[0].content.parts:
-                if stop_after_tool:
-                    pass
+    # snapshot raw LLM args
+    function_call_part.args["function_args"] = dict(function_call_part.args)
 
-                if part.function_call:
-                    # Extract the function call and arguments
-                    function_call_part = types.FunctionCall(
-                        name=part.function_call.name, args=part.function_call.args
-                    )
-                    name = function_call_part.name
-
-                    # ---- PRE-CHECK ------------------
-                    # 1) Only text response after a proposal
-                    if run_stats.get("propose_ok", 0) >= 1:
-                        emit(
-                            "propose_changes",
-                            "throttled",
-                            "duplicate_proposal_this_run",
-                            [
-                                "Reply with TEXT ONLY. Summarize the proposed edit in 3 bullets.",
-                                "Ask: 'Approve apply in next run?'",
-                            ],
-                            options.I_O,
-                            function_response_list,
-                        )
-                        only_text_response = False
-                        stop_after_tool = True
-                        break
-
-                    # 2) Deny apply in same run as a proposal (enforce two-step)
-                    if name == "conclude_edit" and run_stats.get("propose_ok", 0) >= 1:
-                        emit(
-                            "conclude_edit",
-                            "apply_denied",
-                            "same_run_apply_not_allowed",
-                            [
-                                "Summarize the proposed edits in 3 bullet points and ask for user approval.",
-                                "End the run. In the next run, call conclude_edit with no arguments.",
-                            ],
-                            options.I_O,
-                            function_response_list,
-                        )
-                        only_text_response = False
-                        stop_after_tool = True
-                        break
-
-                    # 3) Deny repeated apply in same run
-                    if name == "conclude_edit" and run_stats.get("apply_ok", 0) >= 1:
-                        emit(
-                            "conclude_edit",
-                            "apply_denied",
-                            "duplicate_apply_this_run",
-                            [
-                                "Do not call conclude_edit again in this run.",
-                                "Ask whether further changes or a new proposal cycle are needed.",
-                            ],
-                            options.I_O,
-                            function_response_list,
-                        )
-                        only_text_response = False
-                        stop_after_tool = True
-                        break
-                    # -------------------------------------------------------
-
-                    # ---- NORMALIZE ARGS & DISPATCH --------------------------------------
-                    if options.I_O:
-                        print(f"function arguments -> {function_call_part.args}")
-
-                    # snapshot raw LLM args
-                    function_call_part.args["function_args"] = dict(
-                        function_call_part.args
-                    )
+    # normalize working directory (force absolute project_root/code_to_fix)
+    original_dir = function_call_part.args.get("working_directory", "")
+    if options.demo:
+        base_dir = (
+            project_root / "__demo_sandbox__" / "code_to_fix" / "calculator_bugged"
+        )
+    else:
+        base_dir = project_root / "code_to_fix"
+    function_call_part.args["working_directory"] = str(base_dir / original_dir)
+    # attach run_id
+    function_call_part.args["run_id"] = state.run_id
+    # inject deterministic inputs for conclude_edit from last_prop (no file I/O here)
+    if function_call_part.name == "conclude_edit" and not options.reset:
+        last_prop = state.last_prop
+        if not last_prop:
+            emit(
+                "conclude_edit",
+                "apply_denied",
+                "no_previous_proposals",
+                [
+                    "Previous proposal not existent, generate only text response for user:",
+                    "'Error: repeat the request.'",
+                ],
+                options.I_O,
+                function_response_list,
+            )
+            return None
 
-                    # normalize working directory (force absolute project_root/code_to_fix)
-                    original_dir = function_call_part.args.get("working_directory", "")
-                    if options.demo:
-                        base_dir = (
-                            project_root
-                            / "__demo_sandbox__"
-                            / "code_to_fix"
-                            / "calculator_bugged"
-                        )
-                    else:
-                        base_dir = project_root / "code_to_fix"
-                    function_call_part.args["working_directory"] = str(
-                        base_dir / original_dir
-                    )
-                    # attach run_id
-                    function_call_part.args["run_id"] = run_id
-                    # inject deterministic inputs for conclude_edit from last_prop (no file I/O here)
-                    if function_call_part.name == "conclude_edit" and not options.reset:
-                        if not last_prop:
-                            emit(
-                                "conclude_edit",
-                                "apply_denied",
-                                "no_previous_proposals",
-                                [
-                                    "Previous proposal not existent, generate only text response for user:",
-                                    "'Error: repeat the request.'",
-                                ],
-                                options.I_O,
-                                function_response_list,
-                            )
-                            only_text_response = False
-                            stop_after_tool = True
-                            break
-
-                        fp = last_prop.get("file_path")
-                        ct = last_prop.get("content")
-                        wd = (
-                            last_prop.get("wd")
-                            or last_prop.get("working_directory")
-                            or ""
-                        ).strip("/")
-                        wd = base_dir / wd if wd else base_dir
-
-                        if not fp or ct is None:
-                            emit(
-                                "conclude_edit",
-                                "apply_denied",
-                                "Previous proposal missing file_path or content.",
-                                [
-                                    "Previous proposal content or file path not exist, generate only text response for user:",
-                                    "'Error: changes not applied, please state again the previous request.'",
-                                ],
-                                options.I_O,
-                                function_response_list,
-                            )
-                            only_text_response = False
-                            stop_after_tool = True
-                            break
-
-                        # override working_directory using wd from proposal; file_path stays as-is
-                        function_call_part.args["working_directory"] = str(wd)
-                        function_call_part.args["file_path"] = fp
-                        function_call_part.args["content"] = ct
-                        extra_data = {"wd": wd, "fp": fp, "ct": ct}
-
-                        if options.verbose:
-                            print(
-                                f"[conclude_edit inject] wd={wd!r} file_path={fp!r}, bytes={len(ct)}"
-                            )
-
-                    # dispatch
-                    function_call_result = call_function(
-                        function_call_part, function_dict, verbose=options.verbose
-                    )
+        fp = last_prop.get("file_path")
+        ct = last_prop.get("content")
+        wd = (last_prop.get("wd") or last_prop.get("working_directory") or "").strip(
+            "/"
+        )
+        wd = base_dir / wd if wd else base_dir
+
+        if not fp or ct is None:
+            emit(
+                "conclude_edit",
+                "apply_denied",
+                "Previous proposal missing file_path or content.",
+                [
+                    "Previous proposal content or file path not exist, generate only text response for user:",
+                    "'Error: changes not applied, please state again the previous request.'",
+                ],
+                options.I_O,
+                function_response_list,
+            )
+            return None
 
-                    # extract tool response
-                    function_response = function_call_result.parts[
-                        0
-                    ].function_response.response
-                    if function_response is None:
-                        raise Exception("No output from inputted function")
+        # override working_directory using wd from proposal; file_path stays as-is
+        function_call_part.args["working_directory"] = str(wd)
+        function_call_part.args["file_path"] = fp
+        function_call_part.args["content"] = ct
+        state.extra_data = {"wd": wd, "fp": fp, "ct": ct}
 
-                    if options.verbose:
-                        print(f"-> {function_response}")
+        if options.verbose:
+            print(f"[conclude_edit inject] wd={wd!r} file_path={fp!r}, bytes={len(ct)}")
 
-                    function_response_list.append(
-                        types.Part.from_function_response(
-                            name=function_call_part.name,
-                            response=function_response,
-                        )
-                    )
-                    # ---- STATS ------------------------------------------------
-                    run_stats["tool_calls"] += 1
-
-                    # Robust OK detection for dict/str payloads
-                    res_dict = (
-                        function_response
-                        if isinstance(function_response, dict)
-                        else None
-                    )
-                    if res_dict is not None:
-                        res_text = res_dict.get("result")
-                        status_ok = not (
-                            res_dict.get("ok") is False
-                            or (
-                                isinstance(res_text, str)
-                                and (
-                                    res_text.startswith("Error:")
-                                    or "TIMEOUT" in res_text
-                                    or "timed out" in res_text
-                                )
-                            )
-                        )
-                    else:
-                        res = function_response
-                        status_ok = (
-                            isinstance(res, str)
-                            and not res.startswith("Error:")
-                            and "TIMEOUT" not in res
-                            and "timed out" not in res
-                        ) or not isinstance(res, str)
-
-                    name = function_call_part.name
-                    if status_ok:
-                        if name == "propose_changes":
-                            run_stats["propose_ok"] += 1
-                            emit(
-                                "propose_changes",
-                                "directive",
-                                "proposal_recorded",
-                                [
-                                    "Reply with TEXT ONLY. Summarize the proposed edit in 3 bullets.",
-                                    "Ask: 'Approve apply in next run?'",
-                                ],
-                                options.I_O,
-                                function_response_list,
-                            )
-
-                            # optional: cache proposed content for save_run_info
-                            if isinstance(function_response, dict):
-                                proposed_content = function_response.get("content")
-                            if proposed_content is None:
-                                proposed_content = function_call_part.args.get(
-                                    "content"
-                                )
-                        elif name == "conclude_edit":
-                            run_stats["apply_ok"] += 1
-                        elif name in (
-                            "get_file_content",
-                            "get_files_info",
-                            "run_python_file",
-                        ):
-                            run_stats["read_ok"] += 1
-                    else:
-                        run_stats["transient_err"] += 1
-
-                    # ---- MARK NON-TEXT RESPONSE ------------------------------------------
-                    # Found a function call → this is not a pure text response
-                    only_text_response = False
+    return function_call_part
 
-                # ---- IGNORE PLAIN TEXT PARTS ---------------------------------------------
-                elif part.text:
-                    # Plain text part: already handled (or not actionable) → ignore here
-                    pass
-
-            # ---- POST-RESPONSE ACCOUNTING & EARLY-EXIT -------------------------------------
-            um = getattr(response, "usage_metadata", None)
-            if options.verbose and um:
-                print(f"User prompt: {prompt}")
-                print(f"Prompt tokens: {um.prompt_token_count}")
-                print(f"Response tokens: {um.candidates_token_count}")
-
-            # If the llm respond with only text, stop the cycle and print reponse
-            if only_text_response:
-                txt = (response.text or "").lower()
-                # If model is asking for target directory
-                PAT_ASK_DIR = re.compile(
-                    r"""
-                    (specify|which|what|where|indicate|choose|select|target|root
-                    |working\s*directory|project\s*root|path|folder|dir|tree|structure
-                    |cartella|percorso|quale|dove)
-                    .{0,60}
-                    (directory|folder|path|root|cartella|percorso|dir)
-                """,
-                    re.I | re.X,
-                )
 
-                # Create payload with file searching instructions
-                if PAT_ASK_DIR.search(txt) and run_stats["file_info_blox"] == 0:
-                    messages.append(
-                        types.Content(
-                            role="user",
-                            parts=[
-                                types.Part(
-                                    text="The project root is 'code_to_fix/'. Use get_files_info on '.' or on the mentioned subfolder."
-                                )
-                            ],
-                        )
-                    )
-                    run_stats["file_info_blox"] += 1
-                    continue  # Start a new cycle
+def _dispatch(function_call_part, options):
+    return call_function(function_call_part, function_dict, verbose=options.verbose)
 
-                # Print llm text response
-                run_stats["text_only"] = True
-                print(response.text or "")
 
-                # if llm propose changes this run append to message ai_outputs directory position
-                if run_stats.get("propose_ok", 0) >= 1:
-                    print(
-                        "\n[INFO] Proposed changes saved under __ai_outputs__/"
-                        f"{run_id}/. Check summary.txt and diff.patch for details.\n"
-                    )
+def _finish_function_call(
+    state, function_call_part, function_call_result, function_response_list, options
+):
+    # extract tool response
+    function_response = function_call_result.parts[0].function_response.response
+    if function_response is None:
+        raise Exception("No output from inputted function")
 
-                break
+    if options.verbose:
+        print(f"-> {function_response}")
 
-            # Add the function response to the message for the next iteration
-            if function_response_list:
-                messages.append(
-                    types.Content(
-                        role="tool",
-                        parts=function_response_list,  # <--- Change this from [function_response_list] to function_response_list
-                    )
-                )
+    part = types.Part.from_function_response(
+        name=function_call_part.name,
+        response=function_response,
+    )
+    function_response_list.append(part)
+    _record_tool_result(
+        state, function_call_part, function_response, function_response_list, options
+    )
 
-        # ---- TRANSIENT EXCEPTIONS (RETRYABLE) -----------------------------------------
-        except Exception as e:
-            # Error if the LLM is temporarily unavailable
-            if "UNAVAILABLE" in str(e):
-                run_stats["transient_err"] += 1
-                print("Gemini is temporarily unavailable, wait 5 seconds...")
-                time.sleep(5)
-                continue
+    # ---- TOOL MEMO ----------------------------------------------------
+    if state.memo is not None:
+        if function_call_part.name == "conclude_edit":
+            state.memo.clear()  # the sandbox was written
+        else:
+            state.memo.store(function_call_part, state.run_stats["tool_calls"], part)
+
+
+class _ToolDispatcher:
+    """
+    Dispatch the function calls of one model turn.
+
+    Consecutive read-only calls run concurrently on `state.tool_pool`; any
+    other call first waits for them, then runs alone. Responses and stats are
+    recorded in call order, so the tool message and guard behaviour are the
+    same as with one-at-a-time dispatch.
+    """
+
+    def __init__(self, state, function_response_list, options, project_root):
+        self.state = state
+        self.function_response_list = function_response_list
+        self.options = options
+        self.project_root = project_root
+        self.read_only = set(READ_ONLY_TOOLS)
+        if options.parallel_run_python:
+            self.read_only.add("run_python_file")
+        self.pending = []  # (index, function_call_part, future) in call order
+        # (index, result) finished before the response was journaled (streaming)
+        self.unjournaled = []
+        self.stopped = False
+        self.dispatched = 0
+
+    def submit(self, part):
+        """Queue one function_call part. Returns True once a guard has tripped."""
+        if self.stopped:
+            return True
+        if part.function_call.name == "run_python_file":
+            # Warm interpreters are started only by sessions that run scripts;
+            # spares boot while this call and the rest of the turn go on
+            prewarm_pool()
+        parallel = (
+            self.state.tool_pool is not None
+            and part.function_call.name in self.read_only
+        )
+        if not parallel:
+            self.drain()
 
-            # Error if we called gemini more than 15 times in 1 minute, free version limitation (errore 429)
-            if "RESOURCE_EXHAUSTED" in str(e):
-                run_stats["transient_err"] += 1
-                print("Request per minute limit exceeded, wait 60 seconds...")
-                time.sleep(60)
-                continue
+        # Guard payloads go after the responses of calls already in flight
+        emitted = []
+        function_call_part = _prepare_function_call(
+            self.state, part, emitted, self.options, self.project_root
+        )
+        if function_call_part is None:
+            self.drain()
+            self.function_response_list.extend(emitted)
+            self.stopped = True
+            return True
+
+        index = self.dispatched
+        self.dispatched += 1
+        replayed = self.state.replay.pop(index, None)
+        memo = self.state.memo
+        if replayed is not None:
+            # Already ran before the run was interrupted: reuse its result
+            self.drain()
+            self._finish(index, function_call_part, replayed, journal=False)
+        elif memo is not None and (cached := memo.lookup(function_call_part)):
+            # Same call, same file fingerprints: point back at the earlier result
+            self.drain()
+            self._finish(index, function_call_part, cached)
+        elif parallel:
+            future = self.state.tool_pool.submit(
+                _dispatch, function_call_part, self.options
+            )
+            self.pending.append((index, function_call_part, future))
+        else:
+            result = _dispatch(function_call_part, self.options)
+            self._finish(index, function_call_part, result)
+        return False
+
+    def drain(self):
+        """Wait for in-flight calls and record their responses in call order."""
+        pending, self.pending = self.pending, []
+        for index, function_call_part, future in pending:
+            self._finish(index, function_call_part, future.result())
+
+    def journal(self, response):
+        """Journal a streamed response, then the results that finished before it."""
+        _enter_dispatch(self.state, response)
+        for index, result in self.unjournaled:
+            self.state.checkpoint.tool_result(self.state, index, result)
+        self.unjournaled = []
+
+    def _finish(self, index, function_call_part, result, journal=True):
+        # Only a journaled model response can be resumed mid-dispatch
+        if journal and self.state.phase == DISPATCH:
+            self.state.checkpoint.tool_result(self.state, index, result)
+        elif journal:
+            self.unjournaled.append((index, result))
+        _finish_function_call(
+            self.state,
+            function_call_part,
+            result,
+            self.function_response_list,
+            self.options,
+        )
 
-            # Error if the LLM got an invalid input, probable code error present (errore 400)
-            if "INVALID_ARGUMENT" in str(e):
-                run_stats["transient_err"] += 1
-                print("Code error, try again")
-                sys.exit()
 
-            # All error are appended to the message for the next iteration
-            error_message = types.Content(
-                role="tool",
+def _record_tool_result(
+    state, function_call_part, function_response, function_response_list, options
+):
+    # ---- STATS ------------------------------------------------
+    run_stats = state.run_stats
+    run_stats["tool_calls"] += 1
+
+    # Robust OK detection for dict/str payloads
+    res_dict = function_response if isinstance(function_response, dict) else None
+    if res_dict is not None:
+        res_text = res_dict.get("result")
+        status_ok = not (
+            res_dict.get("ok") is False
+            or (
+                isinstance(res_text, str)
+                and (
+                    res_text.startswith("Error:")
+                    or "TIMEOUT" in res_text
+                    or "timed out" in res_text
+                )
+            )
+        )
+    else:
+        res = function_response
+        status_ok = (
+            isinstance(res, str)
+            and not res.startswith("Error:")
+            and "TIMEOUT" not in res
+            and "timed out" not in res
+        ) or not isinstance(res, str)
+
+    name = function_call_part.name
+    if status_ok:
+        if name == "propose_changes":
+            run_stats["propose_ok"] += 1
+            emit(
+                "propose_changes",
+                "directive",
+                "proposal_recorded",
+                [
+                    "Reply with TEXT ONLY. Summarize the proposed edit in 3 bullets.",
+                    "Ask: 'Approve apply in next run?'",
+                ],
+                options.I_O,
+                function_response_list,
+            )
+
+            # optional: cache proposed content for save_run_info
+            if isinstance(function_response, dict):
+                state.proposed_content = function_response.get("content")
+            if state.proposed_content is None:
+                state.proposed_content = function_call_part.args.get("content")
+        elif name == "conclude_edit":
+            run_stats["apply_ok"] += 1
+        elif name in (
+            "get_file_content",
+            "get_files_content",
+            "get_files_info",
+            "search_code",
+            "find_symbol",
+            "get_symbol_source",
+            "run_python_file",
+            "run_tests",
+        ):
+            run_stats["read_ok"] += 1
+    else:
+        run_stats["transient_err"] += 1
+
+
+def _handle_text_only(state, text, echo_text=True):
+    """Handle a text-only model turn. Returns True when the run should stop."""
+    run_stats = state.run_stats
+    txt = (text or "").lower()
+
+    # Create payload with file searching instructions
+    if PAT_ASK_DIR.search(txt) and run_stats["file_info_blox"] == 0:
+        state.messages.append(
+            types.Content(
+                role="user",
                 parts=[
                     types.Part(
-                        text="An error occurred during the execution of the loop. Below is the error. "
-                        "Adjust your behavior accordingly: " + str(e)
+                        text="The project root is 'code_to_fix/'. Use get_files_info on '.' or on the mentioned subfolder."
                     )
                 ],
             )
-            messages.append(error_message)
+        )
+        run_stats["file_info_blox"] += 1
+        return False  # Start a new cycle
+
+    # Print llm text response (already echoed chunk by chunk when streaming)
+    run_stats["text_only"] = True
+    if echo_text:
+        print(text or "")
+
+    # if llm propose changes this run append to message ai_outputs directory position
+    if run_stats.get("propose_ok", 0) >= 1:
+        print(
+            "\n[INFO] Proposed changes saved under __ai_outputs__/"
+            f"{state.run_id}/. Check summary.txt and diff.patch for details.\n"
+        )
+
+    return True
+
+
+def _process_response(state, response, options, project_root):
+    """Apply one model response to the session. Returns True when the run should stop."""
+
+    # ---- APPEND MODEL MESSAGE & INIT LOOP FLAGS --------------------------
+    # Add model response to the message stream for the next turn
+    state.messages.append(response.candidates[0].content)
+
+    # Control flags for this iteration
+    only_text_response = True
+
+    # Collect tool responses (to be appended as a single 'tool' message)
+    function_response_list = []
+    dispatcher = _ToolDispatcher(state, function_response_list, options, project_root)
+    # ---- HANDLER: FUNCTION CALL PARTS THROTTLE ------------------------
+    # Loop over each LLM response part (text + single/multi function calls)
+    try:
+        for part in response.candidates[0].content.parts:
+            if part.function_call:
+                # Found a function call → this is not a pure text response
+                only_text_response = False
+                if dispatcher.submit(part):
+                    break
+
+            # ---- IGNORE PLAIN TEXT PARTS ---------------------------------------------
+            elif part.text:
+                # Plain text part: already handled (or not actionable) → ignore here
+                pass
+    finally:
+        dispatcher.drain()
+
+    return _finish_turn(
+        state, response, only_text_response, function_response_list, options
+    )
+
+
+def _process_stream(state, chunks, options, project_root):
+    """
+    Streaming variant of `_process_response`.
+    Text is echoed as it arrives and each function_call part is dispatched as
+    soon as its chunk lands, before the rest of the turn has been generated.
+    """
+    parts = []
+    only_text_response = True
+    function_response_list = []
+    dispatcher = _ToolDispatcher(state, function_response_list, options, project_root)
+    usage = None
+    completed = False
+
+    try:
+        for chunk in chunks:
+            usage = chunk.usage_metadata or usage
+            if not chunk.candidates or not chunk.candidates[0].content:
+                continue
+            for part in chunk.candidates[0].content.parts or []:
+                if part.function_call:
+                    only_text_response = False
+                    # After a guard trip the remaining calls of the turn are skipped
+                    dispatcher.submit(part)
+                elif part.text:
+                    print(part.text, end="", flush=True)
+                merge_part(parts, part)
+        completed = True
+
+        response = types.GenerateContentResponse(
+            candidates=[
+                types.Candidate(content=types.Content(role="model", parts=parts))
+            ],
+            usage_metadata=usage,
+        )
+        # Journal the merged turn before waiting on its in-flight tools
+        dispatcher.journal(response)
+    finally:
+        dispatcher.drain()
+        if not completed:
+            # Broken stream: keep the calls that got a response (the guard payload
+            # answers the call that tripped it) and answer them, so a retry sends
+            # no unanswered calls and keeps the tools that already ran
+            answered = dispatcher.dispatched + dispatcher.stopped
+            kept = []
+            for part in parts:
+                if part.function_call:
+                    if not answered:
+                        continue
+                    answered -= 1
+                kept.append(part)
+            parts = kept
+            if parts:
+                state.messages.append(types.Content(role="model", parts=parts))
+            if function_response_list:
+                state.messages.append(
+                    types.Content(role="tool", parts=function_response_list)
+                )
+        elif parts:
+            # Keep the model turn ahead of its tool responses
+            state.messages.append(types.Content(role="model", parts=parts))
+
+    if any(p.text for p in parts):
+        print()
+
+    return _finish_turn(
+        state,
+        response,
+        only_text_response,
+        function_response_list,
+        options,
+        echo_text=False,
+    )
+
+
+def _finish_turn(
+    state, response, only_text_response, function_response_list, options, echo_text=True
+):
+    # ---- POST-RESPONSE ACCOUNTING & EARLY-EXIT -------------------------------------
+    um = getattr(response, "usage_metadata", None)
+    state.last_usage = um
+    if options.verbose and um:
+        print(f"User prompt: {state.prompt}")
+        print(f"Prompt tokens: {um.prompt_token_count}")
+        print(f"Response tokens: {um.candidates_token_count}")
+
+    # If the llm respond with only text, stop the cycle and print reponse
+    if only_text_response:
+        return _handle_text_only(state, response.text, echo_text)
+
+    # Add the function response to the message for the next iteration
+    if function_response_list:
+        state.messages.append(types.Content(role="tool", parts=function_response_list))
+    return False
+
+
+def _handle_exception(state, e, options):
+    """
+    Classify a loop exception.
+    Returns ("retry", seconds), ("stop", None), ("exit", None) or ("continue", None).
+    """
+    # Client-side retries (RateLimitedLLMClient) already gave up: stop the run
+    if isinstance(e, RetriesExhausted):
+        state.run_stats["transient_err"] += 1
+        print("Gemini is still unavailable after retries, stopping the run.")
+        return "stop", None
+
+    # Error if the LLM is temporarily unavailable, or if we called gemini more
+    # than the per-minute quota (errore 429): bounded, jittered backoff
+    if is_transient(e):
+        state.run_stats["transient_err"] += 1
+        state.transient_streak += 1
+        if state.transient_streak > MAX_TRANSIENT_RETRIES:
+            print("Too many consecutive transient errors, stopping the run.")
+            return "stop", None
+
+        delay = backoff_delay(state.transient_streak - 1, server_retry_delay(e))
+        if is_throttled(e):
+            print(f"Request per minute limit exceeded, wait {delay:.1f} seconds...")
+        else:
+            print(f"Gemini is temporarily unavailable, wait {delay:.1f} seconds...")
+        return "retry", delay
+
+    # Error if the LLM got an invalid input, probable code error present (errore 400)
+    if "INVALID_ARGUMENT" in str(e):
+        state.run_stats["transient_err"] += 1
+        print("Code error, try again")
+        return "exit", None
+
+    # All error are appended to the message for the next iteration
+    error_message = types.Content(
+        role="tool",
+        parts=[
+            types.Part(
+                text="An error occurred during the execution of the loop. Below is the error. "
+                "Adjust your behavior accordingly: " + str(e)
+            )
+        ],
+    )
+    state.messages.append(error_message)
+
+    if options.verbose:
+        print("EXCEPTION while block:", e)
+    return "continue", None
 
-            if options.verbose:
-                print("EXCEPTION while block:", e)
+
+def _finalize(state):
+    if state.tool_pool is not None:
+        state.tool_pool.shutdown()
 
     # ---- SAVE-TYPE DECISION (END-OF-RUN) ---------------------------------
-    if run_save["save_type"] == "Default":
+    run_stats = state.run_stats
+    if state.save_type == "Default":
         any_useful = (
             run_stats["propose_ok"] or run_stats["apply_ok"] or run_stats["read_ok"]
         )
@@ -476,20 +819,185 @@ def run_pipeline(prompt, llm, options, project_root):
         )
 
         if only_transient:
-            run_save["save_type"] = "Discard_run"
+            state.save_type = "Discard_run"
         elif run_stats["text_only"] and run_stats["tool_calls"] == 0:
-            run_save["save_type"] = "Additional_run"
+            state.save_type = "Additional_run"
         elif run_stats.get("propose_ok", 0) >= 1:
-            run_save["save_type"] = "propose_run"
+            state.save_type = "propose_run"
         else:
-            run_save["save_type"] = "Default"
+            state.save_type = "Default"
 
+    state.checkpoint.end(state)
     return {
-        "run_id": run_id,
+        "run_id": state.run_id,
         "run_stats": run_stats,
-        "save_type": run_save["save_type"],
-        "messages": messages,
-        "prev_summary_path": prev_summary_path,
-        "extra_data": extra_data,
-        "proposed_content": proposed_content,
+        "save_type": state.save_type,
+        "messages": state.messages,
+        "prev_summary_path": state.prev_summary_path,
+        "extra_data": state.extra_data,
+        "proposed_content": state.proposed_content,
+        "usage": state.ledger.totals(),
     }
+
+
+# ---- CHECKPOINTED TURNS --------------------------------------------------------
+# Each iteration moves CALL_MODEL -> DISPATCH -> CALL_MODEL | DONE. The model
+# response is journaled before its tools run and the turn is committed after
+# them, so a resumed run never asks the model again for a turn it received.
+# A streamed response is journaled once its last chunk is merged, with the
+# results of the tools that finished while it streamed: only a crash before
+# the stream ends asks the model again (and reruns those tools).
+def _enter_dispatch(state, response):
+    state.checkpoint.model_turn(state, response)
+    state.pending_response = response
+    state.phase = DISPATCH
+
+
+def _commit_turn(state, stop):
+    state.phase = DONE if stop else CALL_MODEL
+    state.pending_response = None
+    state.replay = {}
+    state.checkpoint.commit(state)
+
+
+def run_pipeline(prompt, llm, options, project_root, state=None):
+    """
+    Run a session to completion and return its result.
+    Pass `state` (see `resume_session`) to continue an interrupted run instead.
+    """
+    if state is None:
+        state = _init_session(prompt, llm, options, project_root)
+    meter = None
+
+    # ---- MAIN LOOP (ITERATIVE DRIVER) -------------------------------------------
+    while state.phase != DONE:
+        try:
+            if state.phase == CALL_MODEL:
+                if state.cycle_number >= MAX_CYCLES:  # runs up to 16 iters
+                    break
+                state.cycle_number += 1
+                meter = _start_call(state, llm)
+
+                # ---- MODEL CALL & OPTIONAL DEBUG DUMP --------------------------------
+                _print_last_messages(state, options)
+                try:
+                    messages = _context_for_call(state)
+                    if options.stream:
+                        # Only time spent waiting on chunks counts as model latency
+                        chunks = timed(
+                            llm.stream(
+                                model=model, messages=messages, config=state.config
+                            ),
+                            meter,
+                        )
+                        stop = _process_stream(state, chunks, options, project_root)
+                        _record_call(state, llm, meter)
+                        meter = None
+                        state.transient_streak = 0
+                        _commit_turn(state, stop)
+                        continue
+
+                    started = time.perf_counter()
+                    try:
+                        response = llm.complete(
+                            model=model, messages=messages, config=state.config
+                        )
+                    finally:
+                        meter["latency_s"] = time.perf_counter() - started
+                except FileNotFoundError as e:
+                    print("Error llm call", e)
+                    _record_call(state, llm, meter, error=e)
+                    break
+
+                state.transient_streak = 0
+                _enter_dispatch(state, response)
+
+            # ---- TOOL DISPATCH (also entered directly by a resumed run) --------------
+            meter = meter or _start_call(state, llm)
+            stop = _process_response(
+                state, state.pending_response, options, project_root
+            )
+            _record_call(state, llm, meter)
+            meter = None
+            _commit_turn(state, stop)
+
+        # ---- TRANSIENT EXCEPTIONS (RETRYABLE) -----------------------------------------
+        except Exception as e:
+            if meter is not None:
+                _record_call(state, llm, meter, error=e)
+                meter = None
+            action, delay = _handle_exception(state, e, options)
+            if action == "continue" or state.phase == DISPATCH:
+                _commit_turn(state, stop=False)
+            if action == "retry":
+                time.sleep(delay)
+            elif action == "stop":
+                break
+            elif action == "exit":
+                sys.exit()
+
+    return _finalize(state)
+
+
+async def async_run_pipeline(prompt, llm, options, project_root, state=None):
+    """
+    asyncio-native twin of `run_pipeline` for an `AsyncLLMClient`.
+
+    Guards, throttles, checkpoints and save-type logic are shared with the sync
+    driver. Tool calls run in a worker thread so the event loop stays free for
+    other sessions; an INVALID_ARGUMENT error ends this session instead of the
+    process. Session init stays on the loop thread so run ids are allocated one
+    at a time.
+    """
+    if state is None:
+        state = _init_session(prompt, llm, options, project_root)
+    meter = None
+
+    # ---- MAIN LOOP (ITERATIVE DRIVER) -------------------------------------------
+    while state.phase != DONE:
+        try:
+            if state.phase == CALL_MODEL:
+                if state.cycle_number >= MAX_CYCLES:
+                    break
+                state.cycle_number += 1
+                meter = _start_call(state, llm)
+                _print_last_messages(state, options)
+                try:
+                    messages = _context_for_call(state)
+                    started = time.perf_counter()
+                    try:
+                        response = await llm.complete(
+                            model=model, messages=messages, config=state.config
+                        )
+                    finally:
+                        meter["latency_s"] = time.perf_counter() - started
+                except FileNotFoundError as e:
+                    print("Error llm call", e)
+                    _record_call(state, llm, meter, error=e)
+                    break
+
+                state.transient_streak = 0
+                await asyncio.to_thread(_enter_dispatch, state, response)
+
+            meter = meter or _start_call(state, llm)
+            stop = await asyncio.to_thread(
+                _process_response, state, state.pending_response, options, project_root
+            )
+            _record_call(state, llm, meter)
+            meter = None
+            await asyncio.to_thread(_commit_turn, state, stop)
+
+        # ---- TRANSIENT EXCEPTIONS (RETRYABLE) -----------------------------------------
+        except Exception as e:
+            if meter is not None:
+                _record_call(state, llm, meter, error=e)
+                meter = None
+            action, delay = _handle_exception(state, e, options)
+            if action == "continue" or state.phase == DISPATCH:
+                _commit_turn(state, stop=False)
+            if action == "retry":
+                await asyncio.sleep(delay)
+            elif action in ("stop", "exit"):
+                break
+
+    return _finalize(state)
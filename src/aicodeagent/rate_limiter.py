@@ -0,0 +1,191 @@
+import json
+import os
+import random
+import re
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX: no cross-process sharing
+    fcntl = None
+
+
+class RetriesExhausted(Exception):
+    """Raised when a transient LLM error persists past the retry budget."""
+
+    def __init__(self, last_error, attempts):
+        self.last_error = last_error
+        self.attempts = attempts
+        super().__init__(f"gave up after {attempts} attempts: {last_error}")
+
+
+def is_throttled(e) -> bool:
+    """True for quota errors (HTTP 429 / RESOURCE_EXHAUSTED)."""
+    return getattr(e, "code", None) == 429 or "RESOURCE_EXHAUSTED" in str(e)
+
+
+def is_transient(e) -> bool:
+    """True for errors worth retrying: quota (429) or unavailable (503)."""
+    return (
+        is_throttled(e)
+        or getattr(e, "code", None) in (500, 503)
+        or "UNAVAILABLE" in str(e)
+    )
+
+
+def server_retry_delay(e) -> float | None:
+    """
+    Extract the server-provided retry delay in seconds, if any.
+    Looks at the HTTP Retry-After header, then at google.rpc.RetryInfo in the body.
+    """
+    response = getattr(e, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers:
+        value = headers.get("retry-after") or headers.get("Retry-After")
+        try:
+            return max(0.0, float(value))
+        except (TypeError, ValueError):
+            pass
+
+    # RetryInfo: {"@type": ".../google.rpc.RetryInfo", "retryDelay": "17s"}
+    m = re.search(r"""['"]retryDelay['"]:\s*['"]([\d.]+)s['"]""", str(e))
+    if m:
+        return float(m.group(1))
+    return None
+
+
+def backoff_delay(attempt, retry_after=None, base=1.0, cap=60.0) -> float:
+    """
+    Exponential backoff with jitter for the given 0-based attempt.
+    A server-provided `retry_after` is honoured as a floor.
+    """
+    ceiling = min(cap, base * (2**attempt))
+    # Equal jitter: half fixed, half random, so retries never collapse to 0
+    delay = ceiling / 2 + random.uniform(0, ceiling / 2)
+    if retry_after is not None:
+        delay = max(delay, retry_after + random.uniform(0, base))
+    return delay
+
+
+class RateLimiter:
+    """
+    Requests-per-minute token bucket with AIMD rate adaptation.
+
+    - `acquire()` blocks until a request slot is free under the current rate.
+    - `on_throttle()` halves the rate and pauses everyone until the server's
+      retry delay has passed; `on_success()` raises the rate by one RPM up to `rpm`.
+    - With `state_path`, bucket state lives in a JSON file guarded by an flock'd
+      lock file, so several agents on one API key share a single budget.
+    """
+
+    def __init__(
+        self,
+        rpm=15,
+        min_rpm=1,
+        state_path=None,
+        clock=time.time,
+        sleep=time.sleep,
+    ):
+        self.max_rpm = float(rpm)
+        self.min_rpm = float(min_rpm)
+        self.state_path = state_path
+        self.clock = clock
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        self._state = None
+
+    # ---- shared state ---------------------------------------------------------
+    def _default_state(self):
+        return {
+            "rate": self.max_rpm,
+            "tokens": self.max_rpm,
+            "ts": self.clock(),
+            "blocked_until": 0.0,
+        }
+
+    def _update(self, fn):
+        """Apply `fn(state) -> result` atomically (thread- and process-wide)."""
+        with self._lock:
+            if not self.state_path:
+                if self._state is None:
+                    self._state = self._default_state()
+                return fn(self._state)
+
+            os.makedirs(
+                os.path.dirname(os.path.abspath(self.state_path)), exist_ok=True
+            )
+            with open(f"{self.state_path}.lock", "a+") as lock_file:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    try:
+                        with open(self.state_path, "r", encoding="utf-8") as f:
+                            state = json.load(f)
+                    except (OSError, json.JSONDecodeError):
+                        state = self._default_state()
+
+                    result = fn(state)
+
+                    tmp = f"{self.state_path}.{os.getpid()}.tmp"
+                    with open(tmp, "w", encoding="utf-8") as f:
+                        json.dump(state, f)
+                    os.replace(tmp, self.state_path)
+                    return result
+                finally:
+                    if fcntl:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _refill(self, state, now):
+        rate = min(max(state["rate"], self.min_rpm), self.max_rpm)
+        elapsed = max(0.0, now - state["ts"])
+        state["tokens"] = min(rate, state["tokens"] + elapsed * rate / 60.0)
+        state["ts"] = now
+        return rate
+
+    # ---- public API -----------------------------------------------------------
+    def try_acquire(self) -> float:
+        """Take a slot if one is free. Returns 0.0 on success, else seconds to wait."""
+
+        def take(state):
+            now = self.clock()
+            rate = self._refill(state, now)
+            if now < state["blocked_until"]:
+                return state["blocked_until"] - now
+            if state["tokens"] >= 1.0:
+                state["tokens"] -= 1.0
+                return 0.0
+            return (1.0 - state["tokens"]) * 60.0 / rate
+
+        return self._update(take)
+
+    def acquire(self) -> float:
+        """Block until a request may be sent. Returns the total time waited."""
+        waited = 0.0
+        while True:
+            wait = self.try_acquire()
+            if wait <= 0:
+                return waited
+            self.sleep(wait)
+            waited += wait
+
+    def on_success(self):
+        def increase(state):
+            state["rate"] = min(self.max_rpm, state["rate"] + 1.0)
+
+        self._update(increase)
+
+    def on_throttle(self, retry_after=None):
+        def decrease(state):
+            now = self.clock()
+            self._refill(state, now)
+            state["rate"] = max(self.min_rpm, state["rate"] / 2.0)
+            state["tokens"] = 0.0
+            if retry_after:
+                state["blocked_until"] = max(state["blocked_until"], now + retry_after)
+
+        self._update(decrease)
+
+    @property
+    def rate(self) -> float:
+        return self._update(lambda state: state["rate"])
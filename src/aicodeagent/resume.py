@@ -0,0 +1,87 @@
+# ---- IMPORTS & INTERNALS -----------------------------------------------------
+import argparse
+import dataclasses
+import sys
+from pathlib import Path
+
+from aicodeagent.functions.fs.get_project_root import get_project_root
+from aicodeagent.functions.pipeline.checkpoint import load_checkpoint
+from aicodeagent.functions.pipeline.options import PipelineOptions
+from aicodeagent.functions.pipeline.persist_run import persist_run
+from aicodeagent.llm_client import (
+    ContextCachingLLMClient,
+    build_llm_client,
+    find_client,
+)
+from aicodeagent.pipeline import resume_session, run_pipeline
+
+# Console flags that may differ from the interrupted run; the rest is restored
+CONSOLE_OPTIONS = ("verbose", "I_O", "stream")
+
+
+def restore_options(session, args):
+    """The interrupted run's PipelineOptions, with the console flags of `args`."""
+    known = {f.name for f in dataclasses.fields(PipelineOptions)}
+    saved = {k: v for k, v in session["options"].items() if k in known}
+    saved.update({k: getattr(args, k) for k in CONSOLE_OPTIONS})
+    return PipelineOptions(**saved)
+
+
+def main(argv=None) -> int:
+    """`aicodeagent resume run_XXX`: continue an interrupted run from its checkpoint."""
+    parser = argparse.ArgumentParser(
+        prog="aicodeagent resume",
+        description="Continue an interrupted run from its last checkpointed turn",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("run_id", help="Run to resume, e.g. run_042")
+    parser.add_argument("--verbose", action="store_true")
+    parser.add_argument("--I_O", action="store_true")
+    parser.add_argument("--stream", action="store_true")
+    parser.add_argument("--offline", action="store_true", help="Use canned llm")
+    parser.add_argument("--rpm", type=int, default=15)
+    parser.add_argument("--hedge", type=float, metavar="PCT")
+    parser.add_argument("--no-context-cache", action="store_true")
+    parser.add_argument("--cache", action="store_true")
+    args = parser.parse_args(argv)
+
+    try:
+        checkpoint = load_checkpoint(args.run_id)
+    except (OSError, ValueError) as e:
+        print(f"Error: cannot resume {args.run_id}: {e}", file=sys.stderr)
+        return 1
+    if checkpoint["ended"]:
+        print(f"{args.run_id} already finished, nothing to resume")
+        return 0
+
+    project_root = Path(get_project_root(__file__))
+    llm = build_llm_client(
+        offline=args.offline,
+        canned_dir=project_root / "tests/integration/data/canned_llm",
+        rpm=args.rpm,
+        rate_state_path=str(Path("__ai_outputs__") / "rate_limit.json"),
+        hedge=args.hedge,
+        context_cache=not args.no_context_cache,
+        cache_dir=Path("__ai_outputs__") / "llm_cache" if args.cache else None,
+    )
+    options = restore_options(checkpoint["session"], args)
+    state = resume_session(checkpoint, llm, options)
+    print(
+        f"[resume] {args.run_id} from iteration #{state.cycle_number} ({state.phase})"
+    )
+
+    try:
+        result = run_pipeline(None, llm, options, project_root, state=state)
+    finally:
+        client = find_client(llm, ContextCachingLLMClient)
+        if client is not None:
+            client.close()
+
+    persist_run(result)
+    if args.verbose:
+        print(f"[usage] {result['usage']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,147 @@
+import pytest
+
+from aicodeagent.functions.core import affected_tests
+from aicodeagent.functions.llm_calls.run_tests import run_tests
+
+CALC_TEST = (
+    "import unittest\n"
+    "from pkg.calc import add\n\n\n"
+    "class TestAdd(unittest.TestCase):\n"
+    "    def test_add(self):\n"
+    "        self.assertEqual(add(2, 3), 5)\n\n"
+    "    def test_zero(self):\n"
+    "        self.assertEqual(add(0, 0), 0)\n"
+)
+
+
+@pytest.fixture
+def sandbox(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("AICODEAGENT_OUTPUT_DIR", str(tmp_path / "__ai_outputs__"))
+    root = tmp_path / "code_to_fix"
+    (root / "pkg").mkdir(parents=True)
+    (root / "tests").mkdir()
+    (root / "pkg" / "__init__.py").write_text("")
+    (root / "pkg" / "calc.py").write_text("def add(a, b):\n    return a + b\n")
+    (root / "pkg" / "text.py").write_text("def shout(s):\n    return s.upper()\n")
+    (root / "tests" / "test_calc.py").write_text(CALC_TEST)
+    (root / "tests" / "test_text.py").write_text(
+        "from pkg.text import shout\n\n\n"
+        "def test_shout():\n    assert shout('a') == 'A'\n"
+    )
+    (root / "main.py").write_text("print('not a test')\n")
+    return root
+
+
+def test_discovery_and_import_graph_fingerprints(sandbox):
+    root = str(sandbox)
+    files = affected_tests.discover(root)
+    assert files == ["tests/test_calc.py", "tests/test_text.py"]
+    assert affected_tests.discover(root, "tests/test_text.py") == files[1:]
+
+    before = {f: affected_tests.file_fingerprint(root, f) for f in files}
+    (sandbox / "pkg" / "text.py").write_text(
+        "def shout(s):\n    return s.upper() + '!'\n"
+    )
+    after = {f: affected_tests.file_fingerprint(root, f) for f in files}
+    assert after["tests/test_calc.py"] == before["tests/test_calc.py"]
+    assert after["tests/test_text.py"] != before["tests/test_text.py"]
+
+
+def test_only_tests_affected_since_the_last_green_run_are_run(sandbox):
+    wd = str(sandbox)
+    first = run_tests(wd, "run_001")
+    assert first.splitlines()[:3] == [
+        "Selected 2 of 2 test files (2 new)",
+        first.splitlines()[1],
+        "All selected tests passed.",
+    ]
+    assert first.splitlines()[1].startswith("Ran 3 tests with unittest in ")
+
+    assert run_tests(wd, "run_001").startswith("None of the 2 test files is affected")
+
+    # Break the module test_calc.py imports: only that file runs, and fails
+    (sandbox / "pkg" / "calc.py").write_text("def add(a, b):\n    return a - b\n")
+    broken = run_tests(wd, "run_002")
+    assert broken.startswith(
+        "Selected 1 of 2 test files (1 changed; 1 unchanged and green, not run)\n"
+        "Ran 2 tests with unittest in 1 shard, "
+    )
+    assert "1 passed, 1 failed" in broken
+    assert "FAILED tests/test_calc.py::TestAdd::test_add\n" in broken
+    assert "AssertionError: -1 != 5" in broken
+
+    # Still failing while unchanged; fixed, it goes back to green
+    assert run_tests(wd, "run_002").startswith(
+        "Selected 1 of 2 test files (1 not green"
+    )
+    (sandbox / "pkg" / "calc.py").write_text("def add(a, b):\n    return a + b\n")
+    assert "All selected tests passed." in run_tests(wd, "run_003")
+    assert run_tests(wd, "run_003").startswith("None of the 2")
+    assert run_tests(wd, "run_003", select="all").startswith(
+        "Selected 2 of 2 test files (2 forced)"
+    )
+    log = (sandbox.parent / "__ai_outputs__" / "run_002" / "actions.log").read_text()
+    assert "Function run_tests: run the tests under: ." in log
+
+
+def test_data_file_edit_selects_the_tests_reading_it(sandbox):
+    (sandbox / "tests" / "data").mkdir()
+    (sandbox / "tests" / "data" / "expected.txt").write_text("5\n")
+    (sandbox / "tests" / "test_data.py").write_text(
+        "import os\n\n\ndef test_expected():\n"
+        "    path = os.path.join(os.path.dirname(__file__), 'data', 'expected.txt')\n"
+        "    assert open(path).read() == '5\\n'\n"
+    )
+    wd = str(sandbox)
+    assert "All selected tests passed." in run_tests(wd, "run_001")
+    assert run_tests(wd, "run_001").startswith("None of the 3 test files")
+
+    (sandbox / "tests" / "data" / "expected.txt").write_text("6\n")
+    res = run_tests(wd, "run_002")
+    # Every test file of the folder may read it: all three are selected again
+    assert res.startswith("Selected 3 of 3 test files (3 changed)")
+    assert "FAILED tests/test_data.py::test_expected" in res
+
+
+def test_fixtures_select_pytest_and_crashes_are_reported(sandbox):
+    (sandbox / "tests" / "test_files.py").write_text(
+        "def test_tmp(tmp_path):\n    assert tmp_path.is_dir()\n"
+    )
+    (sandbox / "tests" / "test_exit.py").write_text(
+        "import os\n\n\ndef test_exit():\n    os._exit(3)\n"
+    )
+    root = str(sandbox)
+    assert affected_tests.needs_pytest(root, "tests/test_files.py")
+    assert not affected_tests.needs_pytest(root, "tests/test_calc.py")
+
+    res = run_tests(str(sandbox), "run_001", path="tests")
+    assert " tests with pytest in " in res
+    assert "ERROR shard" in res and "exited with code 3 before finishing" in res
+    state = affected_tests.load_state(root)
+    # Files run before the crash in the same shard are still green
+    assert state["tests/test_exit.py"]["green"] is False
+    assert state["tests/test_calc.py"]["green"] is True
+
+
+def test_shard_cpu_cap_covers_the_shard_timeout(sandbox, monkeypatch):
+    # A per-script cap of 1 s must not kill a shard spending more CPU than that
+    monkeypatch.setenv("AICODEAGENT_RLIMIT_CPU", "1")
+    (sandbox / "tests" / "test_spin.py").write_text(
+        "import time\n\n\ndef test_spin():\n"
+        "    end = time.process_time() + 1.5\n"
+        "    while time.process_time() < end:\n        pass\n"
+    )
+    res = run_tests(str(sandbox), "run_001", path="tests/test_spin.py")
+    assert "All selected tests passed." in res
+
+    shard = affected_tests.run_shard(str(sandbox), ["tests/test_calc.py"], "unittest")
+    assert shard["finished"] and shard["cpu_limit"] == affected_tests.SHARD_TIMEOUT
+
+
+def test_shards_are_balanced_by_last_duration():
+    state = {"a": {"duration": 4.0}, "b": {"duration": 3.0}, "c": {"duration": 1.0}}
+    shards = affected_tests.plan_shards(["a", "b", "c", "d"], state, workers=2)
+    # Longest first: a (4) | b (3) + c (1) | d (unknown, 1.0) ties, goes first
+    assert shards == [["a", "d"], ["b", "c"]]
+    assert affected_tests.plan_shards(["a"], state, workers=8) == [["a"]]
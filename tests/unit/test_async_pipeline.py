@@ -0,0 +1,32 @@
+import asyncio
+import time
+from pathlib import Path
+
+from aicodeagent.functions.pipeline.options import PipelineOptions
+from aicodeagent.llm_client import AsyncFileLLMClient
+from aicodeagent.pipeline import async_run_pipeline
+
+CANNED_DIR = Path(__file__).parents[1] / "integration" / "data" / "canned_llm"
+
+
+def test_async_sessions_share_one_event_loop(tmp_path, monkeypatch):
+    monkeypatch.setenv("AICODEAGENT_OUTPUT_DIR", str(tmp_path / "__ai_outputs__"))
+    llm = AsyncFileLLMClient(CANNED_DIR, latency=0.3)
+    options = PipelineOptions(verbose=False, I_O=False, reset=False, demo=False)
+
+    async def run_many(n):
+        return await asyncio.gather(
+            *(async_run_pipeline("hello", llm, options, tmp_path) for _ in range(n))
+        )
+
+    t0 = time.perf_counter()
+    results = asyncio.run(run_many(5))
+    elapsed = time.perf_counter() - t0
+
+    # Five sessions with 0.3 s latency each overlap instead of adding up
+    assert elapsed < 1.0
+    assert len({r["run_id"] for r in results}) == 5
+    for r in results:
+        assert r["save_type"] == "Additional_run"
+        assert r["run_stats"]["text_only"] is True
+        assert r["messages"][-1].role == "model"
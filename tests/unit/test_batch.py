@@ -0,0 +1,61 @@
+import json
+import os
+
+import pytest
+
+from aicodeagent.batch import REPORT_JSON, load_jobs, main
+
+
+def _write_jobs(tmp_path, jobs):
+    path = tmp_path / "jobs.jsonl"
+    path.write_text("".join(json.dumps(j) + "\n" for j in jobs))
+    return path
+
+
+def test_batch_runs_jobs_in_isolated_output_roots(tmp_path):
+    repos = []
+    for i in range(3):
+        repo = tmp_path / f"repo_{i}"
+        repo.mkdir()
+        (repo / "main.py").write_text("print('hi')\n")
+        repos.append(repo)
+    jobs = _write_jobs(
+        tmp_path,
+        [
+            {"id": f"r{i}", "prompt": "hello", "target": str(r)}
+            for i, r in enumerate(repos)
+        ],
+    )
+    out = tmp_path / "out"
+
+    code = main([str(jobs), "--offline", "--concurrency", "2", "--out", str(out)])
+
+    assert code == 0
+    report = json.loads((out / REPORT_JSON).read_text())
+    assert [j["id"] for j in report["jobs"]] == ["r0", "r1", "r2"]
+    assert report["totals"]["ok"] == 3
+    assert report["totals"]["total_tokens"] == 3 * 12
+    for i, job in enumerate(report["jobs"]):
+        assert job["usage"]["calls"] == 1
+        job_root = out / "jobs" / f"r{i}"
+        # Each worker gets its own counter, so every job starts at run_001
+        assert job["run_id"] == "run_001"
+        summary = json.loads(
+            (job_root / "__ai_outputs__" / "run_001" / "run_summary.json").read_text()
+        )
+        assert summary["usage"]["total_tokens"] == 12
+        assert os.path.realpath(job_root / "code_to_fix") == str(repos[i])
+    assert len((out / "batch_report.jsonl").read_text().splitlines()) == 3
+
+
+def test_load_jobs_validates_input(tmp_path):
+    bad = _write_jobs(tmp_path, [{"prompt": "x", "target": str(tmp_path / "missing")}])
+    with pytest.raises(ValueError, match="not a directory"):
+        load_jobs(bad)
+
+    dup = _write_jobs(
+        tmp_path,
+        [{"id": "a", "prompt": "x", "target": str(tmp_path)}] * 2,
+    )
+    with pytest.raises(ValueError, match="duplicate"):
+        load_jobs(dup)
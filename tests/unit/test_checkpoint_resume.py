@@ -0,0 +1,146 @@
+import pytest
+from google.genai import types
+
+import aicodeagent.pipeline as pipeline
+from aicodeagent.functions.pipeline.checkpoint import load_checkpoint
+from aicodeagent.functions.pipeline.options import PipelineOptions
+from aicodeagent.llm_client import LLMClient
+
+
+class Killed(BaseException):
+    """Stands in for the process dying: not caught by the pipeline loop."""
+
+
+def _call(name, **args):
+    return types.Part(function_call=types.FunctionCall(name=name, args=args))
+
+
+def _response(*parts):
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role="model", parts=parts))]
+    )
+
+
+class ScriptedLLMClient(LLMClient):
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def complete(self, model, messages, config):
+        self.calls += 1
+        response = self.responses.pop(0)
+        if isinstance(response, BaseException):
+            raise response
+        return response
+
+
+def _options():
+    return PipelineOptions(
+        verbose=False, I_O=False, reset=False, demo=False, tool_workers=1
+    )
+
+
+def _tools(ran, kill_on=None):
+    def read(file_path, **kw):
+        if file_path == kill_on:
+            raise Killed()
+        ran.append(file_path)
+        return f"content of {file_path}"
+
+    return {"get_file_content": read}
+
+
+def _resume(run_id, llm, project_root):
+    state = pipeline.resume_session(load_checkpoint(run_id), llm, _options())
+    return pipeline.run_pipeline(None, llm, _options(), project_root, state=state)
+
+
+@pytest.fixture(autouse=True)
+def _outputs(tmp_path, monkeypatch):
+    monkeypatch.setenv("AICODEAGENT_OUTPUT_DIR", str(tmp_path / "__ai_outputs__"))
+
+
+def test_resume_after_committed_turn_does_not_requery(monkeypatch, tmp_path):
+    ran = []
+    monkeypatch.setattr(pipeline, "function_dict", _tools(ran))
+    first = _response(_call("get_file_content", file_path="a.py"))
+
+    llm = ScriptedLLMClient([first, Killed()])
+    with pytest.raises(Killed):
+        pipeline.run_pipeline("fix", llm, _options(), tmp_path)
+    run_id = sorted((tmp_path / "__ai_outputs__").glob("run_[0-9]*"))[-1].name
+
+    resumed = ScriptedLLMClient([_response(types.Part(text="Done."))])
+    result = _resume(run_id, resumed, tmp_path)
+
+    assert resumed.calls == 1  # only the turn that never completed
+    assert ran == ["a.py"]
+    assert [m.role for m in result["messages"]] == ["user", "model", "tool", "model"]
+    assert result["run_stats"]["read_ok"] == 1
+    # Ledger totals span both processes (the killed call was never recorded)
+    assert result["usage"]["calls"] == 2
+    assert load_checkpoint(run_id)["ended"]
+
+
+def test_resume_mid_dispatch_replays_journaled_tool_results(monkeypatch, tmp_path):
+    ran = []
+    monkeypatch.setattr(pipeline, "function_dict", _tools(ran, kill_on="b.py"))
+    first = _response(
+        _call("get_file_content", file_path="a.py"),
+        _call("get_file_content", file_path="b.py"),
+    )
+
+    with pytest.raises(Killed):
+        pipeline.run_pipeline("fix", ScriptedLLMClient([first]), _options(), tmp_path)
+    run_id = sorted((tmp_path / "__ai_outputs__").glob("run_[0-9]*"))[-1].name
+    checkpoint = load_checkpoint(run_id)
+    assert checkpoint["pending"] is not None and list(checkpoint["replay"]) == [0]
+
+    monkeypatch.setattr(pipeline, "function_dict", _tools(ran))
+    resumed = ScriptedLLMClient([_response(types.Part(text="Done."))])
+    result = _resume(run_id, resumed, tmp_path)
+
+    assert resumed.calls == 1  # the journaled response was not asked for again
+    assert ran == ["a.py", "b.py"]  # a.py replayed from the journal, not re-run
+    tool_msg = next(m for m in result["messages"] if m.role == "tool")
+    assert [str(p.function_response.response) for p in tool_msg.parts] == [
+        str({"result": "content of a.py"}),
+        str({"result": "content of b.py"}),
+    ]
+    assert result["run_stats"]["read_ok"] == 2
+
+
+class StreamingLLMClient(ScriptedLLMClient):
+    def stream(self, model, messages, config):
+        # One chunk per part, like a streamed turn
+        for part in self.complete(model, messages, config).candidates[0].content.parts:
+            yield _response(part)
+
+
+def test_resume_streamed_turn_replays_journaled_tool_results(monkeypatch, tmp_path):
+    ran = []
+    monkeypatch.setattr(pipeline, "function_dict", _tools(ran, kill_on="b.py"))
+    first = _response(
+        types.Part(text="Reading."),
+        _call("get_file_content", file_path="a.py"),
+        _call("get_file_content", file_path="b.py"),
+    )
+    options = PipelineOptions(
+        verbose=False, I_O=False, reset=False, demo=False, stream=True
+    )
+
+    # b.py dies after the stream ended, while the turn's tools are drained
+    with pytest.raises(Killed):
+        pipeline.run_pipeline("fix", StreamingLLMClient([first]), options, tmp_path)
+    run_id = sorted((tmp_path / "__ai_outputs__").glob("run_[0-9]*"))[-1].name
+    checkpoint = load_checkpoint(run_id)
+    assert checkpoint["pending"] is not None and list(checkpoint["replay"]) == [0]
+
+    monkeypatch.setattr(pipeline, "function_dict", _tools(ran))
+    resumed = ScriptedLLMClient([_response(types.Part(text="Done."))])
+    result = _resume(run_id, resumed, tmp_path)
+
+    assert resumed.calls == 1  # the streamed turn was not asked for again
+    assert ran == ["a.py", "b.py"]
+    assert [m.role for m in result["messages"]] == ["user", "model", "tool", "model"]
+    assert result["run_stats"]["read_ok"] == 2
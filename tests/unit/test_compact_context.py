@@ -0,0 +1,98 @@
+import json
+
+from google.genai import types
+
+from aicodeagent.functions.pipeline.compact_context import (
+    ContextCompactor,
+    estimate_tokens,
+)
+
+
+def _call(name, **args):
+    return types.Content(
+        role="model",
+        parts=[types.Part(function_call=types.FunctionCall(name=name, args=args))],
+    )
+
+
+def _result(name, text):
+    return types.Content(
+        role="tool",
+        parts=[types.Part.from_function_response(name=name, response={"result": text})],
+    )
+
+
+def _results_text(messages):
+    return [
+        p.function_response.response["result"]
+        for m in messages
+        for p in m.parts
+        if p.function_response
+    ]
+
+
+def test_superseded_reads_are_elided_and_stable():
+    messages = [
+        types.Content(role="user", parts=[types.Part(text="fix it")]),
+        _call("get_file_content", file_path="a.py"),
+        _result("get_file_content", "old a " * 100),
+        _call("get_file_content", file_path="b.py"),
+        _result("get_file_content", "b " * 100),
+        _call("get_file_content", file_path="a.py"),
+        _result("get_file_content", "new a " * 100),
+    ]
+    compactor = ContextCompactor(budget_tokens=100_000)
+    sent, dropped = compactor.compact(messages)
+
+    texts = _results_text(sent)
+    assert texts[0].startswith("[elided")
+    assert texts[1].startswith("b ")
+    assert texts[2].startswith("new a")
+    assert [d["target"] for d in dropped] == ["a.py"]
+    # Original history is untouched
+    assert _results_text(messages)[0].startswith("old a")
+
+    # Next call: nothing new dropped, and the same replacement objects are reused
+    again, dropped_again = compactor.compact(messages)
+    assert dropped_again == []
+    assert all(x is y for x, y in zip(sent, again))
+
+
+def test_budget_drops_old_results_but_keeps_latest_file_versions():
+    prev = {"header": {"run_id": "run_001"}, "proposals": [{"content": "x" * 4000}]}
+    messages = [
+        types.Content(
+            role="user",
+            parts=[
+                types.Part(
+                    text="PREV_RUN_JSON (context only)\n```json\n"
+                    + json.dumps(prev)
+                    + "\n```"
+                )
+            ],
+        ),
+        types.Content(role="user", parts=[types.Part(text="go")]),
+    ]
+    for i in range(6):
+        messages.append(_call("run_python_file", file_path=f"s{i}.py"))
+        messages.append(_result("run_python_file", "out " * 500))
+    messages.append(_call("get_file_content", file_path="main.py"))
+    messages.append(_result("get_file_content", "code " * 500))
+    messages.append(_call("get_files_info", directory="."))
+    messages.append(_result("get_files_info", "- main.py"))
+
+    compactor = ContextCompactor(budget_tokens=1000, keep_recent=1)
+    assert estimate_tokens(messages) > 1000
+    sent, dropped = compactor.compact(messages)
+
+    assert estimate_tokens(sent) <= 1000
+    texts = _results_text(sent)
+    # Latest read of main.py survives even though it is not in the recent turn
+    assert texts[-2].startswith("code ")
+    assert all(t.startswith("[elided") for t in texts[:6])
+    assert "Summarized by the context manager" in sent[0].parts[0].text
+    assert "xxxx" not in sent[0].parts[0].text
+    assert {d["reason"] for d in dropped} == {
+        "over token budget",
+        "summarized previous-run context",
+    }
@@ -0,0 +1,149 @@
+import json
+
+from google.genai import types
+
+from aicodeagent.llm_client import ContextCachingLLMClient, LLMClient
+
+
+def _size(obj):
+    if obj is None:
+        return 0
+    if isinstance(obj, list):
+        return sum(_size(o) for o in obj)
+    if isinstance(obj, str):
+        return len(obj)
+    return len(json.dumps(obj.model_dump(mode="json", exclude_none=True)))
+
+
+class FakeGenai(LLMClient):
+    """Counts the bytes of every uploaded prefix: requests and cache creations."""
+
+    def __init__(self):
+        self.uploaded = 0
+        self.caches_live = {}
+        self.created = 0
+        self.calls = []
+
+    # --- generate_content ---
+    def complete(self, model, messages, config):
+        self.uploaded += _size(messages)
+        self.uploaded += _size(config.system_instruction) + _size(config.tools)
+        self.calls.append((len(messages), config.cached_content))
+        if config.cached_content:
+            assert config.cached_content in self.caches_live
+            assert config.system_instruction is None and config.tools is None
+        return "ok"
+
+    # --- caches API ---
+    def create(self, model, config):
+        self.created += 1
+        self.uploaded += _size(config.contents) + _size(config.system_instruction)
+        self.uploaded += _size(config.tools)
+        name = f"cachedContents/{self.created}"
+        self.caches_live[name] = config
+        return types.CachedContent(name=name, model=model)
+
+    def update(self, name, config):
+        assert name in self.caches_live
+        return types.CachedContent(name=name)
+
+    def delete(self, name):
+        self.caches_live.pop(name)
+
+
+def _config():
+    tool = types.Tool(
+        function_declarations=[
+            types.FunctionDeclaration(name="get_files_info", description="x" * 2000)
+        ]
+    )
+    return types.GenerateContentConfig(
+        system_instruction="You are an agent. " * 500, tools=[tool]
+    )
+
+
+def _prev(text):
+    return types.Content(
+        role="user", parts=[types.Part(text="PREV_RUN_JSON\n```json\n" + text)]
+    )
+
+
+def _user(text):
+    return types.Content(role="user", parts=[types.Part(text=text)])
+
+
+class FakeClock:
+    now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_prefix_uploaded_once_and_reused():
+    fake = FakeGenai()
+    clock = FakeClock()
+    llm = ContextCachingLLMClient(
+        fake, caches=fake, min_prefix_tokens=1000, ttl=600, clock=clock
+    )
+    messages = [_prev("{...}" * 2000), _user("analyze")]
+
+    for turn in range(8):
+        llm.complete("gemini", messages, _config())
+        messages.append(_user(f"turn {turn}"))
+
+    cached_bytes = fake.uploaded
+    uncached = FakeGenai()
+    messages = [_prev("{...}" * 2000), _user("analyze")]
+    for turn in range(8):
+        uncached.complete("gemini", messages, _config())
+        messages.append(_user(f"turn {turn}"))
+
+    assert fake.created == 1 and llm.reused == 7
+    # The PREV_RUN_JSON message is never re-sent once cached
+    assert all(name == "cachedContents/1" for _, name in fake.calls)
+    assert fake.calls[0][0] == 1
+    assert cached_bytes * 4 < uncached.uploaded
+
+
+def test_ttl_refresh_and_invalidation():
+    fake = FakeGenai()
+    clock = FakeClock()
+    llm = ContextCachingLLMClient(
+        fake, caches=fake, min_prefix_tokens=1000, ttl=600, clock=clock
+    )
+    llm.complete("gemini", [_prev("a" * 8000), _user("go")], _config())
+
+    clock.now = 580  # inside the refresh margin
+    llm.complete("gemini", [_prev("a" * 8000), _user("go")], _config())
+    assert llm.refreshed == 1 and fake.created == 1
+
+    # A different previous-run block replaces (and deletes) the old handle
+    llm.complete("gemini", [_prev("b" * 8000), _user("go")], _config())
+    assert fake.created == 2
+    assert list(fake.caches_live) == ["cachedContents/2"]
+
+    llm.close()
+    assert fake.caches_live == {}
+
+
+def test_small_prefix_is_not_cached():
+    fake = FakeGenai()
+    llm = ContextCachingLLMClient(fake, caches=fake, min_prefix_tokens=100_000)
+    llm.complete("gemini", [_user("hello")], _config())
+    assert fake.created == 0
+    assert fake.calls == [(1, None)]
+
+
+def test_rejected_prefix_falls_back_uncached():
+    class RejectingGenai(FakeGenai):
+        def create(self, model, config):
+            self.created += 1
+            raise ValueError("400 INVALID_ARGUMENT: cached content too small")
+
+    fake = RejectingGenai()
+    llm = ContextCachingLLMClient(fake, caches=fake, min_prefix_tokens=10)
+    for _ in range(3):
+        llm.complete("gemini", [_prev("a" * 800), _user("go")], _config())
+    # Tried once, then remembered as rejected
+    assert fake.created == 1
+    assert fake.calls == [(2, None)] * 3
@@ -0,0 +1,83 @@
+import threading
+import time
+from pathlib import Path
+
+from aicodeagent.daemon import AgentDaemon, ping, request
+from aicodeagent.llm_client import FileLLMClient, LLMClient
+
+CANNED_DIR = Path(__file__).parents[1] / "integration" / "data" / "canned_llm"
+
+
+class GatedLLMClient(LLMClient):
+    """Blocks every call until `gate` is set, then answers from canned files."""
+
+    def __init__(self):
+        self.inner = FileLLMClient(CANNED_DIR)
+        self.gate = threading.Event()
+        self.entered = threading.Event()
+
+    def complete(self, model, messages, config):
+        self.entered.set()
+        self.gate.wait(10)
+        return self.inner.complete(model, messages, config)
+
+
+def _start(tmp_path, monkeypatch, llm, queue_size=4):
+    monkeypatch.setenv("AICODEAGENT_OUTPUT_DIR", str(tmp_path / "__ai_outputs__"))
+    sock = str(tmp_path / "agent.sock")
+    daemon = AgentDaemon(llm, sock, tmp_path, queue_size=queue_size)
+    daemon.start()
+    thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+    thread.start()
+    return daemon, sock, thread
+
+
+def test_daemon_streams_progress_and_reuses_client(tmp_path, monkeypatch):
+    llm = FileLLMClient(CANNED_DIR)
+    daemon, sock, thread = _start(tmp_path, monkeypatch, llm)
+
+    assert ping(sock)["queued"] == 0
+    for expected_run in ("run_001", "run_002"):
+        events = list(request(sock, {"op": "run", "prompt": "hello"}, timeout=10))
+        names = [e["event"] for e in events]
+        assert names[:2] == ["queued", "started"]
+        assert names[-1] == "done"
+        assert events[-1]["run_id"] == expected_run
+        output = "".join(e["text"] for e in events if e["event"] == "output")
+        assert "Hello there!" in output
+    assert daemon.llm is llm
+
+    assert [e["event"] for e in request(sock, {"op": "shutdown"})] == ["bye"]
+    thread.join(5)
+    assert not thread.is_alive()
+    assert ping(sock) is None
+
+
+def test_full_queue_rejects_requests(tmp_path, monkeypatch):
+    llm = GatedLLMClient()
+    daemon, sock, thread = _start(tmp_path, monkeypatch, llm, queue_size=1)
+
+    results = {}
+
+    def submit(name):
+        results[name] = list(request(sock, {"op": "run", "prompt": "hello"}))
+
+    running = threading.Thread(target=submit, args=("running",))
+    running.start()
+    assert llm.entered.wait(5)  # first job is inside the model call
+    queued = threading.Thread(target=submit, args=("queued",))
+    queued.start()
+    while daemon.jobs.qsize() < 1:
+        time.sleep(0.01)
+
+    rejected = list(request(sock, {"op": "run", "prompt": "hello"}, timeout=5))
+    assert rejected == [{"event": "rejected", "reason": "queue full"}]
+
+    llm.gate.set()
+    running.join(10)
+    queued.join(10)
+    assert results["running"][-1]["event"] == "done"
+    assert results["queued"][-1]["event"] == "done"
+
+    list(request(sock, {"op": "shutdown"}))
+    thread.join(5)
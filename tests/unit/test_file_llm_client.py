@@ -0,0 +1,58 @@
+import hashlib
+import json
+
+from google.genai import types
+
+import aicodeagent.llm_client as llm_client
+from aicodeagent.llm_client import FileLLMClient
+
+
+def _reference_hash(messages):
+    # Full recomputation, as done by tools/save_canned.py
+    concat = ""
+    for m in messages:
+        concat += m.role
+        for p in m.parts:
+            if p.text:
+                concat += p.text
+    return hashlib.sha1(concat.encode("utf-8")).hexdigest()
+
+
+def _msg(role, text):
+    return types.Content(role=role, parts=[types.Part(text=text)])
+
+
+def test_rolling_hash_matches_full_hash(tmp_path):
+    llm = FileLLMClient(tmp_path)
+    messages = []
+    for i in range(16):
+        messages.append(_msg("user" if i % 2 == 0 else "model", f"turn {i}"))
+        assert llm._hash_prompt(messages) == _reference_hash(messages)
+
+    # A rewritten history (new objects) is rehashed from the divergence point
+    rewritten = messages[:3] + [_msg("user", "different")]
+    assert llm._hash_prompt(rewritten) == _reference_hash(rewritten)
+    assert llm._hash_prompt(messages) == _reference_hash(messages)
+
+
+def test_responses_decoded_once(tmp_path, monkeypatch):
+    messages = [_msg("user", "hello")]
+    resp = types.GenerateContentResponse(
+        candidates=[types.Candidate(content=_msg("model", "hi"))]
+    )
+    path = tmp_path / f"response_{_reference_hash(messages)}.json"
+    path.write_text(json.dumps(resp.model_dump(mode="json", exclude_none=True)))
+
+    loads = []
+    real_load = json.load
+
+    def counting_load(f):
+        loads.append(f.name)
+        return real_load(f)
+
+    monkeypatch.setattr(llm_client.json, "load", counting_load)
+
+    llm = FileLLMClient(tmp_path)
+    for _ in range(5):
+        assert llm.complete("m", messages, None).text == "hi"
+    assert len(loads) == 1
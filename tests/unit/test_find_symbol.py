@@ -0,0 +1,120 @@
+import os
+import sys
+
+from aicodeagent.functions.fs.clear_output_dirs import clear_output_dirs
+from aicodeagent.functions.fs.reset_test_env import reset_test_env
+from aicodeagent.functions.llm_calls.find_symbol import find_symbol
+from aicodeagent.functions.pipeline.init_run_session import init_run_session
+
+# === CONFIGURATION ===
+TEST_DIR = "__test_env__"
+reset_test_env(TEST_DIR)
+run_id = init_run_session()
+
+# Paths ai_outputs
+RUN_DIR = os.path.join("__ai_outputs__", run_id)
+
+# === SETUP: small package ===
+# __test_env__/
+# ├─ broken.py (syntax error)
+# └─ pkg/
+#     ├─ __init__.py
+#     └─ calc.py
+CALC = '''import functools
+
+
+class Calculator(object):
+    """Evaluate expressions."""
+
+    def __init__(self):
+        self.ops = {}
+
+    @functools.lru_cache
+    def evaluate(self, expression: str) -> float:
+        tokens = expression.split()
+        return float(tokens[0])
+
+
+async def parse_args(argv, *, strict=False):
+    def helper():
+        return argv
+    return helper()
+'''
+os.makedirs(os.path.join(TEST_DIR, "pkg"), exist_ok=True)
+with open(os.path.join(TEST_DIR, "pkg", "__init__.py"), "w", encoding="utf-8") as f:
+    f.write("")
+with open(os.path.join(TEST_DIR, "pkg", "calc.py"), "w", encoding="utf-8") as f:
+    f.write(CALC)
+with open(os.path.join(TEST_DIR, "broken.py"), "w", encoding="utf-8") as f:
+    f.write("def broken(:\n")
+
+
+# === HELPERS ===
+def print_test_result(n, description, result):
+    print(f"\n▶️ Test {n}: {description}")
+    print(result)
+
+
+def read_tail(path, n=20):
+    if not os.path.isfile(path):
+        return "<missing>"
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        lines = f.readlines()
+    return "".join(lines[-n:]).rstrip()
+
+
+# === TESTS ===
+print("\n==== find_symbol TESTS ====\n")
+
+# 1) Qualified method name: span includes the decorator, signature is kept
+res1 = find_symbol(
+    working_directory=TEST_DIR,
+    name="Calculator.evaluate",
+    run_id=run_id,
+    function_args={"name": "Calculator.evaluate"},
+)
+print_test_result(1, "method by qualified name", res1)
+assert res1.splitlines()[0] == (
+    "- pkg/calc.py:10-13 method Calculator.evaluate: "
+    "def evaluate(self, expression: str) -> float"
+)
+assert "[not indexed, syntax errors: broken.py]" in res1
+assert "Function find_symbol" in read_tail(os.path.join(RUN_DIR, "actions.log"))
+
+# 2) Glob, kind filter, nested and module-qualified names
+res2 = find_symbol(working_directory=TEST_DIR, name="parse_*", run_id=run_id)
+print_test_result(2, "glob", res2)
+assert (
+    "- pkg/calc.py:16-19 function parse_args: async def parse_args(argv, *, strict=False)"
+    in res2
+)
+res3 = find_symbol(
+    working_directory=TEST_DIR, name="pkg.calc.Calculator", run_id=run_id
+)
+print_test_result(3, "module-qualified class", res3)
+assert res3.startswith("- pkg/calc.py:4-13 class Calculator: class Calculator(object)")
+res4 = find_symbol(
+    working_directory=TEST_DIR, name="helper", kind="function", run_id=run_id
+)
+print_test_result(4, "nested function", res4)
+assert "function parse_args.helper" in res4
+
+# 3) Incremental: only the edited file is parsed again
+with open(os.path.join(TEST_DIR, "broken.py"), "w", encoding="utf-8") as f:
+    f.write("def fixed():\n    pass\n")
+res5 = find_symbol(working_directory=TEST_DIR, name="fixed", run_id=run_id)
+print_test_result(5, "edited file re-parsed", res5)
+assert res5 == "- broken.py:1-2 function fixed: def fixed()"
+assert "parsed: 1" in read_tail(os.path.join(RUN_DIR, "actions.log"))
+
+# 4) No match / ERROR: unknown kind
+res6 = find_symbol(working_directory=TEST_DIR, name="Nope", run_id=run_id)
+print_test_result(6, "no match", res6)
+assert res6 == "No symbols match 'Nope'"
+res7 = find_symbol(working_directory=TEST_DIR, name="x", kind="var", run_id=run_id)
+print_test_result(7, "unknown kind", res7)
+assert res7.startswith("Error: Unknown kind 'var'")
+
+# Clear ai_outputs subdirectories if requested
+if "--clear" in sys.argv:
+    clear_output_dirs()
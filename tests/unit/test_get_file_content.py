@@ -1,6 +1,7 @@
 import os
 import sys
 
+from aicodeagent.functions.core.line_index import read_lines
 from aicodeagent.functions.fs.clear_output_dirs import clear_output_dirs
 from aicodeagent.functions.fs.reset_test_env import reset_test_env
 from aicodeagent.functions.llm_calls.get_file_content import get_file_content
@@ -65,6 +66,77 @@ res3 = get_file_content(
 )
 print_test_result(3, "path escape attempt (should return error)", res3)
 
+# 4) Large file: the default read stops at a line boundary with a footer
+big_path = os.path.join(TEST_DIR, "big.txt")
+with open(big_path, "w", encoding="utf-8") as f:
+    f.writelines(f"line {n:06d}\n" for n in range(1, 200001))
+res4 = get_file_content(working_directory=TEST_DIR, file_path="big.txt", run_id=run_id)
+print_test_result(4, "large file, first page", res4[-120:])
+assert res4.startswith("line 000001\n")
+assert res4.endswith(
+    '[File "big.txt": lines 1-833 of 200000 lines, 2400000 bytes; '
+    "continue with start_line=834]"
+)
+
+# 5) Line range deep inside the file, served from the cached index
+res5 = get_file_content(
+    working_directory=TEST_DIR,
+    file_path="big.txt",
+    run_id=run_id,
+    start_line=150000,
+    end_line=150002,
+)
+print_test_result(5, "lines 150000-150002", res5)
+assert res5 == (
+    "line 150000\nline 150001\nline 150002\n\n"
+    '[File "big.txt": lines 150000-150002 of 200000 lines, 2400000 bytes]'
+)
+
+# 6) Byte range
+res6 = get_file_content(
+    working_directory=TEST_DIR,
+    file_path="big.txt",
+    run_id=run_id,
+    byte_offset=12,
+    max_bytes=12,
+)
+print_test_result(6, "bytes 12-24", res6)
+assert res6.startswith("line 000002\n\n")
+assert "continue with byte_offset=24" in res6
+
+# 7) Range without the total: only the bytes up to the range are indexed
+range_path = os.path.join(TEST_DIR, "range.txt")
+with open(range_path, "w", encoding="utf-8") as f:
+    f.writelines(f"line {n:06d}\n" for n in range(1, 200001))
+text7, meta7 = read_lines(range_path, 10, 11, count_total=False)
+print_test_result(7, "lines 10-11 without counting the file", meta7)
+assert text7 == "line 000010\nline 000011\n"
+assert meta7["line_end"] == 11 and meta7["total_lines"] is None
+_, tail7 = read_lines(range_path, 199999, 200005, count_total=False)
+assert tail7["line_end"] == 200000 and tail7["total_lines"] == 200000
+
+# 8) Range past the end of a short file: no hint pointing past the end
+with open(os.path.join(TEST_DIR, "short.txt"), "w", encoding="utf-8") as f:
+    f.write("a\nb\nc\n")
+res8 = get_file_content(
+    working_directory=TEST_DIR,
+    file_path="short.txt",
+    run_id=run_id,
+    start_line=1,
+    end_line=20,
+)
+print_test_result(8, "lines 1-20 of a 3-line file", res8)
+assert res8 == 'a\nb\nc\n\n[File "short.txt": lines 1-3 of 3 lines, 6 bytes]'
+res8b = get_file_content(
+    working_directory=TEST_DIR,
+    file_path="short.txt",
+    run_id=run_id,
+    start_line=5,
+    end_line=8,
+)
+print_test_result(8, "start_line past the end", res8b)
+assert res8b == "Error: start_line=5 is past the end of the file (3 lines)"
+
 # Clear ai_outputs subdirectories if requested
 if "--clear" in sys.argv:
     clear_output_dirs()
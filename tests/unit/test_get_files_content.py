@@ -0,0 +1,112 @@
+import os
+import sys
+
+from aicodeagent.functions.fs.clear_output_dirs import clear_output_dirs
+from aicodeagent.functions.fs.reset_test_env import reset_test_env
+from aicodeagent.functions.llm_calls.get_files_content import get_files_content
+from aicodeagent.functions.pipeline.init_run_session import init_run_session
+
+# === CONFIGURATION ===
+TEST_DIR = "__test_env__"
+reset_test_env(TEST_DIR)
+run_id = init_run_session()
+
+# Paths ai_outputs
+RUN_DIR = os.path.join("__ai_outputs__", run_id)
+
+# === SETUP: small package ===
+# __test_env__/
+# ├─ example.txt
+# └─ pkg/
+#     ├─ __init__.py
+#     ├─ module.py
+#     ├─ __pycache__/module.pyc
+#     └─ sub/long.py (500 lines)
+os.makedirs(os.path.join(TEST_DIR, "pkg", "sub"), exist_ok=True)
+os.makedirs(os.path.join(TEST_DIR, "pkg", "__pycache__"), exist_ok=True)
+with open(os.path.join(TEST_DIR, "example.txt"), "w", encoding="utf-8") as f:
+    f.write("print('hello world')\n")
+with open(os.path.join(TEST_DIR, "pkg", "__init__.py"), "w", encoding="utf-8") as f:
+    f.write("")
+with open(os.path.join(TEST_DIR, "pkg", "module.py"), "w", encoding="utf-8") as f:
+    f.write("# module file\n")
+with open(os.path.join(TEST_DIR, "pkg", "__pycache__", "module.pyc"), "wb") as f:
+    f.write(b"\0")
+with open(os.path.join(TEST_DIR, "pkg", "sub", "long.py"), "w", encoding="utf-8") as f:
+    f.writelines(f"value_{n:03d} = {n}\n" for n in range(500))
+
+
+# === HELPERS ===
+def print_test_result(n, description, result):
+    print(f"\n▶️ Test {n}: {description}")
+    print(result)
+
+
+def read_tail(path, n=20):
+    if not os.path.isfile(path):
+        return "<missing>"
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        lines = f.readlines()
+    return "".join(lines[-n:]).rstrip()
+
+
+# === TESTS ===
+print("\n==== get_files_content TESTS ====\n")
+
+# 1) Glob + plain path in one call, one log entry
+res1 = get_files_content(
+    working_directory=TEST_DIR,
+    paths=["pkg/**/*.py", "example.txt"],
+    run_id=run_id,
+    max_chars_per_file=200,
+    function_args={"paths": ["pkg/**/*.py", "example.txt"]},
+)
+print_test_result(1, "package glob + plain file", res1)
+headers = [line for line in res1.splitlines() if line.startswith("=====")]
+assert headers == [
+    "===== pkg/__init__.py (0 lines, 0 bytes) =====",
+    "===== pkg/module.py (1 lines, 14 bytes) =====",
+    "===== pkg/sub/long.py (500 lines, 7890 bytes) =====",
+    "===== example.txt (1 lines, 21 bytes) =====",
+]
+assert (
+    "continue with get_file_content(file_path='pkg/sub/long.py', start_line=15)" in res1
+)
+actions = read_tail(os.path.join(RUN_DIR, "actions.log"), n=200)
+assert actions.count("Function get_files_content") == 1
+
+# 2) Total budget: later files are listed as not read
+res2 = get_files_content(
+    working_directory=TEST_DIR,
+    paths=["pkg/sub/long.py", "example.txt"],
+    run_id=run_id,
+    max_total_chars=300,
+)
+print_test_result(2, "total budget exhausted by the first file", res2)
+assert "[not read, total budget or file limit reached: example.txt]" in res2
+
+# 3) ERROR: glob escaping the working directory
+res3 = get_files_content(working_directory=TEST_DIR, paths=["../*.py"], run_id=run_id)
+print_test_result(3, "glob outside the sandbox", res3)
+assert res3.startswith("Error: Invalid filename")
+
+# 4) ERROR: nothing matches
+res4 = get_files_content(working_directory=TEST_DIR, paths=["*.rs"], run_id=run_id)
+print_test_result(4, "no match", res4)
+assert res4 == "Error: No files match: *.rs"
+
+# 5) A first line longer than the per-file budget continues by byte offset
+with open(os.path.join(TEST_DIR, "wide.txt"), "w", encoding="utf-8") as f:
+    f.write("x" * 302 + "\nsecond\n")
+res5 = get_files_content(
+    working_directory=TEST_DIR, paths=["wide.txt"], run_id=run_id, max_chars_per_file=50
+)
+print_test_result(5, "long first line cut by max_chars_per_file", res5)
+assert res5 == (
+    "===== wide.txt (2 lines, 310 bytes) =====\n" + "x" * 50 + "\n[line 1 shown in "
+    "part; continue with get_file_content(file_path='wide.txt', byte_offset=50)]"
+)
+
+# Clear ai_outputs subdirectories if requested
+if "--clear" in sys.argv:
+    clear_output_dirs()
@@ -80,6 +80,52 @@ res4 = get_files_info(
 )
 print_test_result(4, "non-existent folder in test_env", res4)
 
+# === SETUP: Nested tree for recursive listings ===
+# __test_env__/pkg/sub/deep.py, __test_env__/pkg/__pycache__/module.pyc
+os.makedirs(os.path.join(TEST_DIR, "pkg", "sub"), exist_ok=True)
+os.makedirs(os.path.join(TEST_DIR, "pkg", "__pycache__"), exist_ok=True)
+with open(os.path.join(TEST_DIR, "pkg", "sub", "deep.py"), "w", encoding="utf-8") as f:
+    f.write("a = 1\nb = 2\n")
+with open(os.path.join(TEST_DIR, "pkg", "__pycache__", "module.pyc"), "wb") as f:
+    f.write(b"\0")
+
+# 5) SUCCESS: whole tree in one call, __pycache__ skipped, with line counts
+res5 = get_files_info(
+    working_directory=TEST_DIR,
+    run_id=run_id,
+    directory=".",
+    recursive=True,
+    line_counts=True,
+    function_args={"working_directory": TEST_DIR, "recursive": True},
+)
+print_test_result(5, "recursive listing with line counts", res5)
+assert "- pkg/sub/deep.py: file_size=12 bytes, is_dir=False, lines=2" in res5
+assert "__pycache__" not in res5
+
+# 6) SUCCESS: include glob + depth limit
+res6 = get_files_info(
+    working_directory=TEST_DIR,
+    run_id=run_id,
+    include=["*.py"],
+    max_depth=2,
+    function_args={"working_directory": TEST_DIR, "include": ["*.py"]},
+)
+print_test_result(6, "*.py files, two levels deep", res6)
+assert res6.splitlines() == ["- pkg/module.py: file_size=14 bytes, is_dir=False"]
+
+# 7) SUCCESS: pagination, the next page resumes at the given cursor
+page1 = get_files_info(
+    working_directory=TEST_DIR, run_id=run_id, recursive=True, page_size=2
+)
+page2 = get_files_info(
+    working_directory=TEST_DIR, run_id=run_id, recursive=True, page_size=2, cursor=2
+)
+print_test_result(7, "paged recursive listing", page1 + "\n" + page2)
+assert page1.splitlines()[-1] == "[more entries: call again with cursor=2]"
+assert page1.splitlines()[:2] + page2.splitlines()[:2] == [
+    line.split(", lines=")[0] for line in res5.splitlines()[:4]
+]
+
 # Clear ai_outputs se richiesto
 if "--clear" in sys.argv:
     clear_output_dirs()
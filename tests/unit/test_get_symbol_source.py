@@ -0,0 +1,99 @@
+import os
+import sys
+
+from aicodeagent.functions.fs.clear_output_dirs import clear_output_dirs
+from aicodeagent.functions.fs.reset_test_env import reset_test_env
+from aicodeagent.functions.llm_calls.get_symbol_source import get_symbol_source
+from aicodeagent.functions.pipeline.init_run_session import init_run_session
+
+# === CONFIGURATION ===
+TEST_DIR = "__test_env__"
+reset_test_env(TEST_DIR)
+run_id = init_run_session()
+
+# Paths ai_outputs
+RUN_DIR = os.path.join("__ai_outputs__", run_id)
+
+# === SETUP: two modules defining `run` ===
+# __test_env__/
+# └─ pkg/
+#     ├─ calc.py
+#     ├─ cli.py
+#     └─ big.py (one 1000-line function)
+os.makedirs(os.path.join(TEST_DIR, "pkg"), exist_ok=True)
+with open(os.path.join(TEST_DIR, "pkg", "calc.py"), "w", encoding="utf-8") as f:
+    f.write(
+        "class Calculator:\n"
+        "    @staticmethod\n"
+        "    def evaluate(expression):\n"
+        "        return eval(expression)\n"
+        "\n"
+        "\n"
+        "def run():\n"
+        "    return Calculator.evaluate('1 + 1')\n"
+    )
+with open(os.path.join(TEST_DIR, "pkg", "cli.py"), "w", encoding="utf-8") as f:
+    f.write("def run():\n    print('cli')\n")
+with open(os.path.join(TEST_DIR, "pkg", "big.py"), "w", encoding="utf-8") as f:
+    f.write("def big():\n")
+    f.writelines(f"    value_{n:03d} = {n}\n" for n in range(1000))
+
+
+# === HELPERS ===
+def print_test_result(n, description, result):
+    print(f"\n▶️ Test {n}: {description}")
+    print(result)
+
+
+def read_tail(path, n=20):
+    if not os.path.isfile(path):
+        return "<missing>"
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        lines = f.readlines()
+    return "".join(lines[-n:]).rstrip()
+
+
+# === TESTS ===
+print("\n==== get_symbol_source TESTS ====\n")
+
+# 1) One method, decorator included, nothing else from the file
+res1 = get_symbol_source(
+    working_directory=TEST_DIR,
+    symbol="Calculator.evaluate",
+    run_id=run_id,
+    function_args={"symbol": "Calculator.evaluate"},
+)
+print_test_result(1, "method source", res1)
+assert res1 == (
+    "===== pkg/calc.py:2-4 method Calculator.evaluate =====\n"
+    "    @staticmethod\n"
+    "    def evaluate(expression):\n"
+    "        return eval(expression)\n"
+)
+assert "Function get_symbol_source" in read_tail(os.path.join(RUN_DIR, "actions.log"))
+
+# 2) Ambiguous name lists the candidates; file_path picks one
+res2 = get_symbol_source(working_directory=TEST_DIR, symbol="run", run_id=run_id)
+print_test_result(2, "ambiguous name", res2)
+assert res2.startswith("Error: 'run' matches 2 symbols")
+assert "- pkg/cli.py:1-2 function run: def run()" in res2
+res3 = get_symbol_source(
+    working_directory=TEST_DIR, symbol="run", file_path="pkg/cli.py", run_id=run_id
+)
+print_test_result(3, "disambiguated by file_path", res3)
+assert res3 == "===== pkg/cli.py:1-2 function run =====\ndef run():\n    print('cli')\n"
+
+# 3) Long definition: truncated with the range that continues it
+res4 = get_symbol_source(working_directory=TEST_DIR, symbol="big", run_id=run_id)
+print_test_result(4, "long function", res4[-200:])
+assert res4.startswith("===== pkg/big.py:1-1001 function big =====\ndef big():\n")
+assert "start_line=" in res4 and res4.endswith("end_line=1001)]")
+
+# 4) ERROR: unknown symbol
+res5 = get_symbol_source(working_directory=TEST_DIR, symbol="nope", run_id=run_id)
+print_test_result(5, "unknown symbol", res5)
+assert res5 == "Error: No symbol matches 'nope'"
+
+# Clear ai_outputs subdirectories if requested
+if "--clear" in sys.argv:
+    clear_output_dirs()
@@ -0,0 +1,121 @@
+import asyncio
+import random
+import threading
+import time
+
+import pytest
+
+from aicodeagent.llm_client import (
+    AsyncHedgedLLMClient,
+    AsyncLLMClient,
+    HedgedLLMClient,
+    HedgePolicy,
+    LLMClient,
+)
+
+
+class LongTailLLMClient(LLMClient):
+    """Fake backend: request n sleeps `delay(n)` seconds, requests in `fail` raise."""
+
+    def __init__(self, delay, fail=()):
+        self.delay = delay
+        self.fail = set(fail)
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def complete(self, model, messages, config):
+        with self._lock:
+            self.requests += 1
+            n = self.requests
+        time.sleep(self.delay(n))
+        if n in self.fail:
+            raise RuntimeError(f"request {n} failed")
+        return f"response {n}"
+
+
+def _every_tenth_slow(n):
+    return 1.0 if n % 10 == 0 else 0.01
+
+
+def test_hedge_cuts_the_tail():
+    inner = LongTailLLMClient(_every_tenth_slow)
+    policy = HedgePolicy(percentile=0.9, min_samples=5, max_extra=0.2)
+    llm = HedgedLLMClient(inner, policy)
+
+    latencies = []
+    for _ in range(40):
+        t0 = time.perf_counter()
+        llm.complete("m", [], None)
+        latencies.append(time.perf_counter() - t0)
+
+    stats = llm.stats()
+    assert stats["calls"] == 40
+    assert stats["hedge_wins"] >= 3
+    # Extra volume stays within the 20% cap
+    assert stats["hedged"] <= 0.2 * 40
+    assert inner.requests == 40 + stats["hedged"]
+    # Only the warm-up slow call (before any hedging) is left in the tail
+    assert sum(t > 0.5 for t in latencies) <= 1
+
+
+def test_hedge_budget_is_enforced():
+    inner = LongTailLLMClient(lambda n: 0.2 if n % 2 == 0 else 0.01)
+    llm = HedgedLLMClient(
+        inner, HedgePolicy(percentile=0.5, min_samples=2, max_extra=0)
+    )
+    for _ in range(6):
+        llm.complete("m", [], None)
+    # No budget: slow calls are waited out instead of hedged
+    assert llm.stats()["hedged"] == 0
+    assert llm.stats()["over_budget"] > 0
+    assert inner.requests == 6
+
+
+def test_failed_hedge_falls_back_to_primary():
+    # Request 1 is slow but succeeds; its hedge (2) and request 3 fail fast
+    inner = LongTailLLMClient(lambda n: 0.3 if n == 1 else 0.01, fail={2, 3})
+    policy = HedgePolicy(min_samples=1, max_extra=1.0)
+    policy.latencies.extend([0.05] * 10)
+    llm = HedgedLLMClient(inner, policy)
+
+    assert llm.complete("m", [], None) == "response 1"
+    assert llm.stats()["hedged"] == 1 and llm.stats()["hedge_wins"] == 0
+
+    # A fast failure is raised as is: hedging is for latency, not for errors
+    with pytest.raises(RuntimeError):
+        llm.complete("m", [], None)
+    assert inner.requests == 3
+
+
+class AsyncLongTail(AsyncLLMClient):
+    def __init__(self):
+        self.cancelled = 0
+        self.requests = 0
+
+    async def complete(self, model, messages, config):
+        self.requests += 1
+        delay = 1.0 if self.requests % 5 == 0 else random.uniform(0.005, 0.01)
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return "ok"
+
+
+def test_async_hedge_cancels_the_loser():
+    inner = AsyncLongTail()
+    llm = AsyncHedgedLLMClient(
+        inner, HedgePolicy(percentile=0.75, min_samples=3, max_extra=0.5)
+    )
+
+    async def run():
+        for _ in range(12):
+            await llm.complete("m", [], None)
+
+    t0 = time.perf_counter()
+    asyncio.run(run())
+    # Slow requests after warm-up are hedged and cancelled once the hedge wins
+    assert llm.stats()["hedge_wins"] >= 1
+    assert inner.cancelled == llm.stats()["hedged"]
+    assert time.perf_counter() - t0 < 1.5
@@ -0,0 +1,128 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from aicodeagent.functions.core import interpreter_pool
+from aicodeagent.functions.core.interpreter_pool import InterpreterPool, run_python
+
+
+@pytest.fixture
+def pool():
+    p = InterpreterPool(size=1, max_runs=3)
+    yield p
+    p.close()
+
+
+def _script(tmp_path, name, code):
+    path = tmp_path / name
+    path.write_text(code, encoding="utf-8")
+    return str(path)
+
+
+def test_run_matches_a_fresh_interpreter(pool, tmp_path):
+    path = _script(
+        tmp_path,
+        "show.py",
+        "import os, sys\n"
+        "print(sys.argv[1:], os.getcwd(), os.environ.get('BENCH_X'), __name__)\n"
+        "print('oops', file=sys.stderr)\n"
+        "sys.exit(3)\n",
+    )
+    cwd = tmp_path / "cwd"
+    cwd.mkdir()
+    env = dict(os.environ, BENCH_X="1")
+
+    warm = pool.run(path, cwd=cwd, argv=["a"], env=env)
+    cold = subprocess.run(
+        [sys.executable, path, "a"], cwd=cwd, env=env, capture_output=True, text=True
+    )
+    assert (warm.returncode, warm.stdout, warm.stderr) == (
+        cold.returncode,
+        cold.stdout,
+        cold.stderr,
+    )
+    assert warm.stdout == f"['a'] {cwd} 1 __main__\n"
+
+
+def test_runs_do_not_share_state(pool, tmp_path):
+    helper = tmp_path / "helper.py"
+    path = _script(
+        tmp_path,
+        "main.py",
+        "import helper, sys\nprint(helper.VALUE, 'json' in sys.modules)\n",
+    )
+    helper.write_text("VALUE = 1\n", encoding="utf-8")
+    assert pool.run(path, cwd=tmp_path).stdout == "1 False\n"
+    # The edited sibling module is imported again, not taken from a previous run
+    helper.write_text("VALUE = 2\nimport json\n", encoding="utf-8")
+    assert pool.run(path, cwd=tmp_path).stdout == "2 True\n"
+    helper.write_text("VALUE = 3\n", encoding="utf-8")
+    assert pool.run(path, cwd=tmp_path).stdout == "3 False\n"
+
+
+def test_traceback_and_exit_code(pool, tmp_path):
+    path = _script(tmp_path, "boom.py", "def f():\n    1 / 0\n\nf()\n")
+    result = pool.run(path, cwd=tmp_path)
+    assert result.returncode == 1
+    assert result.stderr.startswith("Traceback (most recent call last):\n")
+    assert f'File "{path}", line 4, in <module>' in result.stderr
+    assert result.stderr.endswith("ZeroDivisionError: division by zero\n")
+
+
+def test_timeout_kills_the_process_group(pool, tmp_path):
+    marker = tmp_path / "survived"
+    _script(
+        tmp_path,
+        "grandchild.py",
+        f"import time\ntime.sleep(2)\nopen({str(marker)!r}, 'w').close()\n",
+    )
+    path = _script(
+        tmp_path,
+        "hang.py",
+        "import subprocess, sys, time\n"
+        "subprocess.Popen([sys.executable, 'grandchild.py'])\n"
+        "print('started', flush=True)\n"
+        "time.sleep(30)\n",
+    )
+    with pytest.raises(subprocess.TimeoutExpired) as exc:
+        pool.run(path, cwd=tmp_path, timeout=1)
+    assert exc.value.stdout == "started\n"
+    # The worker survives its child's kill and serves the next script
+    assert pool.run(_script(tmp_path, "ok.py", "print('ok')\n"), cwd=tmp_path).stdout
+    assert pool.idle
+    time.sleep(2.5)
+    assert not marker.exists()
+
+
+def test_output_limit_kill_reported_late(pool, tmp_path, monkeypatch):
+    # The server's exit report misses the grace period after the kill
+    monkeypatch.setattr(interpreter_pool, "KILL_GRACE", 0)
+    path = _script(
+        tmp_path,
+        "flood.py",
+        "import sys\nwhile True:\n    sys.stdout.write('x' * 4096)\n",
+    )
+    result = pool.run(path, cwd=tmp_path, max_output_bytes=1 << 16)
+    assert result.limit_exceeded
+    assert result.returncode == -9 and result.usage is None
+    # That server is dropped, a fresh one serves the next script
+    assert not pool.idle
+    assert pool.run(_script(tmp_path, "ok.py", "print('ok')\n"), cwd=tmp_path).stdout
+
+
+def test_workers_are_recycled(pool, tmp_path):
+    path = _script(tmp_path, "ppid.py", "import os\nprint(os.getppid())\n")
+    servers = [pool.run(path, cwd=tmp_path).stdout for _ in range(4)]
+    # max_runs=3: the fourth script runs on a new fork server
+    assert len(set(servers[:3])) == 1
+    assert servers[3] != servers[0]
+
+
+def test_pool_can_be_disabled(monkeypatch, tmp_path):
+    path = _script(tmp_path, "ppid.py", "import os\nprint(os.getppid())\n")
+    monkeypatch.setenv(interpreter_pool.ENV_WARM_POOL, "0")
+    result = run_python(path, cwd=tmp_path)
+    assert result.stdout == f"{os.getpid()}\n"
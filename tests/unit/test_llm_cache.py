@@ -0,0 +1,85 @@
+from google.genai import types
+
+from aicodeagent.llm_client import CachingLLMClient, LLMClient
+
+
+class CountingLLMClient(LLMClient):
+    """Fake backend answering with a padded echo of the last message."""
+
+    def __init__(self, pad=0):
+        self.calls = 0
+        self.pad = pad
+
+    def complete(self, model, messages, config):
+        self.calls += 1
+        text = f"echo {len(messages)} " + "x" * self.pad
+        return types.GenerateContentResponse(
+            candidates=[
+                types.Candidate(
+                    content=types.Content(role="model", parts=[types.Part(text=text)])
+                )
+            ]
+        )
+
+
+def _user(text):
+    return types.Content(role="user", parts=[types.Part(text=text)])
+
+
+def _config(system="sys"):
+    return types.GenerateContentConfig(system_instruction=system)
+
+
+def test_cache_hits_and_keys(tmp_path):
+    inner = CountingLLMClient()
+    llm = CachingLLMClient(inner, tmp_path / "cache")
+
+    msgs = [_user("analyze")]
+    first = llm.complete("m", msgs, _config())
+    again = llm.complete("m", msgs, _config())
+    assert inner.calls == 1
+    assert again.text == first.text
+
+    # Function responses, system prompt and model id are all part of the key
+    tool_turn = types.Content(
+        role="tool",
+        parts=[types.Part.from_function_response(name="f", response={"result": "1"})],
+    )
+    other_tool_turn = types.Content(
+        role="tool",
+        parts=[types.Part.from_function_response(name="f", response={"result": "2"})],
+    )
+    llm.complete("m", msgs + [tool_turn], _config())
+    llm.complete("m", msgs + [other_tool_turn], _config())
+    llm.complete("m", msgs, _config("other system"))
+    llm.complete("other-model", msgs, _config())
+    assert inner.calls == 5
+    assert llm.stats()["hits"] == 1
+    assert llm.stats()["misses"] == 5
+
+    # A fresh wrapper over the same directory reuses the entries on disk
+    reopened = CachingLLMClient(inner, tmp_path / "cache")
+    reopened.complete("m", msgs, _config())
+    assert inner.calls == 5
+    assert reopened.stats()["hits"] == 1
+
+
+def test_cache_lru_eviction(tmp_path):
+    inner = CountingLLMClient(pad=400)
+    llm = CachingLLMClient(inner, tmp_path / "cache", max_bytes=1200)
+
+    a, b, c = [_user("a")], [_user("b")], [_user("c")]
+    llm.complete("m", a, _config())
+    llm.complete("m", b, _config())
+    llm.complete("m", a, _config())  # touch a → b becomes least recently used
+    llm.complete("m", c, _config())
+
+    stats = llm.stats()
+    assert stats["bytes"] <= 1200
+    assert stats["evictions"] == 1
+
+    calls = inner.calls
+    llm.complete("m", a, _config())
+    assert inner.calls == calls
+    llm.complete("m", b, _config())
+    assert inner.calls == calls + 1
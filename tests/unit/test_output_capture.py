@@ -0,0 +1,61 @@
+import pytest
+
+from aicodeagent.functions.core import interpreter_pool
+from aicodeagent.functions.core.interpreter_pool import run_python
+from aicodeagent.functions.core.output_capture import StreamCapture
+from aicodeagent.functions.llm_calls.run_python import run_python_file
+
+FLOOD = "for n in range(200000):\n    print(f'line {n:06d}')\n"
+
+
+def test_stream_capture_keeps_head_and_tail(tmp_path):
+    spill = tmp_path / "out.log"
+    capture = StreamCapture(head=10, tail=5, spill_path=str(spill))
+    for chunk in (b"0123456", b"789abcdef", b"ghijklmnop"):
+        capture.write(chunk)
+    capture.close()
+    assert capture.total == 26
+    assert capture.text() == (
+        "0123456789\n[... 11 bytes omitted: 26 bytes in total, first 10 and "
+        f"last 5 shown; full output in {spill} ...]\nlmnop"
+    )
+    assert spill.read_bytes() == b"0123456789abcdefghijklmnop"
+
+
+def test_short_output_is_returned_whole_and_not_spilled(tmp_path):
+    spill = tmp_path / "out.log"
+    capture = StreamCapture(head=10, tail=5, spill_path=str(spill))
+    capture.write(b"hello\n")
+    capture.close()
+    assert capture.text() == "hello\n"
+    assert not spill.exists()
+
+
+@pytest.mark.parametrize("warm", ["1", "0"])
+def test_runaway_output_is_bounded_and_killed(tmp_path, monkeypatch, warm):
+    monkeypatch.setenv(interpreter_pool.ENV_WARM_POOL, warm)
+    script = tmp_path / "flood.py"
+    script.write_text("while True:\n    print('x' * 1000)\n")
+
+    result = run_python(str(script), cwd=tmp_path, max_output_bytes=1_000_000)
+    assert result.limit_exceeded
+    assert result.returncode == -9
+    assert result.stdout_bytes > 1_000_000
+    assert len(result.stdout) < 20_000
+    assert "bytes omitted" in result.stdout
+
+
+def test_run_python_file_reports_truncation_and_spills(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("AICODEAGENT_OUTPUT_DIR", str(tmp_path / "__ai_outputs__"))
+    (tmp_path / "flood.py").write_text(FLOOD)
+
+    res = run_python_file(str(tmp_path), "flood.py", "run_001")
+    assert res.startswith("STDOUT:line 000000\n")
+    assert "bytes omitted: 2400000 bytes in total" in res
+    assert res.endswith("line 199999\n\nSTDERR:\nExit code:0")
+
+    spill = tmp_path / "__ai_outputs__" / "run_001" / "flood_output.stdout.log"
+    assert spill.stat().st_size == 2400000
+    assert f"full output in {spill}" in res
+    assert not spill.with_name("flood_output.stderr.log").exists()
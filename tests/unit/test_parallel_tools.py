@@ -0,0 +1,134 @@
+import threading
+import time
+
+from google.genai import types
+
+import aicodeagent.pipeline as pipeline
+from aicodeagent.functions.core.append_entry import entry_writer
+from aicodeagent.functions.pipeline.options import PipelineOptions
+from aicodeagent.llm_client import LLMClient
+
+
+def _call(name, **args):
+    return types.Part(function_call=types.FunctionCall(name=name, args=args))
+
+
+def _response(*parts):
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role="model", parts=parts))]
+    )
+
+
+class ScriptedLLMClient(LLMClient):
+    def __init__(self, responses):
+        self.responses = list(responses)
+
+    def complete(self, model, messages, config):
+        return self.responses.pop(0)
+
+
+def _fake_tools(log):
+    def read(file_path, **kw):
+        log.append(("start", file_path, threading.get_ident()))
+        time.sleep(0.2)
+        log.append(("end", file_path))
+        return f"content of {file_path}"
+
+    def propose(file_path, content, **kw):
+        # Every read issued before the proposal has already finished
+        log.append(("propose", file_path))
+        return {"result": f'Save proposed changes to "{file_path}"', "content": content}
+
+    def run(file_path, **kw):
+        log.append(("run", file_path))
+        return f"ran {file_path}"
+
+    return {
+        "get_file_content": read,
+        "propose_changes": propose,
+        "run_python_file": run,
+    }
+
+
+def _run(tmp_path, monkeypatch, parts, workers):
+    monkeypatch.setenv("AICODEAGENT_OUTPUT_DIR", str(tmp_path / "__ai_outputs__"))
+    log = []
+    monkeypatch.setattr(pipeline, "function_dict", _fake_tools(log))
+    llm = ScriptedLLMClient([_response(*parts), _response(types.Part(text="Done."))])
+    options = PipelineOptions(
+        verbose=False, I_O=False, reset=False, demo=False, tool_workers=workers
+    )
+    t0 = time.perf_counter()
+    result = pipeline.run_pipeline("fix", llm, options, tmp_path)
+    elapsed = time.perf_counter() - t0
+
+    tool_msg = next(m for m in result["messages"] if m.role == "tool")
+    responses = [
+        (p.function_response.name, str(p.function_response.response)[:60])
+        for p in tool_msg.parts
+    ]
+    return result, responses, log, elapsed
+
+
+def test_reads_run_concurrently_in_call_order(tmp_path, monkeypatch):
+    parts = [_call("get_file_content", file_path=f"f{i}.py") for i in range(5)]
+    result, responses, log, elapsed = _run(tmp_path, monkeypatch, parts, workers=5)
+
+    assert elapsed < 0.6  # 5 x 0.2 s when sequential
+    assert len({entry[2] for entry in log if entry[0] == "start"}) > 1
+    assert [r[1] for r in responses] == [
+        str({"result": f"content of f{i}.py"})[:60] for i in range(5)
+    ]
+    assert result["run_stats"]["read_ok"] == 5
+
+
+def test_guards_and_order_match_sequential_dispatch(tmp_path, monkeypatch):
+    parts = [
+        _call("get_file_content", file_path="a.py"),
+        _call("get_file_content", file_path="b.py"),
+        _call("propose_changes", file_path="a.py", content="x = 1\n"),
+        _call("get_file_content", file_path="c.py"),
+    ]
+    par, par_responses, par_log, _ = _run(tmp_path, monkeypatch, parts, workers=4)
+    seq, seq_responses, _, _ = _run(tmp_path, monkeypatch, parts, workers=1)
+
+    assert par_responses == seq_responses
+    assert par["run_stats"] == seq["run_stats"]
+    # Reads finish before the serialized proposal; c.py is blocked by the guard
+    assert [e[0] for e in par_log][-1] == "propose"
+    assert ("start", "c.py") not in [e[:2] for e in par_log]
+
+
+def test_interpreters_are_prewarmed_only_for_run_python_file(tmp_path, monkeypatch):
+    warmed = []
+    monkeypatch.setattr(pipeline, "prewarm_pool", lambda: warmed.append(1))
+    _run(tmp_path, monkeypatch, [_call("get_file_content", file_path="a.py")], 1)
+    assert warmed == []
+
+    parts = [_call("run_python_file", file_path="main.py")]
+    _run(tmp_path, monkeypatch, parts, workers=1)
+    assert warmed == [1]
+
+
+def test_entry_writer_never_interleaves(tmp_path):
+    path = tmp_path / "summary.txt"
+
+    def write(n):
+        for i in range(50):
+            with entry_writer(path) as f:
+                f.write(f"\n### FUNCTION: t{n}-{i}\n")
+                for line in range(5):
+                    f.write(f"   - t{n}-{i} line {line}\n")
+                f.write("\n---\n")
+
+    threads = [threading.Thread(target=write, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    entries = path.read_text().split("\n---\n")[:-1]
+    assert len(entries) == 400
+    for entry in entries:
+        tag = entry.split("FUNCTION: ")[1].split("\n")[0]
+        assert entry.count(tag) == 6
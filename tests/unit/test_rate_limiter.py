@@ -0,0 +1,124 @@
+import pytest
+from google.genai import errors
+
+from aicodeagent.llm_client import LLMClient, RateLimitedLLMClient
+from aicodeagent.rate_limiter import (
+    RateLimiter,
+    RetriesExhausted,
+    backoff_delay,
+    server_retry_delay,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def _quota_error(delay="7s"):
+    body = {
+        "error": {
+            "code": 429,
+            "message": "Quota exceeded",
+            "status": "RESOURCE_EXHAUSTED",
+            "details": [
+                {
+                    "@type": "type.googleapis.com/google.rpc.RetryInfo",
+                    "retryDelay": delay,
+                }
+            ],
+        }
+    }
+    return errors.ClientError(429, body)
+
+
+def test_server_retry_delay_and_backoff():
+    assert server_retry_delay(_quota_error("17s")) == 17.0
+    assert server_retry_delay(Exception("503 UNAVAILABLE")) is None
+
+    for attempt in range(6):
+        d = backoff_delay(attempt, base=1.0, cap=8.0)
+        ceiling = min(8.0, 2**attempt)
+        assert ceiling / 2 <= d <= ceiling
+    assert backoff_delay(0, retry_after=30.0) >= 30.0
+
+
+def test_token_bucket_enforces_rpm():
+    clock = FakeClock()
+    limiter = RateLimiter(rpm=60, clock=clock.time, sleep=clock.sleep)
+    for _ in range(60):
+        assert limiter.acquire() == 0.0
+    # Bucket drained: the next slot frees up after 60 s / 60 rpm
+    assert limiter.acquire() == pytest.approx(1.0)
+
+
+def test_aimd_throttle_and_recovery():
+    clock = FakeClock()
+    limiter = RateLimiter(rpm=16, clock=clock.time, sleep=clock.sleep)
+    limiter.on_throttle(retry_after=10.0)
+    assert limiter.rate == 8.0
+    assert limiter.try_acquire() == pytest.approx(10.0)
+    limiter.on_success()
+    assert limiter.rate == 9.0
+
+
+def test_limiter_state_shared_through_file(tmp_path):
+    clock = FakeClock()
+    path = str(tmp_path / "rate_limit.json")
+    a = RateLimiter(rpm=2, state_path=path, clock=clock.time, sleep=clock.sleep)
+    b = RateLimiter(rpm=2, state_path=path, clock=clock.time, sleep=clock.sleep)
+    assert a.try_acquire() == 0.0
+    assert b.try_acquire() == 0.0
+    # Both agents drew from the same two-token bucket
+    assert a.try_acquire() > 0
+    assert b.try_acquire() > 0
+
+
+class FlakyLLMClient(LLMClient):
+    def __init__(self, failures):
+        self.failures = list(failures)
+        self.calls = 0
+
+    def complete(self, model, messages, config):
+        self.calls += 1
+        if self.failures:
+            raise self.failures.pop(0)
+        return "ok"
+
+
+def test_rate_limited_client_retries_with_server_delay():
+    clock = FakeClock()
+    limiter = RateLimiter(rpm=60, clock=clock.time, sleep=clock.sleep)
+    inner = FlakyLLMClient([_quota_error("7s"), Exception("503 UNAVAILABLE")])
+    llm = RateLimitedLLMClient(inner, limiter, sleep=clock.sleep)
+
+    assert llm.complete("m", [], None) == "ok"
+    assert inner.calls == 3
+    assert llm.last_retries == 2
+    assert clock.slept[0] >= 7.0
+
+
+def test_rate_limited_client_gives_up():
+    clock = FakeClock()
+    limiter = RateLimiter(rpm=60, clock=clock.time, sleep=clock.sleep)
+    inner = FlakyLLMClient([Exception("503 UNAVAILABLE")] * 10)
+    llm = RateLimitedLLMClient(inner, limiter, max_retries=2, sleep=clock.sleep)
+
+    with pytest.raises(RetriesExhausted):
+        llm.complete("m", [], None)
+    assert inner.calls == 3
+
+    # Non-transient errors are not retried
+    inner = FlakyLLMClient([ValueError("400 INVALID_ARGUMENT")])
+    llm = RateLimitedLLMClient(inner, limiter, sleep=clock.sleep)
+    with pytest.raises(ValueError):
+        llm.complete("m", [], None)
+    assert inner.calls == 1
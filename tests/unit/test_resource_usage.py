@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+from aicodeagent.functions.core import interpreter_pool, resource_usage
+from aicodeagent.functions.core.interpreter_pool import run_python
+from aicodeagent.functions.llm_calls.run_python import run_python_file
+from aicodeagent.functions.pipeline.run_ledger import save_usage_totals
+
+CHILDREN = (
+    "import subprocess, sys, time\n"
+    "subprocess.run([sys.executable, '-c', 'import time; time.sleep(0.3)'])\n"
+    "print('done')\n"
+)
+
+
+@pytest.fixture(params=["1", "0"], ids=["warm", "cold"])
+def mode(request, monkeypatch):
+    monkeypatch.setenv(interpreter_pool.ENV_WARM_POOL, request.param)
+
+
+def test_sandbox_limits_from_env(monkeypatch):
+    assert resource_usage.sandbox_limits() == {
+        "RLIMIT_CPU": 60,
+        "RLIMIT_AS": 4096 * 1024 * 1024,
+        "RLIMIT_NOFILE": 1024,
+    }
+    monkeypatch.setenv(resource_usage.ENV_RLIMIT_CPU, "5")
+    monkeypatch.setenv(resource_usage.ENV_RLIMIT_AS, "0")
+    assert resource_usage.sandbox_limits() == {"RLIMIT_CPU": 5, "RLIMIT_NOFILE": 1024}
+
+
+def test_usage_reports_time_memory_and_children(tmp_path, mode):
+    script = tmp_path / "spawn.py"
+    script.write_text(CHILDREN)
+    result = run_python(str(script), cwd=tmp_path)
+    assert result.stdout == "done\n"
+    usage = result.usage
+    assert usage["wall_s"] >= 0.3
+    assert usage["user_s"] > 0 and usage["sys_s"] >= 0
+    assert usage["max_rss_kb"] > 1024
+    assert usage["child_processes"] == 1
+
+
+def test_limits_are_applied(tmp_path, mode):
+    script = tmp_path / "limits.py"
+    script.write_text(
+        "import os, resource, sys\n"
+        "print(resource.getrlimit(resource.RLIMIT_NOFILE)[0])\n"
+        "print(sys.argv[1:], sys.path[0] == os.path.dirname(__file__), __name__)\n"
+        "bytearray(512 * 1024 * 1024)\n"
+    )
+    limits = {"RLIMIT_NOFILE": 64, "RLIMIT_AS": 256 * 1024 * 1024}
+    result = run_python(str(script), cwd=tmp_path, argv=["x"], limits=limits)
+    # Limited, but otherwise started like `python limits.py x`
+    assert result.stdout == "64\n['x'] True __main__\n"
+    assert result.stderr.rstrip().endswith("MemoryError")
+    assert result.returncode == 1
+
+
+def test_cpu_limit_kills_the_script(tmp_path, monkeypatch, mode):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("AICODEAGENT_OUTPUT_DIR", str(tmp_path / "__ai_outputs__"))
+    monkeypatch.setenv(resource_usage.ENV_RLIMIT_CPU, "1")
+    (tmp_path / "spin.py").write_text("while True:\n    pass\n")
+
+    res = run_python_file(str(tmp_path), "spin.py", "run_001", use_cache=False)
+    assert res.endswith("[CPU time limit of 1 s exceeded: the script was killed]")
+    log = (tmp_path / "__ai_outputs__" / "run_001" / "actions.log").read_text()
+    assert "killed: CPU time limit of 1 s exceeded" in log
+
+
+def test_usage_reaches_the_log_and_run_summary(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("AICODEAGENT_OUTPUT_DIR", str(tmp_path / "__ai_outputs__"))
+    (tmp_path / "spawn.py").write_text(CHILDREN)
+    (tmp_path / "quick.py").write_text("print('hi')\n")
+    run_dir = tmp_path / "__ai_outputs__" / "run_001"
+
+    run_python_file(str(tmp_path), "spawn.py", "run_001", use_cache=False)
+    run_python_file(str(tmp_path), "quick.py", "run_001", use_cache=False)
+    log = (run_dir / "actions.log").read_text()
+    assert log.count("+ resources: wall ") == 2
+    assert "child processes 1" in log
+
+    (run_dir / "run_summary.json").write_text("{}")
+    save_usage_totals("run_001", resource_usage.usage_totals("run_001"), "sandbox")
+    sandbox = json.loads((run_dir / "run_summary.json").read_text())["sandbox"]
+    assert sandbox["executions"] == 2
+    assert sandbox["child_processes"] == 1
+    assert sandbox["wall_s"] >= 0.3
+    assert [e["file"] for e in sandbox["most_expensive"]] == ["spawn.py", "quick.py"]
@@ -0,0 +1,86 @@
+import pytest
+
+from aicodeagent.functions.core import run_cache
+from aicodeagent.functions.llm_calls.conclude_edit import conclude_edit
+from aicodeagent.functions.llm_calls.run_python import run_python_file
+
+
+@pytest.fixture
+def sandbox(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("AICODEAGENT_OUTPUT_DIR", str(tmp_path / "__ai_outputs__"))
+    monkeypatch.setenv(run_cache.ENV_RUN_CACHE, "1")
+    root = tmp_path / "code_to_fix"
+    (root / "pkg").mkdir(parents=True)
+    (root / "pkg" / "__init__.py").write_text("")
+    (root / "pkg" / "calc.py").write_text("from .render import show\nVALUE = 2\n")
+    (root / "pkg" / "render.py").write_text("def show(x):\n    print(x)\n")
+    (root / "main.py").write_text(
+        "import os\nfrom pkg import calc\ncalc.show(calc.VALUE)\n"
+    )
+    (root / "unrelated.py").write_text("print('unrelated')\n")
+    return root
+
+
+def test_local_sources_follow_static_imports(sandbox):
+    sources = run_cache.local_sources(str(sandbox / "main.py"), str(sandbox))
+    names = sorted(p[len(str(sandbox)) + 1 :] for p in sources)
+    # os is not in the sandbox; render.py comes through a relative import
+    assert names == ["main.py", "pkg/__init__.py", "pkg/calc.py", "pkg/render.py"]
+
+
+def test_fingerprint_tracks_imports_argv_env_and_data_files(sandbox):
+    main, root = str(sandbox / "main.py"), str(sandbox)
+    base = run_cache.fingerprint(main, root, env={})
+    (sandbox / "unrelated.py").write_text("print('changed')\n")
+    assert run_cache.fingerprint(main, root, env={}) == base
+    (sandbox / "data.csv").write_text("a,b\n")
+    with_data = run_cache.fingerprint(main, root, env={})
+    assert with_data != base
+    (sandbox / "data.csv").write_text("a,b,c\n")
+    assert run_cache.fingerprint(main, root, env={}) != with_data
+    base = run_cache.fingerprint(main, root, env={})
+    assert run_cache.fingerprint(main, root, argv=["-v"], env={}) != base
+    assert run_cache.fingerprint(main, root, env={"X": "1"}) != base
+    (sandbox / "pkg" / "render.py").write_text("def show(x):\n    print(x, x)\n")
+    assert run_cache.fingerprint(main, root, env={}) != base
+
+
+def test_repeated_run_is_served_from_cache_until_an_edit(sandbox):
+    first = run_python_file(str(sandbox), "main.py", "run_001")
+    assert first == "STDOUT:2\n\nSTDERR:\nExit code:0"
+
+    second = run_python_file(str(sandbox), "main.py", "run_001")
+    assert second.startswith(first + "\n[cached result of an identical execution at ")
+
+    # The cache is scoped to its run
+    assert run_python_file(str(sandbox), "main.py", "run_002") == first
+    forced = run_python_file(str(sandbox), "main.py", "run_002", use_cache=False)
+    assert forced == first
+
+    # An imported module edited outside the agent changes the fingerprint
+    (sandbox / "pkg" / "calc.py").write_text("from .render import show\nVALUE = 3\n")
+    assert run_python_file(str(sandbox), "main.py", "run_002").startswith(
+        "STDOUT:3\n\nSTDERR"
+    )
+    assert "[cached" in run_python_file(str(sandbox), "main.py", "run_002")
+
+    # conclude_edit drops the run's cached results
+    conclude_edit(str(sandbox), "unrelated.py", "print('edited')\n", "run_002")
+    assert "[cached" not in run_python_file(str(sandbox), "main.py", "run_002")
+
+
+def test_scripts_writing_files_run_every_time(sandbox):
+    (sandbox / "log.py").write_text(
+        "with open('out.log', 'a') as f:\n    f.write('x')\n"
+        "print(open('out.log').read())\n"
+    )
+    assert run_python_file(str(sandbox), "log.py", "run_001").startswith("STDOUT:x\n")
+    # What the first execution wrote changes the fingerprint: no stale skip
+    assert run_python_file(str(sandbox), "log.py", "run_001").startswith("STDOUT:xx\n")
+
+
+def test_cache_is_opt_in(sandbox, monkeypatch):
+    monkeypatch.delenv(run_cache.ENV_RUN_CACHE)
+    run_python_file(str(sandbox), "main.py", "run_001")
+    assert "[cached" not in run_python_file(str(sandbox), "main.py", "run_001")
@@ -0,0 +1,85 @@
+import json
+import os
+
+from google.genai import types
+
+import aicodeagent.pipeline as pipeline
+from aicodeagent.functions.pipeline.init_run_session import get_run_dir
+from aicodeagent.functions.pipeline.options import PipelineOptions
+from aicodeagent.functions.pipeline.run_ledger import LEDGER_FILE, save_usage_totals
+from aicodeagent.llm_client import LLMClient, RateLimitedLLMClient
+from aicodeagent.rate_limiter import RateLimiter
+
+
+def _response(part, prompt_tokens, cached_tokens=0):
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role="model", parts=[part]))],
+        usage_metadata=types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=prompt_tokens,
+            candidates_token_count=10,
+            cached_content_token_count=cached_tokens,
+            total_token_count=prompt_tokens + 10,
+        ),
+    )
+
+
+class ScriptedLLMClient(LLMClient):
+    """Fails once with 503, then plays back the scripted responses."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.failed = False
+
+    def complete(self, model, messages, config):
+        if not self.failed:
+            self.failed = True
+            raise Exception("503 UNAVAILABLE")
+        return self.responses.pop(0)
+
+
+def test_ledger_records_every_call_and_totals(tmp_path, monkeypatch):
+    monkeypatch.setenv("AICODEAGENT_OUTPUT_DIR", str(tmp_path / "__ai_outputs__"))
+    monkeypatch.setattr(
+        pipeline, "function_dict", {"get_files_info": lambda **kw: "- main.py"}
+    )
+    call = types.Part(
+        function_call=types.FunctionCall(name="get_files_info", args={"directory": "."})
+    )
+    inner = ScriptedLLMClient(
+        [
+            _response(call, prompt_tokens=1200),
+            _response(types.Part(text="Done."), prompt_tokens=1500, cached_tokens=900),
+        ]
+    )
+    limiter = RateLimiter(rpm=600)
+    llm = RateLimitedLLMClient(inner, limiter, sleep=lambda s: None)
+    options = PipelineOptions(verbose=False, I_O=False, reset=False, demo=False)
+
+    result = pipeline.run_pipeline("scan", llm, options, tmp_path)
+
+    run_dir = get_run_dir(result["run_id"])
+    with open(os.path.join(run_dir, LEDGER_FILE), encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f]
+
+    assert [e["cycle"] for e in entries] == [1, 2]
+    assert [e["prompt_tokens"] for e in entries] == [1200, 1500]
+    assert [e["cached_tokens"] for e in entries] == [0, 900]
+    assert [e["retries"] for e in entries] == [1, 0]
+    assert [e["tool_calls"] for e in entries] == [1, 0]
+    assert all(e["latency_s"] >= 0 for e in entries)
+
+    usage = result["usage"]
+    assert usage["calls"] == 2 and usage["errors"] == 0
+    assert usage["prompt_tokens"] == 2700
+    assert usage["candidate_tokens"] == 20
+    assert usage["max_prompt_tokens"] == 1500
+    assert usage["retries"] == 1 and usage["tool_calls"] == 1
+
+    # Totals are merged into an existing run_summary.json
+    with open(os.path.join(run_dir, "run_summary.json"), "w") as f:
+        json.dump({"header": {"run_id": result["run_id"]}}, f)
+    save_usage_totals(result["run_id"], usage)
+    with open(os.path.join(run_dir, "run_summary.json")) as f:
+        summary = json.load(f)
+    assert summary["header"]["run_id"] == result["run_id"]
+    assert summary["usage"] == usage
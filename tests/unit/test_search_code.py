@@ -0,0 +1,122 @@
+import os
+import sys
+import time
+
+from aicodeagent.functions.core import code_index
+from aicodeagent.functions.fs.clear_output_dirs import clear_output_dirs
+from aicodeagent.functions.fs.reset_test_env import reset_test_env
+from aicodeagent.functions.llm_calls.search_code import search_code
+from aicodeagent.functions.pipeline.init_run_session import init_run_session
+
+# === CONFIGURATION ===
+TEST_DIR = "__test_env__"
+reset_test_env(TEST_DIR)
+run_id = init_run_session()
+
+# Paths ai_outputs
+RUN_DIR = os.path.join("__ai_outputs__", run_id)
+
+# === SETUP: small package + many generated files ===
+# __test_env__/
+# ├─ example.txt
+# └─ pkg/
+#     ├─ module.py
+#     ├─ __pycache__/module.pyc
+#     └─ gen/mod_0000.py ... mod_1999.py
+os.makedirs(os.path.join(TEST_DIR, "pkg", "gen"), exist_ok=True)
+os.makedirs(os.path.join(TEST_DIR, "pkg", "__pycache__"), exist_ok=True)
+with open(os.path.join(TEST_DIR, "example.txt"), "w", encoding="utf-8") as f:
+    f.write("print('hello world')\n")
+with open(os.path.join(TEST_DIR, "pkg", "module.py"), "w", encoding="utf-8") as f:
+    f.write(
+        "import os\n\n\ndef parse_config(path):\n"
+        "    return open(path).read()\n\n\ndef parse_args(argv):\n"
+        "    return argv[1:]\n"
+    )
+with open(os.path.join(TEST_DIR, "pkg", "__pycache__", "module.pyc"), "wb") as f:
+    f.write(b"\0def parse_config")
+for n in range(2000):
+    path = os.path.join(TEST_DIR, "pkg", "gen", f"mod_{n:04d}.py")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"def helper_{n}(x):\n    return x * {n}\n")
+
+
+# === HELPERS ===
+def print_test_result(n, description, result):
+    print(f"\n▶️ Test {n}: {description}")
+    print(result)
+
+
+def read_tail(path, n=20):
+    if not os.path.isfile(path):
+        return "<missing>"
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        lines = f.readlines()
+    return "".join(lines[-n:]).rstrip()
+
+
+# === TESTS ===
+print("\n==== search_code TESTS ====\n")
+
+# 1) Regex with context; excluded folders are not searched
+res1 = search_code(
+    working_directory=TEST_DIR,
+    query=r"def parse_\w+",
+    run_id=run_id,
+    context_lines=1,
+    function_args={"query": r"def parse_\w+"},
+)
+print_test_result(1, "regex over the package (first call builds the index)", res1)
+assert "pkg/module.py:4: def parse_config(path):" in res1
+assert "pkg/module.py-5-     return open(path).read()" in res1
+assert "pkg/module.py:8: def parse_args(argv):" in res1
+assert "__pycache__" not in res1
+assert "Function search_code" in read_tail(os.path.join(RUN_DIR, "actions.log"))
+
+# 2) Repeated query: index loaded, nothing re-indexed, answered from candidates
+start = time.perf_counter()
+res2 = search_code(working_directory=TEST_DIR, query="helper_1234", run_id=run_id)
+elapsed = time.perf_counter() - start
+print_test_result(2, f"indexed query over 2000 files ({elapsed * 1000:.1f} ms)", res2)
+assert res2.startswith("pkg/gen/mod_1234.py:1: def helper_1234(x):")
+assert "re-indexed: 0" in read_tail(os.path.join(RUN_DIR, "actions.log"))
+
+# 3) Edited file: the walk is skipped until a write is reported, then the
+#    file is picked up incrementally
+with open(os.path.join(TEST_DIR, "example.txt"), "w", encoding="utf-8") as f:
+    f.write("print('goodbye world')\n")
+res3 = search_code(working_directory=TEST_DIR, query="goodbye", run_id=run_id)
+assert res3 == "No matches for /goodbye/"
+code_index.mark_changed()  # as conclude_edit and script runs do
+res3 = search_code(working_directory=TEST_DIR, query="goodbye", run_id=run_id)
+print_test_result(3, "edited file re-indexed", res3)
+assert res3 == "example.txt:1: print('goodbye world')"
+assert "re-indexed: 1" in read_tail(os.path.join(RUN_DIR, "actions.log"))
+assert search_code(working_directory=TEST_DIR, query="hello", run_id=run_id) == (
+    "No matches for /hello/"
+)
+
+# 4) Result cap and path filter
+res4 = search_code(
+    working_directory=TEST_DIR,
+    query=r"return x",
+    run_id=run_id,
+    path="pkg/gen",
+    context_lines=0,
+    max_results=3,
+)
+print_test_result(4, "capped results in a subfolder", res4)
+assert res4.count("pkg/gen/mod_") == 3
+assert "[results capped at 3 matches" in res4
+
+# 5) ERROR: invalid regex / path traversal
+res5 = search_code(working_directory=TEST_DIR, query="def (", run_id=run_id)
+print_test_result(5, "invalid regex", res5)
+assert res5.startswith("Error: Invalid regular expression")
+res6 = search_code(working_directory=TEST_DIR, query="x", path="../", run_id=run_id)
+print_test_result(6, "path outside the sandbox", res6)
+assert res6.startswith("Error: Invalid filename")
+
+# Clear ai_outputs subdirectories if requested
+if "--clear" in sys.argv:
+    clear_output_dirs()
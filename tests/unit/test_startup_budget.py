@@ -0,0 +1,43 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parents[2]
+
+
+def _env():
+    return dict(os.environ, PYTHONPATH=str(ROOT / "src"))
+
+
+def test_pipeline_modules_do_not_import_genai():
+    code = (
+        "import sys\n"
+        "import aicodeagent.pipeline, aicodeagent.batch, aicodeagent.daemon\n"
+        "import aicodeagent.functions.functions_schemas\n"
+        "print(sorted(m for m in sys.modules if m.startswith('google.genai')))\n"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], env=_env(), capture_output=True, text=True
+    )
+    assert out.returncode == 0, out.stderr
+    assert out.stdout.strip() == "[]"
+
+
+def test_startup_within_budget():
+    proc = subprocess.run(
+        [
+            sys.executable,
+            str(ROOT / "tools" / "bench_startup.py"),
+            "--runs",
+            "2",
+            "--json",
+        ],
+        env=_env(),
+        capture_output=True,
+        text=True,
+    )
+    report = json.loads(proc.stdout)
+    assert report["failures"] == [], report
+    assert proc.returncode == 0
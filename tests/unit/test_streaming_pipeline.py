@@ -0,0 +1,145 @@
+import hashlib
+import json
+import time
+
+from google.genai import types
+
+import aicodeagent.pipeline as pipeline
+from aicodeagent.functions.pipeline.options import PipelineOptions
+from aicodeagent.llm_client import FileLLMClient
+
+
+def _canned_name(*role_text):
+    # Same hashing scheme as tools/save_canned.py: role + text of every message
+    concat = "".join(role + text for role, text in role_text)
+    return f"response_{hashlib.sha1(concat.encode('utf-8')).hexdigest()}.json"
+
+
+def _chunk(part):
+    resp = types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role="model", parts=[part]))]
+    )
+    return resp.model_dump(mode="json", exclude_none=True)
+
+
+def test_stream_dispatches_tool_call_before_turn_ends(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("AICODEAGENT_OUTPUT_DIR", str(tmp_path / "__ai_outputs__"))
+    canned = tmp_path / "canned"
+    canned.mkdir()
+
+    # Turn 1: text, an early function call, then a long tail of text chunks
+    turn_1 = [_chunk(types.Part(text="Looking."))]
+    turn_1.append(
+        _chunk(
+            types.Part(
+                function_call=types.FunctionCall(
+                    name="get_files_info", args={"directory": "."}
+                )
+            )
+        )
+    )
+    turn_1 += [_chunk(types.Part(text=" ...")) for _ in range(5)]
+    (canned / _canned_name(("user", "scan"))).write_text(json.dumps(turn_1))
+
+    # Turn 2: plain text answer
+    turn_2 = [_chunk(types.Part(text="All good."))]
+    name_2 = _canned_name(
+        ("user", "scan"), ("model", "Looking. ... ... ... ... ..."), ("tool", "")
+    )
+    (canned / name_2).write_text(json.dumps(turn_2))
+
+    dispatched_at = []
+
+    def fake_get_files_info(**kwargs):
+        dispatched_at.append(time.perf_counter())
+        return "- main.py: file_size=1 bytes, is_dir=False"
+
+    monkeypatch.setattr(
+        pipeline, "function_dict", {"get_files_info": fake_get_files_info}
+    )
+
+    llm = FileLLMClient(canned, chunk_delay=0.1)
+    options = PipelineOptions(
+        verbose=False, I_O=False, reset=False, demo=False, stream=True
+    )
+    t0 = time.perf_counter()
+    result = pipeline.run_pipeline("scan", llm, options, tmp_path)
+
+    # Tool ran right after its chunk, not after the five trailing text chunks
+    assert len(dispatched_at) == 1
+    assert dispatched_at[0] - t0 < 0.3
+
+    model_turn = result["messages"][1]
+    assert [p.text for p in model_turn.parts if p.text] == [
+        "Looking.",
+        " ... ... ... ... ...",
+    ]
+    assert result["messages"][2].role == "tool"
+    assert result["run_stats"]["read_ok"] == 1
+    assert "All good." in capsys.readouterr().out
+
+
+class _BrokenStreamLLM(FileLLMClient):
+    """First stream call breaks after its chunks, later calls replay normally."""
+
+    def __init__(self, canned_dir, broken):
+        super().__init__(canned_dir)
+        self.broken = broken
+
+    def stream(self, model, messages, config):
+        if self.broken is None:
+            yield from super().stream(model, messages, config)
+            return
+        chunks, self.broken = self.broken, None
+        for chunk in chunks:
+            yield types.GenerateContentResponse.model_validate(chunk)
+        raise RuntimeError("503 UNAVAILABLE: connection reset mid-stream")
+
+
+def test_broken_stream_keeps_tool_responses_of_dispatched_calls(tmp_path, monkeypatch):
+    monkeypatch.setenv("AICODEAGENT_OUTPUT_DIR", str(tmp_path / "__ai_outputs__"))
+    monkeypatch.setattr(pipeline.time, "sleep", lambda s: None)
+    canned = tmp_path / "canned"
+    canned.mkdir()
+
+    # The stream breaks after a text chunk and a dispatched function call
+    broken = [
+        _chunk(types.Part(text="Looking.")),
+        _chunk(
+            types.Part(
+                function_call=types.FunctionCall(
+                    name="get_files_info", args={"directory": "."}
+                )
+            )
+        ),
+    ]
+    # The retry sees the partial turn and its tool response
+    name_2 = _canned_name(("user", "scan"), ("model", "Looking."), ("tool", ""))
+    (canned / name_2).write_text(json.dumps([_chunk(types.Part(text="All good."))]))
+
+    calls = []
+
+    def fake_get_files_info(**kwargs):
+        calls.append(kwargs["directory"])
+        return "- main.py: file_size=1 bytes, is_dir=False"
+
+    monkeypatch.setattr(
+        pipeline, "function_dict", {"get_files_info": fake_get_files_info}
+    )
+
+    llm = _BrokenStreamLLM(canned, broken)
+    options = PipelineOptions(
+        verbose=False, I_O=False, reset=False, demo=False, stream=True
+    )
+    result = pipeline.run_pipeline("scan", llm, options, tmp_path)
+
+    # The tool ran once and its call is answered right after the partial turn
+    assert calls == ["."]
+    roles = [m.role for m in result["messages"]]
+    assert roles[:4] == ["user", "model", "tool", "model"]
+    partial, answer = result["messages"][1], result["messages"][2]
+    assert [p.function_call.name for p in partial.parts if p.function_call] == [
+        "get_files_info"
+    ]
+    assert [p.function_response.name for p in answer.parts] == ["get_files_info"]
+    assert result["run_stats"]["transient_err"] == 1
@@ -0,0 +1,106 @@
+import os
+
+from google.genai import types
+
+import aicodeagent.pipeline as pipeline
+from aicodeagent.functions.pipeline.compact_context import ContextCompactor
+from aicodeagent.functions.pipeline.options import PipelineOptions
+from aicodeagent.functions.pipeline.tool_memo import ToolMemo
+from aicodeagent.llm_client import LLMClient
+
+
+def _call(name, **args):
+    return types.Part(function_call=types.FunctionCall(name=name, args=args))
+
+
+def _response(*parts):
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role="model", parts=parts))]
+    )
+
+
+class ScriptedLLMClient(LLMClient):
+    """Returns preset responses; a callable entry runs first (e.g. edits a file)."""
+
+    def __init__(self, steps):
+        self.steps = list(steps)
+
+    def complete(self, model, messages, config):
+        step = self.steps.pop(0)
+        if callable(step):
+            step()
+            step = self.steps.pop(0)
+        return step
+
+
+def _responses(result):
+    return [
+        p.function_response.response
+        for m in result["messages"]
+        if m.role == "tool"
+        for p in m.parts
+    ]
+
+
+def test_repeated_read_is_answered_from_memo_until_file_changes(tmp_path, monkeypatch):
+    monkeypatch.setenv("AICODEAGENT_OUTPUT_DIR", str(tmp_path / "__ai_outputs__"))
+    sandbox = tmp_path / "code_to_fix"
+    sandbox.mkdir()
+    target = sandbox / "a.py"
+    target.write_text("x = 1\n")
+
+    reads = []
+
+    def read(working_directory, file_path, **kw):
+        reads.append(file_path)
+        with open(os.path.join(working_directory, file_path)) as f:
+            return f.read()
+
+    def edit():
+        target.write_text("x = 22\n")
+
+    monkeypatch.setattr(pipeline, "function_dict", {"get_file_content": read})
+    read_a = _response(_call("get_file_content", file_path="a.py"))
+    read_a_again = _response(_call("get_file_content", file_path="./a.py"))
+    llm = ScriptedLLMClient(
+        [read_a, read_a_again, edit, read_a, _response(types.Part(text="Done."))]
+    )
+    options = PipelineOptions(verbose=False, I_O=False, reset=False, demo=False)
+    result = pipeline.run_pipeline("fix", llm, options, tmp_path)
+
+    first, second, third = _responses(result)
+    assert reads == ["a.py", "a.py"]  # the repeat in turn 2 never hit the disk
+    assert first == {"result": "x = 1\n"}
+    assert second["unchanged_since_call"] == 1
+    assert third == {"result": "x = 22\n"}
+    assert result["run_stats"]["read_ok"] == 3
+
+
+def test_reference_does_not_supersede_original_in_context():
+    call = types.FunctionCall(
+        name="get_file_content", args={"working_directory": "/w", "file_path": "a.py"}
+    )
+    memo = ToolMemo()
+    original = types.Part.from_function_response(
+        name=call.name, response={"result": "x = 1\n"}
+    )
+    reference = types.Part.from_function_response(
+        name=call.name, response={"result": "[unchanged]", "unchanged_since_call": 1}
+    )
+    messages = [
+        types.Content(role="user", parts=[types.Part(text="fix")]),
+        types.Content(role="model", parts=[types.Part(function_call=call)]),
+        types.Content(role="tool", parts=[original]),
+        types.Content(role="model", parts=[types.Part(function_call=call)]),
+        types.Content(role="tool", parts=[reference]),
+    ]
+    compactor = ContextCompactor()
+    compacted, dropped = compactor.compact(messages)
+
+    assert dropped == []
+    assert compacted[2].parts[0].function_response.response == {"result": "x = 1\n"}
+
+    # Once the original is elided, the memo stops pointing at it
+    memo.entries[("k", "")] = (1, None, messages[2].parts[0])
+    memo.forget_elided(messages, {(2, 0): "over token budget"})
+    assert memo.entries == {}
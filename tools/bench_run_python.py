@@ -0,0 +1,99 @@
+"""
+Cold versus warm latency of run_python_file's script execution.
+
+Runs the same scripts N times in a fresh interpreter each (`subprocess.run`,
+the pre-pool behaviour) and on the warm interpreter pool, and reports the
+median and best wall-clock per script. By default the scripts are the demo
+sandbox's `calculator_bugged` main.py and tests.py.
+
+    python tools/bench_run_python.py [--runs 20] [--json] [script.py ...]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from aicodeagent.functions.core.interpreter_pool import InterpreterPool
+from aicodeagent.functions.fs.get_project_root import get_project_root
+
+PROJECT_ROOT = get_project_root(__file__)
+DEFAULT_SCRIPTS = [
+    os.path.join(PROJECT_ROOT, "examples/minirepo/code_to_fix/calculator_bugged", name)
+    for name in ("main.py", "tests.py")
+]
+
+
+def _cold(path):
+    t0 = time.perf_counter()
+    subprocess.run(
+        [sys.executable, path],
+        cwd=os.path.dirname(path),
+        capture_output=True,
+        text=True,
+        timeout=30,
+    )
+    return time.perf_counter() - t0
+
+
+def _warm(pool, path):
+    t0 = time.perf_counter()
+    pool.run(path, cwd=os.path.dirname(path), timeout=30)
+    return time.perf_counter() - t0
+
+
+def _stats(samples):
+    return {
+        "median_ms": round(statistics.median(samples) * 1000, 2),
+        "best_ms": round(min(samples) * 1000, 2),
+    }
+
+
+def run_benchmark(scripts, runs=20):
+    pool = InterpreterPool(size=1)
+    try:
+        pool.prewarm()
+        _warm(pool, scripts[0])  # let the worker finish booting
+        results = {}
+        for path in scripts:
+            cold = [_cold(path) for _ in range(runs)]
+            warm = [_warm(pool, path) for _ in range(runs)]
+            results[os.path.relpath(path, PROJECT_ROOT)] = {
+                "cold": _stats(cold),
+                "warm": _stats(warm),
+                "speedup": round(statistics.median(cold) / statistics.median(warm), 2),
+            }
+    finally:
+        pool.close()
+    return {"runs": runs, "results": results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("scripts", nargs="*", help="Scripts to run (default: demo)")
+    parser.add_argument("--runs", type=int, default=20, help="Runs per mode")
+    parser.add_argument("--json", action="store_true", help="Print a JSON report")
+    args = parser.parse_args(argv)
+
+    scripts = [os.path.abspath(s) for s in args.scripts] or DEFAULT_SCRIPTS
+    report = run_benchmark(scripts, args.runs)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for name, r in report["results"].items():
+            print(
+                f"{name}\n"
+                f"  cold  median {r['cold']['median_ms']:8.2f} ms"
+                f"  best {r['cold']['best_ms']:8.2f} ms\n"
+                f"  warm  median {r['warm']['median_ms']:8.2f} ms"
+                f"  best {r['warm']['best_ms']:8.2f} ms\n"
+                f"  speedup x{r['speedup']}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
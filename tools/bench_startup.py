@@ -0,0 +1,153 @@
+"""
+Startup benchmark for the CLI.
+
+Measures, in fresh interpreters:
+  - the import-time profile of `aicodeagent --help` (top modules by cumulative time),
+  - wall-clock of `--help`,
+  - wall-clock of an `--offline` run until its first iteration starts, and in total.
+
+Exits non-zero when a measurement exceeds its budget, or when `--help` imports
+a module that must stay lazy. Scale every budget with AICODEAGENT_BENCH_SCALE
+on slow machines.
+
+    python tools/bench_startup.py [--runs 5] [--json]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from aicodeagent.functions.fs.get_project_root import get_project_root
+
+PROJECT_ROOT = get_project_root(__file__)
+
+# Seconds (best of N runs)
+BUDGETS = {
+    "help_s": 0.3,
+    "offline_first_iteration_s": 1.5,
+    "offline_total_s": 2.5,
+}
+
+# Must not be imported just to print the usage
+LAZY_MODULES = ("google.genai", "pydantic", "httpx", "dotenv")
+
+
+def _env(output_dir):
+    src = os.path.join(PROJECT_ROOT, "src")
+    path = os.pathsep.join(p for p in (src, os.getenv("PYTHONPATH")) if p)
+    return dict(os.environ, PYTHONPATH=path, AICODEAGENT_OUTPUT_DIR=output_dir)
+
+
+def import_profile(env, top=10):
+    """Return ({module: cumulative_us}, top-N list) for `--help`."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "aicodeagent.main", "--help"],
+        env=env,
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    modules = {}
+    for line in proc.stderr.splitlines():
+        # "import time: <self us> | <cumulative us> | <indented module name>"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        fields = line[len("import time:") :].split("|")
+        cumulative = int(fields[1])
+        name = fields[2].strip()
+        modules[name] = max(modules.get(name, 0), cumulative)
+    ranked = sorted(modules.items(), key=lambda kv: kv[1], reverse=True)[:top]
+    return modules, ranked
+
+
+def time_help(env):
+    t0 = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m", "aicodeagent.main", "--help"],
+        env=env,
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        check=True,
+    )
+    return time.perf_counter() - t0
+
+
+def time_offline(env, prompt="hello"):
+    """Return (seconds to 'Iteration #1', total seconds) of an offline run."""
+    t0 = time.perf_counter()
+    first = None
+    proc = subprocess.Popen(
+        [sys.executable, "-u", "-m", "aicodeagent.main", "--offline", prompt],
+        env=env,
+        cwd=PROJECT_ROOT,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+    )
+    for line in proc.stdout:
+        if first is None and "Iteration #1" in line:
+            first = time.perf_counter() - t0
+    proc.wait()
+    total = time.perf_counter() - t0
+    if proc.returncode != 0:
+        raise RuntimeError(f"offline run failed with exit code {proc.returncode}")
+    return first if first is not None else total, total
+
+
+def run_benchmark(runs=5):
+    scale = float(os.getenv("AICODEAGENT_BENCH_SCALE", "1"))
+    with tempfile.TemporaryDirectory() as out:
+        env = _env(out)
+        modules, ranked = import_profile(env)
+        help_s = min(time_help(env) for _ in range(runs))
+        offline = [time_offline(env) for _ in range(runs)]
+
+    results = {
+        "help_s": round(help_s, 4),
+        "offline_first_iteration_s": round(min(o[0] for o in offline), 4),
+        "offline_total_s": round(min(o[1] for o in offline), 4),
+    }
+    failures = [
+        f"{key}: {value:.3f}s > budget {BUDGETS[key] * scale:.3f}s"
+        for key, value in results.items()
+        if value > BUDGETS[key] * scale
+    ]
+    failures += [
+        f"--help imported {name}"
+        for name in LAZY_MODULES
+        if any(m == name or m.startswith(name + ".") for m in modules)
+    ]
+    return {
+        "results": results,
+        "budgets": {k: v * scale for k, v in BUDGETS.items()},
+        "import_profile_us": ranked,
+        "failures": failures,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Best of N runs")
+    parser.add_argument("--json", action="store_true", help="Print a JSON report")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args.runs)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print("Import profile of --help (cumulative):")
+        for name, us in report["import_profile_us"]:
+            print(f"  {us / 1000:8.1f} ms  {name}")
+        for key, value in report["results"].items():
+            print(f"{key:28} {value:.3f}s (budget {report['budgets'][key]:.3f}s)")
+        for failure in report["failures"]:
+            print(f"FAIL {failure}")
+    return 1 if report["failures"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())